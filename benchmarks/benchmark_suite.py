@@ -0,0 +1,228 @@
+"""
+Benchmark the habit tracker hot paths on a generated store.
+
+Builds a store of N habits with M years of seeded completion data, times
+loading and saving the store, the CLI commands and the analytics, and
+prints the results as JSON. Pass --compare with an earlier result file to
+flag regressions.
+
+Usage:
+    python benchmarks/benchmark_suite.py --habits 1000 --years 2 --output bench.json
+    python benchmarks/benchmark_suite.py --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from click.testing import CliRunner
+
+from habit_tracker import cli as cli_module
+from habit_tracker.analytics import analytics, analytics_manager
+from habit_tracker.analytics.completion_heatmap import weekday_hour_histograms
+from habit_tracker.analytics.habit_metrics import analyze_habit
+from habit_tracker.analytics.parallel_analytics import analyze_habits_parallel
+from habit_tracker.models.habit_manager import HabitManager
+from habit_tracker.utils.habit_importer import normalize_habit_record
+from habit_tracker.utils.streak_calculator import StreakCalculator
+from habit_tracker.utils.time_utils import FixedClock, current_time, set_clock
+from test_data_generator import generate_scaled_test_data
+
+def time_call(func, repeat):
+    """
+    Time a callable after one untimed warm-up run (lazy imports, caches).
+
+    Returns:
+        Dictionary with the run count and min, median and mean time in milliseconds
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'runs': repeat,
+        'min_ms': min(timings),
+        'median_ms': statistics.median(timings),
+        'mean_ms': statistics.mean(timings)
+    }
+
+def build_store(storage_path, num_habits, years, seed):
+    """Generate seeded data and write it to a new store."""
+    end_date = datetime.combine(current_time().date(), datetime.min.time())
+    raw_habits = generate_scaled_test_data(num_habits, int(years * 365), seed, end_date)
+    manager = HabitManager(storage_path=storage_path, max_habits=None)
+    manager.import_habits([normalize_habit_record(h) for h in raw_habits])
+    manager.save_data()
+    return manager
+
+def run_cli(runner, args):
+    """Run a CLI command in-process against the already loaded store."""
+    result = runner.invoke(cli_module.cli, args, catch_exceptions=False)
+    if result.exit_code != 0:
+        raise RuntimeError(f"'{' '.join(args)}' failed: {result.output}")
+
+def benchmark_store(storage_path, args):
+    """Run all benchmarks against one store and return the timings."""
+    manager = build_store(storage_path, args.habits, args.years, args.seed)
+    results = {}
+
+    results['load_data'] = time_call(manager.load_data, args.repeat)
+    results['save_data'] = time_call(manager.save_data, args.repeat)
+
+    habits = manager.habits
+    target = habits[0]
+    check_dates = iter(current_time() + timedelta(days=i + 1) for i in range(args.repeat + 1))
+    results['complete'] = time_call(
+        lambda: manager.complete_habit(target, next(check_dates)), args.repeat
+    )
+
+    # Run the commands on the loaded manager so they measure command work only
+    cli_module._habit_manager = manager
+    cli_module._analytics_cache = None
+    runner = CliRunner()
+
+    def analyze_uncached():
+        cli_module.get_analytics_cache().clear()
+        run_cli(runner, ['analyze'])
+    results['cli_analyze_uncached'] = time_call(analyze_uncached, args.repeat)
+    results['cli_analyze'] = time_call(lambda: run_cli(runner, ['analyze']), args.repeat)
+    results['cli_details'] = time_call(
+        lambda: run_cli(runner, ['details', str(target.id)]), args.repeat
+    )
+    results['cli_calendar'] = time_call(lambda: run_cli(runner, ['calendar']), args.repeat)
+    results['cli_calendar_year'] = time_call(
+        lambda: run_cli(runner, ['calendar', '--view', 'year']), args.repeat
+    )
+    cli_module._habit_manager = None
+    cli_module._analytics_cache = None
+
+    histories = [(h, h.completions) for h in habits]
+    results['streak_calculator_scalar'] = time_call(lambda: [
+        (StreakCalculator.calculate_current_streak(dates, h.periodicity),
+         StreakCalculator.calculate_longest_streak(dates, h.periodicity))
+        for h, dates in histories
+    ], args.repeat)
+    results['streak_calculator_batch'] = time_call(
+        lambda: StreakCalculator.calculate_habit_streaks(habits), args.repeat
+    )
+
+    # All per-habit metrics from one scan of each stored history
+    results['habit_metrics'] = time_call(lambda: [analyze_habit(h) for h in habits], args.repeat)
+
+    results['weekday_hour_histograms'] = time_call(lambda: weekday_hour_histograms(habits), args.repeat)
+
+    results['analytics_parallel'] = time_call(
+        lambda: analyze_habits_parallel(habits, args.workers or None), args.repeat
+    )
+
+    # Range breakdowns answered from the maintained rollups
+    rollups = manager.rollups
+    range_end = current_time().date()
+    range_start = range_end - timedelta(days=int(args.years * 365))
+    results['rollup_breakdown'] = time_call(lambda: (
+        rollups.periodicity_breakdown(range_start, range_end),
+        rollups.weekly_counts(range_start, range_end)
+    ), args.repeat)
+
+    for name, module in (('analytics', analytics), ('analytics_manager', analytics_manager)):
+        def run_module(module=module):
+            rates = []
+            for h, dates in histories:
+                rate = module.get_completion_rate(dates, h.periodicity, h.creation_date)
+                module.get_streak_analysis(dates, h.periodicity)
+                module.get_habit_patterns(dates)
+                rates.append({'name': h.name, 'periodicity': h.periodicity, 'completion_rate': rate})
+            module.analyze_habit_trends(rates)
+        results[name] = time_call(run_module, args.repeat)
+
+    manager.close()
+    return results
+
+def compare_results(current, baseline, threshold):
+    """
+    Compare median timings with a baseline result file.
+
+    Returns:
+        List of (benchmark, ratio) pairs that are slower than the threshold
+    """
+    regressions = []
+    for store, timings in current['results'].items():
+        for name, timing in timings.items():
+            base = baseline.get('results', {}).get(store, {}).get(name)
+            if not base or base['median_ms'] == 0:
+                continue
+            ratio = timing['median_ms'] / base['median_ms']
+            print(f"{store}/{name}: {base['median_ms']:.2f}ms -> "
+                  f"{timing['median_ms']:.2f}ms ({ratio:.2f}x)", file=sys.stderr)
+            if ratio > threshold:
+                regressions.append((f"{store}/{name}", ratio))
+    return regressions
+
+def main():
+    """Run the benchmark suite and print or save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--habits', type=int, default=100, help='Number of habits (N)')
+    parser.add_argument('--years', type=float, default=1.0, help='Years of history (M)')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the generated data')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per benchmark')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Processes for the parallel analytics (default: one per CPU)')
+    parser.add_argument('--storage', choices=['json', 'sqlite', 'binary'], action='append',
+                        help='Storage backends to benchmark (default: all)')
+    parser.add_argument('--output', help='Write the JSON results to this file')
+    parser.add_argument('--compare', help='Baseline JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Slowdown ratio reported as a regression')
+    parser.add_argument('--now', type=datetime.fromisoformat, default=datetime(2025, 1, 1, 12),
+                        help='Time the data and analytics are pinned to (ISO format)')
+    args = parser.parse_args()
+    # A fixed clock makes the generated data and every "today" the same on each run
+    set_clock(FixedClock(args.now))
+
+    extensions = {'json': 'habits.json', 'sqlite': 'habits.db', 'binary': 'habits.bin'}
+    results = {
+        'meta': {
+            'habits': args.habits,
+            'years': args.years,
+            'seed': args.seed,
+            'now': args.now.isoformat(),
+            'repeat': args.repeat,
+            'workers': args.workers or os.cpu_count(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results': {}
+    }
+    # Keep the generated stores out of the working tree
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for storage in args.storage or ['json', 'sqlite', 'binary']:
+            storage_path = os.path.join(tmp_dir, extensions[storage])
+            results['results'][storage] = benchmark_store(storage_path, args)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        for name, ratio in regressions:
+            print(f"REGRESSION {name}: {ratio:.2f}x slower", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Measure the cold start cost of the habit-tracker CLI.
+
+Runs `python -X importtime` on the CLI module and times complete CLI
+invocations in fresh interpreters, then prints the results as JSON so they
+can be tracked across versions.
+
+Usage:
+    python benchmarks/startup_benchmark.py --runs 20 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = [
+    ['--help'],
+    ['list'],
+    ['calendar'],
+]
+
+def run_python(args, cwd):
+    """Run the current interpreter with the project on the path."""
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    return subprocess.run(
+        [sys.executable] + args, cwd=cwd, env=env,
+        capture_output=True, text=True, check=True
+    )
+
+def measure_import_time(cwd, top=10):
+    """
+    Parse `-X importtime` output for the CLI module.
+
+    Returns:
+        Dictionary with the total import time and the slowest modules
+    """
+    result = run_python(['-X', 'importtime', '-c', 'import habit_tracker.cli'], cwd)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # Lines look like "import time:   524 |   48306 |     click.core"
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({
+            'module': name.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us)
+        })
+    total = next(m['cumulative_us'] for m in modules if m['module'] == 'habit_tracker.cli')
+    slowest = sorted(modules, key=lambda m: m['self_us'], reverse=True)[:top]
+    return {'total_us': total, 'slowest_modules': slowest}
+
+def measure_command(command, cwd, runs):
+    """Time a CLI command in a fresh interpreter for the given number of runs."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run_python(['-m', 'habit_tracker.cli'] + command, cwd)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'command': ' '.join(command),
+        'runs': runs,
+        'median_ms': statistics.median(timings),
+        'min_ms': min(timings),
+        'max_ms': max(timings)
+    }
+
+def main():
+    """Run the startup benchmark and print or save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Invocations per command')
+    parser.add_argument('--output', help='Write the JSON results to this file')
+    args = parser.parse_args()
+
+    # Run in a scratch directory so the benchmark never touches real data
+    with tempfile.TemporaryDirectory() as cwd:
+        results = {
+            'python': sys.version.split()[0],
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'import_time': measure_import_time(cwd),
+            'commands': [measure_command(command, cwd, args.runs) for command in COMMANDS]
+        }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+if __name__ == '__main__':
+    main()
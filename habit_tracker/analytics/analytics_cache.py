@@ -0,0 +1,140 @@
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+from ..utils.profiling import profiled
+from ..utils.metrics import observed
+from ..utils.time_utils import current_time
+
+class AnalyticsCache:
+    """
+    Memoizes analytics results per habit and data version.
+
+    Results are keyed by the analysis name, the current date (streaks depend
+    on the current period) and the id, creation date, version and whole days
+    since creation of every habit involved. Completion rates divide by those
+    days, which can change in the middle of a date for a habit created at a
+    later time of day. Habit.version is bumped on every change to a habit's
+    history, so a changed habit never hits an old entry.
+
+    Entries are evicted least recently used first once their JSON size
+    exceeds the memory budget. With a path, the cache is loaded from and
+    saved to a JSON file so results survive between CLI runs.
+    """
+
+    def __init__(self, max_bytes: int = 4 << 20, path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Memory budget, measured as the JSON size of keys and values
+            path: File to persist the cache in, or None to keep it in memory only
+        """
+        self.max_bytes = max_bytes
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._dirty = False
+        if path:
+            self._load()
+
+    @profiled('analytics')
+    @observed('analytics_cache_lookup')
+    def get_or_compute(self, name: str, habits: Iterable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result of an analysis or compute and store it.
+
+        Args:
+            name: Name of the analysis, including any arguments besides the habits
+            habits: Habits whose data the result depends on
+            compute: Computes the result; it must be JSON serializable
+
+        Returns:
+            The result, which callers must not modify
+        """
+        habits = list(habits)
+        value = self.get(name, habits)
+        if value is None:
+            value = compute()
+            self.put(name, habits, value)
+        return value
+
+    def get(self, name: str, habits: Iterable) -> Any:
+        """
+        Look up the cached result of an analysis.
+
+        Returns:
+            The result, or None if it isn't cached
+        """
+        key = self._key(name, habits)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, name: str, habits: Iterable, value: Any) -> None:
+        """Store the result of an analysis; it must be JSON serializable."""
+        key = self._key(name, habits)
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        self._store(key, value, len(key) + len(json.dumps(value)))
+        self._dirty = True
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+        self.size = 0
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write today's entries to the cache file if anything changed."""
+        if not self.path or not self._dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump([[key, value] for key, (value, _) in self._entries.items()], f)
+        os.replace(temp_path, self.path)
+        self._dirty = False
+
+    @staticmethod
+    def _key(name: str, habits: Iterable) -> str:
+        """Build the key of an analysis of the given habits as of now."""
+        now = current_time()
+        return json.dumps([
+            name,
+            now.date().isoformat(),
+            [[h.id, h.creation_date.isoformat(), h.version, (now - h.creation_date).days]
+             for h in habits]
+        ], separators=(',', ':'))
+
+    def _load(self) -> None:
+        """Read the entries saved for today, ignoring a missing or corrupt file."""
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+            today = current_time().date().isoformat()
+            for key, value in entries:
+                # Entries from earlier days can never be hit again
+                if json.loads(key)[1] == today:
+                    self._store(key, value, len(key) + len(json.dumps(value)))
+        except (OSError, ValueError, TypeError, IndexError):
+            self.clear()
+        self._dirty = False
+
+    def _store(self, key: str, value: Any, size: int) -> None:
+        """Insert an entry and evict the least recently used ones over budget."""
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
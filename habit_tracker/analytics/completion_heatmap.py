@@ -0,0 +1,104 @@
+from typing import Dict, List, Sequence, Tuple
+from ..utils.profiling import profiled
+from ..utils.metrics import observed
+from ..utils.time_utils import SECONDS_PER_DAY
+from .habit_metrics import DAYPARTS, hour_table
+
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+CELLS = 7 * 24
+
+@profiled('analytics')
+@observed('weekday_hour_histograms')
+def weekday_hour_histograms(habits: Sequence['Habit'],
+                            chunk_completions: int = 1 << 22) -> 'np.ndarray':
+    """
+    Count the completions of each habit per weekday and hour.
+
+    Every completion is packed into one code, habit * 168 + weekday * 24 +
+    hour, and all codes are counted with a single np.bincount. Habits are
+    processed in chunks of about chunk_completions completions to bound the
+    memory of the temporary arrays.
+
+    Args:
+        habits: Habits to count
+        chunk_completions: Completions to convert at a time
+
+    Returns:
+        Array of shape (len(habits), 7, 24), with Monday as weekday 0
+    """
+    import numpy as np
+
+    histograms = np.zeros((len(habits), CELLS), dtype=np.int64)
+    start = size = 0
+    for index, habit in enumerate(habits):
+        size += len(habit.completion_epochs)
+        if size >= chunk_completions or index == len(habits) - 1:
+            chunk = habits[start:index + 1]
+            epochs = np.concatenate(
+                [np.frombuffer(h.completion_epochs, dtype=np.int64) for h in chunk]
+            )
+            owners = np.repeat(np.arange(len(chunk)), [len(h.completion_epochs) for h in chunk])
+            codes = owners * CELLS + _cell_codes(epochs)
+            histograms[start:index + 1] = np.bincount(
+                codes, minlength=len(chunk) * CELLS
+            ).reshape(len(chunk), CELLS)
+            start, size = index + 1, 0
+    return histograms.reshape(len(habits), 7, 24)
+
+@profiled('analytics')
+@observed('bucket_counts')
+def bucket_counts(histograms: 'np.ndarray',
+                  dayparts: Sequence[Tuple[str, int]] = DAYPARTS) -> Dict[str, object]:
+    """
+    Sum weekday-by-hour histograms into time-of-day buckets.
+
+    Args:
+        histograms: One histogram of shape (7, 24) or a stack of them
+        dayparts: Time-of-day buckets as (name, first hour)
+
+    Returns:
+        Dictionary mapping each bucket name to its count, or to a list of
+        counts for a stack of histograms
+    """
+    import numpy as np
+
+    names = list(dict.fromkeys(name for name, _ in dayparts))
+    table = hour_table(dayparts)
+    # Hours x buckets matrix with a 1 where the hour belongs to the bucket
+    membership = np.array([[hour_name == name for name in names] for hour_name in table],
+                          dtype=np.int64)
+    counts = histograms.sum(axis=-2) @ membership
+    return {name: counts[..., index].tolist() for index, name in enumerate(names)}
+
+def parse_dayparts(spec: str) -> Tuple[Tuple[str, int], ...]:
+    """
+    Parse time-of-day buckets written as 'name=hour,name=hour,...'.
+
+    Each bucket starts at its hour and lasts until the next one starts;
+    the last one wraps around midnight.
+
+    Raises:
+        ValueError: If the specification is malformed
+    """
+    dayparts: List[Tuple[str, int]] = []
+    for part in spec.split(','):
+        name, separator, hour = part.partition('=')
+        name = name.strip()
+        if not separator or not name:
+            raise ValueError(f"Invalid bucket '{part.strip()}', expected name=hour")
+        try:
+            first_hour = int(hour)
+        except ValueError:
+            raise ValueError(f"Invalid hour '{hour.strip()}' for bucket '{name}'")
+        if not 0 <= first_hour < 24:
+            raise ValueError(f"Hour of bucket '{name}' must be between 0 and 23")
+        dayparts.append((name, first_hour))
+    if len({hour for _, hour in dayparts}) != len(dayparts):
+        raise ValueError("Buckets must start at different hours")
+    return tuple(dayparts)
+
+def _cell_codes(epochs: 'np.ndarray') -> 'np.ndarray':
+    """Convert epoch seconds to weekday * 24 + hour codes."""
+    days, seconds = divmod(epochs, SECONDS_PER_DAY)
+    # The epoch fell on a Thursday, weekday 3 when Monday is 0
+    return (days + 3) % 7 * 24 + seconds // 3600
@@ -0,0 +1,137 @@
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+from ..utils.profiling import profiled
+from ..utils.metrics import observed
+from ..utils.time_utils import SECONDS_PER_DAY, current_time, to_epoch_seconds, week_ordinal
+
+# Time-of-day buckets as (name, first hour); a bucket lasts until the next
+# one starts, and the last one wraps around midnight
+DAYPARTS = (('morning', 5), ('afternoon', 12), ('evening', 17), ('night', 22))
+
+@profiled('analytics')
+@observed('analyze_habit')
+def analyze_habit(habit: 'Habit',
+                  now: Optional[datetime] = None,
+                  dayparts: Sequence[Tuple[str, int]] = DAYPARTS) -> Dict[str, Any]:
+    """
+    Compute all metrics of a habit from its stored history.
+
+    The history is already sorted, so this needs no sort and no datetime
+    conversion.
+
+    Args:
+        habit: The habit to analyze
+        now: Reference time (defaults to now)
+        dayparts: Time-of-day buckets as (name, first hour)
+
+    Returns:
+        Metrics as returned by analyze_completions
+    """
+    return _scan(habit.completion_epochs, habit.periodicity, habit.creation_date,
+                 now or current_time(), dayparts)
+
+@profiled('analytics')
+@observed('analyze_completions')
+def analyze_completions(check_dates: Iterable[datetime],
+                        periodicity: str,
+                        start_date: Optional[datetime] = None,
+                        now: Optional[datetime] = None,
+                        dayparts: Sequence[Tuple[str, int]] = DAYPARTS) -> Dict[str, Any]:
+    """
+    Compute all metrics of a habit with one sort and one pass over its completions.
+
+    Args:
+        check_dates: Completion dates or datetimes, in any order
+        periodicity: 'daily' or 'weekly'
+        start_date: When the habit was started, needed for the completion rate
+        now: Reference time (defaults to now)
+        dayparts: Time-of-day buckets as (name, first hour)
+
+    Returns:
+        Dictionary with:
+            completion_rate: Share of the days (daily) or weeks (weekly) since
+                the start with a completion, capped at 100 (None without start_date)
+            completed_days: Number of distinct days with a completion
+            elapsed_days: Whole days from start_date to now (None without start_date)
+            current_streak: Streak of consecutive periods that is still alive
+            max_streak: Longest streak of consecutive periods
+            avg_streak: Average length of all streaks
+            patterns: Number of completions per time-of-day bucket
+    """
+    epochs = sorted(
+        to_epoch_seconds(d if isinstance(d, datetime) else datetime.combine(d, datetime.min.time()))
+        for d in check_dates
+    )
+    if isinstance(start_date, date) and not isinstance(start_date, datetime):
+        start_date = datetime.combine(start_date, datetime.min.time())
+    return _scan(epochs, periodicity, start_date, now or current_time(), dayparts)
+
+def _scan(epochs: Sequence[int],
+          periodicity: str,
+          start_date: Optional[datetime],
+          now: datetime,
+          dayparts: Sequence[Tuple[str, int]]) -> Dict[str, Any]:
+    """Compute the metrics of a sorted sequence of completion times."""
+    bucket_of_hour = hour_table(dayparts)
+    patterns = dict.fromkeys((name for name, _ in dayparts), 0)
+    weekly = periodicity == 'weekly'
+
+    completed_days = streak = max_streak = streak_count = streak_total = 0
+    last_day = last_period = None
+    for epoch in epochs:
+        day, seconds = divmod(epoch, SECONDS_PER_DAY)
+        patterns[bucket_of_hour[seconds // 3600]] += 1
+        if day == last_day:
+            continue
+        completed_days += 1
+        last_day = day
+        period = week_ordinal(day) if weekly else day
+        if period == last_period:
+            continue
+        if last_period is not None and period == last_period + 1:
+            streak += 1
+        else:
+            if streak:
+                streak_count += 1
+                streak_total += streak
+            streak = 1
+        max_streak = max(max_streak, streak)
+        last_period = period
+    if streak:
+        streak_count += 1
+        streak_total += streak
+
+    # The last streak stays alive until a whole period passes without completion
+    now_day = to_epoch_seconds(now) // SECONDS_PER_DAY
+    now_period = week_ordinal(now_day) if weekly else now_day
+    current_streak = streak if last_period is not None and now_period - last_period <= 1 else 0
+
+    completion_rate = elapsed_days = None
+    if start_date is not None:
+        elapsed_days = (now - start_date).days
+        days = max(elapsed_days, 1)
+        expected = max(days // 7, 1) if weekly else days
+        completion_rate = min(completed_days / expected * 100, 100.0)
+
+    return {
+        'completion_rate': completion_rate,
+        'completed_days': completed_days,
+        'elapsed_days': elapsed_days,
+        'current_streak': current_streak,
+        'max_streak': max_streak,
+        'avg_streak': streak_total / streak_count if streak_count else 0.0,
+        'patterns': patterns
+    }
+
+def hour_table(dayparts: Sequence[Tuple[str, int]]) -> Tuple[str, ...]:
+    """Map each hour of the day to its bucket name."""
+    starts = sorted(dayparts, key=lambda part: part[1])
+    # Hours before the first bucket belong to the one running past midnight
+    name = starts[-1][0]
+    table = []
+    for hour in range(24):
+        for bucket, first_hour in starts:
+            if first_hour == hour:
+                name = bucket
+        table.append(name)
+    return tuple(table)
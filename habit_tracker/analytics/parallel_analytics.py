@@ -0,0 +1,122 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from ..utils.profiling import profiled
+from ..utils.metrics import observed
+from ..utils.time_utils import SECONDS_PER_DAY, current_time
+
+PERIODICITIES = ('daily', 'weekly')
+
+@profiled('analytics')
+@observed('analyze_habits_parallel')
+def analyze_habits_parallel(habits: List['Habit'],
+                            workers: Optional[int] = None,
+                            chunk_size: Optional[int] = None,
+                            now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Compute completion rates and trends for many habits across processes.
+
+    Habits are split into chunks, and each chunk is sent to a worker as
+    numpy arrays of day ordinals and per-habit offsets instead of pickled
+    Habit objects. Workers return the rates of their habits together with
+    partial per-periodicity sums, which are merged here. The results match
+    analytics_manager.get_completion_rate and analyze_habit_trends.
+
+    Args:
+        habits: Habits to analyze
+        workers: Number of worker processes (defaults to the number of CPUs);
+            1 analyzes in this process
+        chunk_size: Habits per chunk (defaults to four chunks per worker)
+        now: Reference time for the completion rates (defaults to now)
+
+    Returns:
+        Dictionary with 'completion_rates' in habit order and 'trends' in
+        the format of analyze_habit_trends
+    """
+    now = now or current_time()
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(-(-len(habits) // (workers * 4)), 1)
+    chunks = [habits[i:i + chunk_size] for i in range(0, len(habits), chunk_size)]
+    payloads = [_pack_chunk(chunk, now) for chunk in chunks]
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            results = list(executor.map(_analyze_chunk, *zip(*payloads)))
+    else:
+        results = [_analyze_chunk(*payload) for payload in payloads]
+
+    rates: List[float] = []
+    sums = {p: [0, 0.0] for p in PERIODICITIES}
+    best = worst = None
+    for chunk_rates, chunk_sums, (high, low) in results:
+        offset = len(rates)
+        rates.extend(chunk_rates)
+        for periodicity, (count, total) in chunk_sums.items():
+            sums[periodicity][0] += count
+            sums[periodicity][1] += total
+        # Ties go to the earlier habit, as with max() and min() over a list
+        if high is not None and (best is None or rates[offset + high] > rates[best]):
+            best = offset + high
+        if low is not None and (worst is None or rates[offset + low] < rates[worst]):
+            worst = offset + low
+
+    # Periodicities are listed in order of first appearance, like analyze_habit_trends
+    trends = {
+        'by_periodicity': {
+            periodicity: {
+                'count': sums[periodicity][0],
+                'avg_completion_rate': sums[periodicity][1] / sums[periodicity][0]
+            }
+            for periodicity in dict.fromkeys(h.periodicity for h in habits)
+        },
+        'most_successful': habits[best].name if best is not None else None,
+        'least_successful': habits[worst].name if worst is not None else None,
+        'total_habits': len(habits)
+    }
+    return {'completion_rates': rates, 'trends': trends}
+
+def _pack_chunk(habits: List['Habit'], now: datetime) -> Tuple:
+    """Convert a chunk of habits to the compact arrays sent to a worker."""
+    import numpy as np
+
+    offsets = np.zeros(len(habits) + 1, dtype=np.int64)
+    np.cumsum([len(h.completion_epochs) for h in habits], out=offsets[1:])
+    epochs = np.concatenate(
+        [np.frombuffer(h.completion_epochs, dtype=np.int64) for h in habits]
+        or [np.empty(0, dtype=np.int64)]
+    )
+    ordinals = (epochs // SECONDS_PER_DAY).astype(np.int32)
+    weekly = np.array([h.periodicity == 'weekly' for h in habits], dtype=bool)
+    # The expected number of completions is computed here so it uses the
+    # exact creation date, as get_completion_rate does
+    days = np.array([max((now - h.creation_date).days, 1) for h in habits], dtype=np.int64)
+    expected = np.where(weekly, np.maximum(days // 7, 1), days)
+    return ordinals, offsets, expected, weekly
+
+def _analyze_chunk(ordinals: 'np.ndarray', offsets: 'np.ndarray',
+                   expected: 'np.ndarray', weekly: 'np.ndarray') -> Tuple:
+    """
+    Compute the completion rates of one chunk of habits.
+
+    Returns:
+        Tuple of (rates, {periodicity: (count, rate sum)}, (index of the
+        highest rate, index of the lowest rate))
+    """
+    import numpy as np
+
+    habit_count = len(expected)
+    owners = np.repeat(np.arange(habit_count), np.diff(offsets))
+    # Histories are sorted, so a new distinct day starts wherever the
+    # ordinal or the owner changes
+    new_day = np.ones(len(ordinals), dtype=bool)
+    new_day[1:] = (ordinals[1:] != ordinals[:-1]) | (owners[1:] != owners[:-1])
+    distinct_days = np.bincount(owners[new_day], minlength=habit_count)
+    rates = np.minimum(distinct_days / expected * 100, 100.0)
+
+    sums = {
+        periodicity: (int(mask.sum()), float(rates[mask].sum()))
+        for periodicity, mask in (('daily', ~weekly), ('weekly', weekly))
+    }
+    extremes = (int(np.argmax(rates)), int(np.argmin(rates))) if habit_count else (None, None)
+    return rates.tolist(), sums, extremes
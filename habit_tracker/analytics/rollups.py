@@ -0,0 +1,217 @@
+import json
+import os
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from ..utils.profiling import profiled
+from ..utils.metrics import observed
+from ..utils.time_utils import EPOCH, day_ordinal, week_ordinal
+
+PERIODICITIES = ('daily', 'weekly')
+EPOCH_DATE = EPOCH.date()
+
+class CompletionRollups:
+    """
+    Completion counts per day and per ISO week, split by periodicity.
+
+    The counts are updated as completions are recorded, so range queries
+    cost one lookup per day or week in the range instead of a scan over
+    every habit's history.
+
+    For each habit the rollups remember the version, number and sum of the
+    completions already counted. sync() uses them to count only what was
+    added since, for example by journaled completions, and falls back to a
+    full rebuild when a history changed in a way that can't be caught up.
+    """
+
+    def __init__(self):
+        """Initialize empty rollups."""
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop all counts."""
+        self.days: Dict[str, Dict[int, int]] = {p: {} for p in PERIODICITIES}
+        self.weeks: Dict[str, Dict[int, int]] = {p: {} for p in PERIODICITIES}
+        # id -> [periodicity, version, completion count, completion sum]
+        self.habits: Dict[int, list] = {}
+        self.dirty = False
+
+    def add(self, habit, epochs: Iterable[int]) -> None:
+        """
+        Count new completions of a habit.
+
+        Args:
+            habit: The habit, after the completions were added to it
+            epochs: The added completion times as seconds since the epoch
+        """
+        state = self.habits.setdefault(habit.id, [habit.periodicity, habit.version, 0, 0])
+        days, weeks = self.days[habit.periodicity], self.weeks[habit.periodicity]
+        for epoch in epochs:
+            day = day_ordinal(epoch)
+            week = week_ordinal(day)
+            days[day] = days.get(day, 0) + 1
+            weeks[week] = weeks.get(week, 0) + 1
+            state[2] += 1
+            state[3] += epoch
+        state[1] = habit.version
+        self.dirty = True
+
+    def remove(self, habit) -> None:
+        """Subtract all completions of a removed habit."""
+        if self.habits.pop(habit.id, None) is None:
+            return
+        days, weeks = self.days[habit.periodicity], self.weeks[habit.periodicity]
+        for epoch in habit.completion_epochs:
+            day = day_ordinal(epoch)
+            for counts, key in ((days, day), (weeks, week_ordinal(day))):
+                counts[key] -= 1
+                if not counts[key]:
+                    del counts[key]
+        self.dirty = True
+
+    def sync(self, habits: Iterable) -> None:
+        """
+        Catch up with the current state of the habits.
+
+        Habits whose version hasn't changed are skipped without touching
+        their history.
+        """
+        habits = list(habits)
+        if self.habits.keys() - {habit.id for habit in habits}:
+            # Removed habits can't be subtracted without their history
+            self.rebuild(habits)
+            return
+        for habit in habits:
+            state = self.habits.get(habit.id)
+            if state is not None and state[1] == habit.version:
+                continue
+            epochs = habit.completion_epochs
+            count = state[2] if state else 0
+            if state and (state[0] != habit.periodicity or len(epochs) < count
+                          or sum(epochs[:count]) != state[3]):
+                # Completions were inserted before the ones already counted
+                self.rebuild(habits)
+                return
+            self.add(habit, epochs[count:])
+
+    def rebuild(self, habits: Iterable) -> None:
+        """Recount all completions of the given habits."""
+        self.clear()
+        for habit in habits:
+            self.add(habit, habit.completion_epochs)
+        self.dirty = True
+
+    @profiled('analytics')
+    @observed('count_completions')
+    def count_completions(self, start: date, end: date, periodicity: Optional[str] = None) -> int:
+        """
+        Count the completions within [start, end).
+
+        Args:
+            start: First day to include
+            end: First day after the range
+            periodicity: Only count habits with this periodicity
+        """
+        return sum(count for _, count in self.daily_counts(start, end, periodicity))
+
+    @profiled('analytics')
+    @observed('daily_counts')
+    def daily_counts(self, start: date, end: date,
+                     periodicity: Optional[str] = None) -> List[Tuple[date, int]]:
+        """
+        Get the number of completions on each day within [start, end).
+
+        Returns:
+            (day, completions) pairs for every day in the range
+        """
+        first, last = (start - EPOCH_DATE).days, (end - EPOCH_DATE).days
+        tables = self._tables(self.days, periodicity)
+        return [
+            (EPOCH_DATE + timedelta(days=day), sum(table.get(day, 0) for table in tables))
+            for day in range(first, last)
+        ]
+
+    @profiled('analytics')
+    @observed('weekly_counts')
+    def weekly_counts(self, start: date, end: date,
+                      periodicity: Optional[str] = None) -> List[Tuple[date, int]]:
+        """
+        Get the number of completions in each ISO week overlapping [start, end).
+
+        Weeks are counted whole, including days outside the range.
+
+        Returns:
+            (monday, completions) pairs for every week in the range
+        """
+        first = week_ordinal((start - EPOCH_DATE).days)
+        last = week_ordinal((end - EPOCH_DATE).days - 1)
+        tables = self._tables(self.weeks, periodicity)
+        # Week ordinal 0 started on Monday 1969-12-29
+        monday = EPOCH_DATE - timedelta(days=3)
+        return [
+            (monday + timedelta(weeks=week), sum(table.get(week, 0) for table in tables))
+            for week in range(first, last + 1)
+        ]
+
+    @profiled('analytics')
+    @observed('periodicity_breakdown')
+    def periodicity_breakdown(self, start: date, end: date) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize the completions within [start, end) per periodicity.
+
+        The completion rate relates the completions to one per habit and
+        day (daily habits) or week (weekly habits) of the range.
+
+        Returns:
+            Dictionary mapping each periodicity with habits to its habit
+            count, completions and average completion rate
+        """
+        days = max((end - start).days, 1)
+        periods = {'daily': days, 'weekly': max(days // 7, 1)}
+        habit_counts = {p: 0 for p in PERIODICITIES}
+        for periodicity, *_ in self.habits.values():
+            habit_counts[periodicity] += 1
+
+        breakdown = {}
+        for periodicity in PERIODICITIES:
+            if not habit_counts[periodicity]:
+                continue
+            completions = self.count_completions(start, end, periodicity)
+            expected = habit_counts[periodicity] * periods[periodicity]
+            breakdown[periodicity] = {
+                'count': habit_counts[periodicity],
+                'completions': completions,
+                'avg_completion_rate': min(completions / expected * 100, 100.0)
+            }
+        return breakdown
+
+    def save(self, path: str) -> None:
+        """Write the rollups to a JSON file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'habits': self.habits, 'days': self.days, 'weeks': self.weeks}, f)
+        os.replace(temp_path, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> 'CompletionRollups':
+        """Read rollups from a JSON file, or start empty if it is missing or corrupt."""
+        rollups = cls()
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            rollups.habits = {int(k): v for k, v in data['habits'].items()}
+            for name in ('days', 'weeks'):
+                setattr(rollups, name, {
+                    p: {int(k): v for k, v in data[name][p].items()} for p in PERIODICITIES
+                })
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return cls()
+        return rollups
+
+    @staticmethod
+    def _tables(counts: Dict[str, Dict[int, int]], periodicity: Optional[str]) -> List[Dict[int, int]]:
+        """Select the count tables of one or all periodicities."""
+        return [counts[periodicity]] if periodicity else list(counts.values())
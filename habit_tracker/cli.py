@@ -1,37 +1,356 @@
+import time
+# Start of the 'import' phase reported by --profile
+_import_started = time.perf_counter()
 import click
+import sys
 from datetime import datetime
 from typing import Optional
-from .utils.calendar_view import CalendarView
-
-from .models.habit_manager import HabitManager
-from .utils.habit_validator import HabitValidator
-from .utils.habit_logger import HabitLogger
-from .analytics.analytics_manager import (
-    get_completion_rate,
-    get_habit_patterns,
-    analyze_habit_trends,
-    get_streak_analysis
-)
+from .utils.profiling import phase, profiled
+from .utils.time_utils import current_time, frozen_time, to_epoch_seconds
+
+# Subsystems are imported and constructed on first use, so commands that
+# don't need them (like --help) never load the store or open the log file.
+_storage_path = None
+_max_habits = 10
+_persist_analytics = True
+_log_options = {}
+_habit_manager = None
+_habit_logger = None
+_analytics_cache = None
+# Arguments to forward to a running daemon, set when run as a program
+_client_args = None
+# Whether this process is the daemon, with settings fixed by `serve`
+_serving = False
+# Sizes and modification times of the store's files after the daemon's last request
+_store_state = None
+
+def get_habit_manager():
+    """Get the habit manager, loading the store on first use."""
+    global _habit_manager
+    if _habit_manager is None:
+        with phase('import'):
+            from .models.habit_manager import HabitManager
+        if _storage_path:
+            _habit_manager = HabitManager(storage_path=_storage_path, max_habits=_max_habits)
+        else:
+            _habit_manager = HabitManager(max_habits=_max_habits)
+    return _habit_manager
+
+def _close_habit_manager():
+    """Close the loaded store, so the next command loads it again."""
+    global _habit_manager, _analytics_cache
+    if _habit_manager is not None:
+        _habit_manager.close()
+    _habit_manager = None
+    _analytics_cache = None
+
+def get_habit_logger():
+    """Get the habit logger, creating it on first use."""
+    global _habit_logger
+    if _habit_logger is None:
+        with phase('import'):
+            from .utils.habit_logger import HabitLogger
+        with phase('logging'):
+            _habit_logger = HabitLogger(**_log_options)
+    return _habit_logger
 
-habit_manager = HabitManager()
-habit_logger = HabitLogger()
+def get_analytics_cache():
+    """Get the analytics cache, loading the results saved next to the store on first use."""
+    global _analytics_cache
+    if _analytics_cache is None:
+        with phase('import'):
+            from .analytics.analytics_cache import AnalyticsCache
+        path = None
+        if _persist_analytics:
+            from .storage.storage_factory import parse_storage_path
+            _, store_path = parse_storage_path(get_habit_manager().storage_path)
+            path = store_path + '.analytics.json'
+        with phase('analytics'):
+            _analytics_cache = AnalyticsCache(path=path)
+    return _analytics_cache
 
+@profiled('rendering')
 def format_habit_info(habit):
     """Format habit information for display."""
     return (
         f"ID: {habit.id}\n"
         f"Name: {habit.name}\n"
         f"Periodicity: {habit.periodicity}\n"
-        f"Current streak: {habit.streak_count}\n"
+        f"Current streak: {habit.get_current_streak()}\n"
+        f"Longest streak: {habit.longest_streak}\n"
         f"Total completions: {habit.total_check_count}\n"
         f"Created: {habit.creation_date.strftime('%Y-%m-%d')}\n"
         f"Last checked: {habit.last_check_date.strftime('%Y-%m-%d') if habit.last_check_date else 'Never'}\n"
     )
 
 @click.group()
-def cli():
+@click.option(
+    '--storage',
+    envvar='HABIT_TRACKER_STORAGE',
+    default=None,
+    help='Habit store to use, e.g. data/habits.db, data/habits.bin or sqlite:///path/habits.db'
+)
+@click.option(
+    '--max-habits',
+    envvar='HABIT_TRACKER_MAX_HABITS',
+    type=click.IntRange(min=0),
+    default=10,
+    show_default=True,
+    help='Maximum number of habits to track (0 for no limit)'
+)
+@click.option(
+    '--analytics-cache/--no-analytics-cache',
+    envvar='HABIT_TRACKER_ANALYTICS_CACHE',
+    default=True,
+    show_default=True,
+    help='Keep analytics results in a file next to the store between runs'
+)
+@click.option(
+    '--log-file',
+    envvar='HABIT_TRACKER_LOG_FILE',
+    type=click.Path(dir_okay=False),
+    default=None,
+    help='Activity log to write (default: logs/habit_tracker.log in the package)'
+)
+@click.option(
+    '--log-async/--log-sync',
+    envvar='HABIT_TRACKER_LOG_ASYNC',
+    default=True,
+    show_default=True,
+    help='Write the activity log from a background thread'
+)
+@click.option(
+    '--log-max-bytes',
+    envvar='HABIT_TRACKER_LOG_MAX_BYTES',
+    type=click.IntRange(min=0),
+    default=1 << 20,
+    show_default=True,
+    help='Rotate the activity log before it grows past this size (0 for no limit)'
+)
+@click.option(
+    '--log-rotate',
+    envvar='HABIT_TRACKER_LOG_ROTATE',
+    type=click.Choice(['never', 'hourly', 'daily', 'weekly'], case_sensitive=False),
+    default='never',
+    show_default=True,
+    help='Also start a new activity log every hour, day or week (UTC)'
+)
+@click.option(
+    '--log-backups',
+    envvar='HABIT_TRACKER_LOG_BACKUPS',
+    type=click.IntRange(min=1),
+    default=5,
+    show_default=True,
+    help='Number of rotated activity logs to keep'
+)
+@click.option(
+    '--log-compress/--no-log-compress',
+    envvar='HABIT_TRACKER_LOG_COMPRESS',
+    default=True,
+    show_default=True,
+    help='Gzip rotated activity logs'
+)
+@click.option(
+    '--daemon/--no-daemon',
+    envvar='HABIT_TRACKER_DAEMON',
+    default=True,
+    show_default=True,
+    help='Run commands in the `serve` daemon when one is running for this store'
+)
+@click.option(
+    '--profile',
+    envvar='HABIT_TRACKER_PROFILE',
+    is_flag=True,
+    help='Report the wall time spent per phase of the command on stderr'
+)
+@click.option(
+    '--profile-output',
+    envvar='HABIT_TRACKER_PROFILE_OUTPUT',
+    type=click.Path(dir_okay=False),
+    default=None,
+    help='Also write a cProfile profile (pstats format) of the command to this file'
+)
+@click.option(
+    '--trace-output',
+    envvar='HABIT_TRACKER_TRACE_OUTPUT',
+    type=click.Path(dir_okay=False),
+    default=None,
+    help='Also write the phases of the command as a Chrome trace (JSON) to this file'
+)
+@click.option(
+    '--metrics-textfile',
+    envvar='HABIT_TRACKER_METRICS_TEXTFILE',
+    type=click.Path(dir_okay=False),
+    default=None,
+    help='Add the metrics of the command to this file for the node_exporter textfile collector'
+)
+def cli(storage: Optional[str], max_habits: int, analytics_cache: bool, log_file: Optional[str],
+        log_async: bool, log_max_bytes: int, log_rotate: str, log_backups: int, log_compress: bool,
+        daemon: bool, profile: bool, profile_output: Optional[str], trace_output: Optional[str],
+        metrics_textfile: Optional[str]):
     """Habit Tracker - Track and analyze your habits."""
-    pass
+    global _storage_path, _max_habits, _persist_analytics, _log_options
+    ctx = click.get_current_context()
+    # Every command sees a single current time, resolved once. The daemon
+    # runs for days, so it resolves the time per request instead.
+    if ctx.invoked_subcommand != 'serve':
+        ctx.with_resource(frozen_time())
+    import os
+    settings = {
+        'max_habits': max_habits or None,
+        'persist_analytics': analytics_cache,
+        'log_options': {
+            # Absolute, since a daemon runs commands in their clients' directories
+            'log_file': os.path.abspath(log_file) if log_file else None,
+            'async_mode': log_async,
+            'max_bytes': log_max_bytes,
+            'when': None if log_rotate.lower() == 'never' else log_rotate.lower(),
+            'backup_count': log_backups,
+            'compress': log_compress,
+            'index': True
+        }
+    }
+    # The daemon has no textfile to add the metrics of a forwarded command to
+    if (not _serving and daemon and not metrics_textfile and _client_args is not None
+            and ctx.invoked_subcommand != 'serve'):
+        forward_to_daemon(ctx, storage, settings)
+    # Forwarded commands are profiled by the daemon, which has no import phase
+    if profile or profile_output or trace_output:
+        from .utils.profiling import profile_session
+        started = _import_started if _client_args is not None and not _serving else None
+        ctx.with_resource(profile_session(profile_output, trace_output, started))
+    if _serving:
+        return
+    _storage_path = storage
+    _max_habits = settings['max_habits']
+    _persist_analytics = settings['persist_analytics']
+    _log_options = settings['log_options']
+    if metrics_textfile:
+        from .utils.metrics import textfile_session
+        register_gauges(ctx.with_resource(textfile_session(os.path.abspath(metrics_textfile))))
+
+def register_gauges(registry) -> None:
+    """Report the number of habits and the disk use of the store and the activity log."""
+    from .utils.metrics import files_bytes
+
+    def store_bytes():
+        # Only a store this process loaded; reading one just for metrics would be slow
+        if _habit_manager is None:
+            return None
+        from .storage.storage_factory import parse_storage_path
+        return files_bytes(parse_storage_path(_habit_manager.storage_path)[1])
+
+    def log_bytes():
+        from .utils.habit_logger import default_log_path
+        return files_bytes(_log_options.get('log_file') or default_log_path())
+
+    registry.add_gauge('habit_tracker_habits', 'Number of habits in the store.',
+                       lambda: _habit_manager.habit_count if _habit_manager is not None else None)
+    registry.add_gauge('habit_tracker_store_bytes',
+                       'Disk use of the store and the files kept next to it, in bytes.', store_bytes)
+    registry.add_gauge('habit_tracker_log_bytes',
+                       'Disk use of the activity log and its rotated backups, in bytes.', log_bytes)
+
+def forward_to_daemon(ctx: click.Context, storage: Optional[str], settings: dict) -> None:
+    """
+    Run the command in the `serve` daemon and exit, if one is running.
+
+    Returns without doing anything when no daemon is listening, or when the
+    daemon serves another store, was started with other settings or can't
+    run the command (e.g. because it prompts for input), so the command runs
+    in this process instead.
+
+    Args:
+        ctx: Context of the group, exited with the command's exit code
+        storage: The --storage value of this run
+        settings: Habit limit, analytics cache and log options of this run
+    """
+    import os
+    from .daemon import send_request, socket_path
+
+    request = {'args': _client_args, 'cwd': os.getcwd(), 'storage': storage,
+               'settings': settings, 'stdin': None}
+    if '--stdin' in _client_args:
+        request['stdin'] = sys.stdin.read()
+    try:
+        response = send_request(socket_path(), request)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: Lost connection to the daemon: {e}", err=True)
+        ctx.exit(1)
+    if response is None or response.get('fallback'):
+        if request['stdin'] is not None:
+            # Hand the input that was already read to the local run
+            import io
+            sys.stdin = io.StringIO(request['stdin'])
+        return
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    ctx.exit(response['exit_code'])
+
+def serve_request(request: dict) -> dict:
+    """Run a command forwarded by a client, if it uses the store this daemon serves."""
+    import os
+    from .daemon import run_command
+    global _store_state
+
+    cwd = os.getcwd()
+    if _resolve_store(request['storage'], request['cwd']) != _resolve_store(_storage_path, cwd):
+        return {'fallback': True}
+    # The daemon's store and log were opened with its own options, which
+    # forwarded commands can't change
+    if request.get('settings') != _daemon_settings():
+        return {'fallback': True}
+    state = _read_store_state()
+    if state != _store_state:
+        # Another process wrote the store, e.g. a --no-daemon run or a
+        # command that fell back to its client, so load it again
+        _close_habit_manager()
+    try:
+        # Relative paths in the arguments are relative to the client
+        os.chdir(request['cwd'])
+        with frozen_time(fresh=True):
+            response = run_command(cli, request['args'], request['stdin'])
+    finally:
+        os.chdir(cwd)
+    if response.get('fallback'):
+        # The client changes the store itself, so load it again for the next command
+        _close_habit_manager()
+    _store_state = _read_store_state()
+    return response
+
+def _daemon_settings() -> dict:
+    """Get the settings this daemon runs commands with, as clients send them."""
+    return {'max_habits': _max_habits, 'persist_analytics': _persist_analytics,
+            'log_options': _log_options}
+
+def _read_store_state() -> list:
+    """Get the size and modification time of each file of the served store."""
+    import glob
+    import os
+    from .storage.storage_factory import parse_storage_path
+
+    path = parse_storage_path(_storage_path)[1]
+    state = []
+    for name in sorted(glob.glob(glob.escape(path) + '*')):
+        # Saved analytics results go stale by themselves, without a reload
+        if name.endswith('.analytics.json'):
+            continue
+        try:
+            stat = os.stat(name)
+        except OSError:
+            # Removed while we were looking, e.g. by a compaction
+            continue
+        state.append((name, stat.st_size, stat.st_mtime_ns))
+    return state
+
+def _resolve_store(storage: Optional[str], cwd: str) -> str:
+    """Get the absolute storage path, with its scheme, of a --storage value."""
+    import os
+    from .models.habit_manager import DEFAULT_STORAGE_PATH
+    from .storage.storage_factory import parse_storage_path
+
+    scheme, path = parse_storage_path(storage or DEFAULT_STORAGE_PATH)
+    return f"{scheme}://{os.path.normpath(os.path.join(cwd, path))}"
 
 def show_help():
     """Show help message with example commands."""
@@ -47,8 +366,10 @@ Available Commands:
    habit-tracker add --name "Weekly Review" --periodicity weekly
 
 2. Complete a habit:
-   habit-tracker complete [HABIT_ID]
+   habit-tracker complete [HABIT_ID]...
    Example: habit-tracker complete 1
+   Example: habit-tracker complete 1 2 --at 2024-05-01T07:30:00
+   Example: habit-tracker complete --stdin < check_offs.txt
 
 3. View all habits:
    habit-tracker list
@@ -56,10 +377,14 @@ Available Commands:
 4. View monthly calendar:
    habit-tracker calendar
    habit-tracker calendar --year 2024 --month 3
+   habit-tracker calendar --view year --year 2024
+   habit-tracker calendar --from 2024-01 --to 2024-06 --habit 1
 
 5. Analyze habits:
    habit-tracker analyze
    habit-tracker analyze --periodicity daily
+   habit-tracker analyze --since 2024-01-01 --until 2024-03-31
+   habit-tracker analyze --workers 4
 
 6. View habit details:
    habit-tracker details [HABIT_ID]
@@ -69,12 +394,52 @@ Available Commands:
    habit-tracker delete [HABIT_ID]
    Example: habit-tracker delete 1
 
-8. Show this help message:
+8. Import habits and completion history:
+   habit-tracker import [FILE]
+   Example: habit-tracker import example_data/predefined_habits.json
+
+9. Export habits and completion history as JSON:
+   habit-tracker export [FILE]
+   Example: habit-tracker export backup.json
+
+10. Show completions by weekday and hour:
+   habit-tracker patterns
+   habit-tracker patterns --habit 1 --buckets morning=6,afternoon=12,evening=18,night=0
+
+11. Rebuild the habit store from the activity log:
+   habit-tracker rebuild
+   habit-tracker --storage data/restored.json rebuild --workers 4
+
+12. Search the activity log:
+   habit-tracker log query --habit-id 1 --since 2024-03-01 --until 2024-03-31 --event completion
+
+13. Keep the store loaded in a daemon that runs the other commands:
+   habit-tracker serve
+   (later runs for the same store are forwarded to it; use --no-daemon to bypass it)
+   habit-tracker serve --metrics-port 9464
+   (also serves Prometheus metrics at http://127.0.0.1:9464/metrics)
+
+14. Show this help message:
    habit-tracker
    habit-tracker --help
 
 Options:
-  --help  Show this message and exit.
+  --storage PATH     Habit store to use (.json file, .db / sqlite:// for SQLite,
+                     .bin / binary:// for the memory-mapped binary format)
+  --max-habits N     Maximum number of habits to track (default 10, 0 for no limit)
+  --no-analytics-cache
+                     Don't keep analytics results in a file next to the store
+  --log-file PATH    Activity log to write, rebuild from and query
+  --log-max-bytes N  Rotate the activity log past N bytes (default 1 MiB)
+  --log-rotate WHEN  Also rotate it hourly, daily or weekly
+  --log-sync         Write the activity log in the foreground
+  --no-daemon        Run the command here even if a daemon is serving the store
+  --profile          Report the time spent per phase (load_data, mutation, ...)
+  --profile-output F Also write a cProfile profile of the command to F
+  --trace-output F   Also write the phases as a Chrome trace to F
+  --metrics-textfile F
+                     Add the command's Prometheus metrics to F (textfile collector)
+  --help             Show this message and exit.
 
 Note: Replace [HABIT_ID] with the actual ID of your habit.
 You can see habit IDs using the 'list' command.
@@ -90,14 +455,16 @@ You can see habit IDs using the 'list' command.
 )
 def add(name: str, periodicity: str):
     """Add a new habit to track."""
+    from .utils.habit_validator import HabitValidator
+
     try:
         is_valid, error = HabitValidator.validate_habit_creation(name, periodicity)
         if not is_valid:
             click.echo(f"Error: {error}")
             return
 
-        habit = habit_manager.add_habit(name, periodicity)
-        habit_logger.log_habit_creation(habit.id, name, periodicity)
+        habit = get_habit_manager().add_habit(name, periodicity)
+        get_habit_logger().log_habit_creation(habit.id, name, periodicity, habit.creation_date)
         click.echo(f"\nSuccessfully added habit '{name}'")
         click.echo("\nHabit details:")
         click.echo(format_habit_info(habit))
@@ -105,35 +472,215 @@ def add(name: str, periodicity: str):
         click.echo(f"Error: {str(e)}")
 
 @cli.command()
-@click.argument('habit_id', type=int)
-def complete(habit_id: int):
-    """Mark a habit as complete for the current period."""
-    habit = habit_manager.get_habit_by_id(habit_id)
-    if not habit:
-        click.echo(f"Error: No habit found with ID {habit_id}")
+@click.argument('habit_ids', nargs=-1, type=int)
+@click.option('--at', multiple=True, type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S']),
+              help='When the habit was completed, to backfill; give one for all ids or one per id')
+@click.option('--stdin', 'from_stdin', is_flag=True,
+              help='Also read "ID [TIMESTAMP]" lines from standard input')
+def complete(habit_ids: tuple, at: tuple, from_stdin: bool):
+    """Mark habits as complete for the current period, or backfill earlier ones."""
+    from .utils.habit_importer import parse_completion_line
+    from .utils.habit_validator import HabitValidator
+
+    if at and len(at) not in (1, len(habit_ids)):
+        click.echo("Error: Give one --at for all habit ids or one per habit id")
         return
+    # (label, habit id, check date) for every requested check-off
+    requests = [(f"ID {habit_id}", habit_id, at[index] if len(at) > 1 else (at[0] if at else None))
+                for index, habit_id in enumerate(habit_ids)]
+    errors = []
+    if from_stdin:
+        for number, line in enumerate(sys.stdin, 1):
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            try:
+                requests.append((f"Line {number}", *parse_completion_line(line)))
+            except ValueError as e:
+                errors.append((f"Line {number}", str(e)))
+    total = len(requests) + len(errors)
+    if not total:
+        click.echo("Error: Give at least one habit id, or --stdin")
+        return
+
+    habit_manager = get_habit_manager()
+    now = current_time()
+    pending = []
+    for label, habit_id, check_date in requests:
+        habit = habit_manager.get_habit_by_id(habit_id)
+        if not habit:
+            errors.append((label, f"No habit found with ID {habit_id}"))
+        else:
+            pending.append((label, habit, check_date or now))
+
+    results = HabitValidator.validate_habit_completions([
+        {
+            'habit_id': habit.id,
+            'periodicity': habit.periodicity,
+            'completion_epochs': habit.completion_epochs,
+            'check_epoch': to_epoch_seconds(check_date)
+        }
+        for _, habit, check_date in pending
+    ])
+    completions = []
+    for (label, habit, check_date), (is_valid, error) in zip(pending, results):
+        if is_valid:
+            completions.append((habit, check_date))
+        else:
+            errors.append((label, error))
 
     try:
-        is_valid, error = HabitValidator.validate_habit_completion(
-            habit.last_check_date, 
-            habit.periodicity
-        )
-        if not is_valid:
-            click.echo(f"Error: {error}")
-            return
+        if completions:
+            habit_manager.complete_habits(completions)
+            get_habit_logger().log_habit_completions(
+                (habit.id, habit.name, check_date) for habit, check_date in completions
+            )
+    except ValueError as e:
+        click.echo(f"Error: {str(e)}")
+        return
 
-        habit.check_off()
-        habit_manager.save_data()
-        habit_logger.log_habit_completion(habit.id, habit.name)
-        click.echo(f"Successfully completed habit '{habit.name}'")
-        click.echo(f"Current streak: {habit.streak_count}")
-    except Exception as e:
+    if total == 1:
+        if errors:
+            click.echo(f"Error: {errors[0][1]}")
+        else:
+            habit = completions[0][0]
+            click.echo(f"Successfully completed habit '{habit.name}'")
+            click.echo(f"Current streak: {habit.streak_count}")
+        return
+    click.echo(f"Completed {len(completions)} of {total} check-offs")
+    if errors:
+        click.echo(f"\nSkipped {len(errors)} check-offs:")
+        for label, error in errors[:10]:
+            click.echo(f"  {label}: {error}")
+
+@cli.command(name='import')
+@click.argument('file_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Number of habits validated and saved together')
+def import_data(file_path: str, batch_size: int):
+    """Import habits and their completion history from a JSON file."""
+    from .utils.habit_importer import import_habits
+
+    try:
+        result = import_habits(get_habit_manager(), file_path, batch_size=batch_size)
+    except ValueError as e:
         click.echo(f"Error: {str(e)}")
+        return
+
+    from .utils.time_utils import from_epoch_seconds
+
+    habit_logger = get_habit_logger()
+    for habit in result['created']:
+        habit_logger.log_habit_creation(habit.id, habit.name, habit.periodicity,
+                                        habit.creation_date, habit.completion_epochs)
+    # Completions merged into existing habits, so `rebuild` restores them too
+    habit_logger.log_habit_completions(
+        (habit.id, habit.name, from_epoch_seconds(epoch))
+        for habit, epochs in result['completed'] for epoch in epochs
+    )
+
+    click.echo(f"Imported {result['records']} habit records "
+               f"with {result['completions']} completions")
+    click.echo(f"New habits: {len(result['created'])}")
+    if result['errors']:
+        click.echo(f"\nSkipped {len(result['errors'])} invalid records:")
+        for index, error in result['errors'][:10]:
+            click.echo(f"  Record {index}: {error}")
+
+@cli.command(name='export')
+@click.argument('file_path', type=click.Path(dir_okay=False))
+def export_data(file_path: str):
+    """Export all habits and their completion history to a JSON file."""
+    from .utils.habit_exporter import export_habits
+
+    result = export_habits(get_habit_manager(), file_path)
+    click.echo(f"Exported {result['habits']} habits "
+               f"with {result['completions']} completions to {file_path}")
+
+@cli.command()
+@click.option('--log', 'log_file', type=click.Path(dir_okay=False), default=None,
+              help='Activity log to replay, together with its rotated files')
+@click.option('--workers', type=click.IntRange(min=0), default=0, show_default=True,
+              help='Processes parsing the log (0 for one per CPU)')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint of an interrupted rebuild')
+@click.option('--force', is_flag=True, help='Replace an existing habit store')
+def rebuild(log_file: Optional[str], workers: int, restart: bool, force: bool):
+    """Rebuild the habit store by replaying the activity log."""
+    import os
+    from .models.habit_manager import DEFAULT_STORAGE_PATH
+    from .storage.storage_factory import parse_storage_path
+    from .utils.habit_logger import default_log_path
+    from .utils.log_replay import find_log_files, replay_logs
+
+    log_file = log_file or _log_options.get('log_file') or default_log_path()
+    if not find_log_files(log_file):
+        click.echo(f"Error: No activity log found at {log_file}")
+        return
+    storage_path = _storage_path or DEFAULT_STORAGE_PATH
+    try:
+        store_file = parse_storage_path(storage_path)[1]
+        if os.path.exists(store_file) and not force:
+            click.echo(f"Error: {store_file} already exists; use --force to replace it")
+            return
+        # The loaded store, e.g. of the daemon, is about to be replaced
+        _close_habit_manager()
+        result = replay_logs(log_file, storage_path, workers or None, resume=not restart)
+    except ValueError as e:
+        click.echo(f"Error: {str(e)}")
+        return
+
+    click.echo(f"Replayed {result['events']} events from {result['files']} log files")
+    click.echo(f"Rebuilt {result['habits']} habits with {result['completions']} completions "
+               f"in {store_file}")
+    if result['skipped'] or result['invalid']:
+        click.echo(f"Ignored {result['skipped']} events for unknown habits "
+                   f"and {result['invalid']} invalid lines")
+
+@cli.group()
+def log():
+    """Search the activity log."""
+
+@log.command()
+@click.option('--log', 'log_file', type=click.Path(dir_okay=False), default=None,
+              help='Activity log to search, together with its rotated files')
+@click.option('--habit-id', type=int, default=None, help='Only events of this habit')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S']), default=None,
+              help='Only events on or after this date (YYYY-MM-DD)')
+@click.option('--until', type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S']), default=None,
+              help='Only events on or before this date (YYYY-MM-DD)')
+@click.option('--event', type=click.Choice(['creation', 'completion', 'deletion'], case_sensitive=False),
+              default=None, help='Only events of this type')
+@click.option('--raw', is_flag=True, help='Print the matching records as JSON lines')
+def query(log_file: Optional[str], habit_id: Optional[int], since: Optional[datetime],
+          until: Optional[datetime], event: Optional[str], raw: bool):
+    """Show the logged events matching all given filters."""
+    import json
+    from datetime import timedelta
+    from .utils.habit_logger import default_log_path
+    from .utils.log_index import event_time, query_log
+
+    if until is not None and until.time() == datetime.min.time():
+        # A date includes the whole day
+        until += timedelta(days=1)
+    else:
+        until = until and until + timedelta(seconds=1)
+    matches = 0
+    for record in query_log(log_file or _log_options.get('log_file') or default_log_path(), habit_id, since, until,
+                            event.lower() if event else None):
+        matches += 1
+        if raw:
+            click.echo(json.dumps(record))
+        else:
+            click.echo(f"{event_time(record).strftime('%Y-%m-%d %H:%M:%S')}  "
+                       f"{record.get('event', ''):<10}  #{record.get('habit_id')} "
+                       f"{record.get('habit_name', '')}")
+    if not raw:
+        click.echo(f"{matches} matching event{'s' if matches != 1 else ''}")
 
 @cli.command()
 @click.argument('habit_id', type=int)
 def delete(habit_id: int):
     """Delete a habit from tracking."""
+    habit_manager = get_habit_manager()
     habit = habit_manager.get_habit_by_id(habit_id)
     if not habit:
         click.echo(f"Error: No habit found with ID {habit_id}")
@@ -141,13 +688,13 @@ def delete(habit_id: int):
 
     if click.confirm(f"Are you sure you want to delete habit '{habit.name}'?"):
         habit_manager.remove_habit(habit_id)
-        habit_logger.log_habit_deletion(habit_id, habit.name)
+        get_habit_logger().log_habit_deletion(habit_id, habit.name)
         click.echo(f"Successfully deleted habit '{habit.name}'")
 
 @cli.command()
 def list():
     """List all tracked habits."""
-    habits = habit_manager.habits
+    habits = get_habit_manager().habits
     if not habits:
         click.echo("No habits are currently being tracked.")
         return
@@ -163,8 +710,18 @@ def list():
     type=click.Choice(['daily', 'weekly'], case_sensitive=False),
     help='Filter habits by periodicity'
 )
-def analyze(periodicity: Optional[str]):
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Also summarize completions from this day (YYYY-MM-DD)')
+@click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Also summarize completions up to and including this day (YYYY-MM-DD)')
+@click.option('--workers', type=click.IntRange(min=0), default=1, show_default=True,
+              help='Worker processes for computing completion rates (0 for one per CPU)')
+def analyze(periodicity: Optional[str], since: Optional[datetime], until: Optional[datetime],
+            workers: int):
     """Analyze habits and show statistics."""
+    from .analytics.analytics_manager import get_completion_rate, analyze_habit_trends
+
+    habit_manager = get_habit_manager()
     habits = habit_manager.habits
     if not habits:
         click.echo("No habits to analyze.")
@@ -176,22 +733,33 @@ def analyze(periodicity: Optional[str]):
             click.echo(f"No {periodicity} habits found.")
             return
 
-    # Prepare data for analysis
-    habits_data = []
-    for h in habits:
-        check_dates = [h.last_check_date] if h.last_check_date else []
-        completion_rate = get_completion_rate(
-            check_dates,
-            h.periodicity,
-            h.creation_date
-        )
-        habits_data.append({
-            'name': h.name,
-            'periodicity': h.periodicity,
-            'completion_rate': completion_rate
-        })
-
-    trends = analyze_habit_trends(habits_data)
+    # Reuse the results for habits that haven't changed
+    cache = get_analytics_cache()
+    trends = cache.get('habit_trends', habits)
+    if trends is None and workers != 1:
+        from .analytics.parallel_analytics import analyze_habits_parallel
+        result = analyze_habits_parallel(habits, workers or None)
+        trends = result['trends']
+        for h, completion_rate in zip(habits, result['completion_rates']):
+            cache.put('completion_rate', [h], completion_rate)
+        cache.put('habit_trends', habits, trends)
+    elif trends is None:
+        # Prepare data for analysis
+        habits_data = []
+        for h in habits:
+            completion_rate = cache.get_or_compute('completion_rate', [h], lambda: get_completion_rate(
+                h.completions,
+                h.periodicity,
+                h.creation_date
+            ))
+            habits_data.append({
+                'name': h.name,
+                'periodicity': h.periodicity,
+                'completion_rate': completion_rate
+            })
+        trends = analyze_habit_trends(habits_data)
+        cache.put('habit_trends', habits, trends)
+    cache.save()
 
     click.echo("\nHabit Analysis:")
     click.echo("-" * 40)
@@ -212,11 +780,44 @@ def analyze(periodicity: Optional[str]):
     if not trends['by_periodicity']:
         click.echo("  No habit data available for analysis")
 
+    if since or until:
+        show_range_summary(habit_manager, since, until, periodicity)
+
+def show_range_summary(habit_manager, since: Optional[datetime], until: Optional[datetime],
+                       periodicity: Optional[str]):
+    """Show completions per periodicity and ISO week within a date range."""
+    from datetime import timedelta
+
+    end = (until or current_time()).date() + timedelta(days=1)
+    start = since.date() if since else end - timedelta(weeks=4)
+    if start >= end:
+        click.echo("\n--since must not be after --until")
+        return
+
+    rollups = habit_manager.rollups
+    breakdown = rollups.periodicity_breakdown(start, end)
+    if periodicity:
+        breakdown = {p: stats for p, stats in breakdown.items() if p == periodicity.lower()}
+
+    click.echo(f"\nCompletions from {start} to {end - timedelta(days=1)}:")
+    for period, stats in breakdown.items():
+        click.echo(f"\n{period.capitalize()}:")
+        click.echo(f"  Habits: {stats['count']}")
+        click.echo(f"  Completions: {stats['completions']}")
+        click.echo(f"  Average completion rate: {stats['avg_completion_rate']:.1f}%")
+
+    click.echo("\nCompletions per week:")
+    for monday, count in rollups.weekly_counts(start, end, periodicity and periodicity.lower()):
+        click.echo(f"  Week of {monday}: {count}")
+    habit_manager.save_rollups()
+
 @cli.command()
 @click.argument('habit_id', type=int)
 def details(habit_id: int):
     """Show detailed information about a specific habit."""
-    habit = habit_manager.get_habit_by_id(habit_id)
+    from .analytics.habit_metrics import analyze_habit
+
+    habit = get_habit_manager().get_habit_by_id(habit_id)
     if not habit:
         click.echo(f"Error: No habit found with ID {habit_id}")
         return
@@ -227,27 +828,37 @@ def details(habit_id: int):
     # Basic info
     click.echo(format_habit_info(habit))
     
-    # Streak analysis
-    check_dates = [habit.last_check_date] if habit.last_check_date else []
-    streak_stats = get_streak_analysis(check_dates, habit.periodicity)
+    # Streaks and patterns come from one pass over the habit's history
+    cache = get_analytics_cache()
+    metrics = cache.get_or_compute('habit_metrics', [habit], lambda: analyze_habit(habit))
     
     click.echo("\nStreak Analysis:")
-    click.echo(f"Current streak: {streak_stats['current_streak']}")
-    click.echo(f"Longest streak: {streak_stats['max_streak']}")
-    click.echo(f"Average streak: {streak_stats['avg_streak']:.1f}")
+    click.echo(f"Current streak: {metrics['current_streak']}")
+    click.echo(f"Longest streak: {metrics['max_streak']}")
+    click.echo(f"Average streak: {metrics['avg_streak']:.1f}")
     
     # Completion patterns
-    if check_dates:
-        patterns = get_habit_patterns(check_dates)
+    if habit.completion_epochs:
         click.echo("\nCompletion Patterns:")
-        for period, count in patterns.items():
+        for period, count in metrics['patterns'].items():
             click.echo(f"{period.capitalize()}: {count} times")
+    cache.save()
 
 @cli.command()
 @click.option('--year', type=int, default=None, help='Year to display (YYYY)')
 @click.option('--month', type=int, default=None, help='Month to display (1-12)')
-def calendar(year: Optional[int], month: Optional[int]):
+@click.option('--view', type=click.Choice(['month', 'year'], case_sensitive=False),
+              default='month', show_default=True, help='Show one month or a whole year')
+@click.option('--from', 'start', type=click.DateTime(formats=['%Y-%m']), default=None,
+              help='First month of a range view (YYYY-MM)')
+@click.option('--to', 'end', type=click.DateTime(formats=['%Y-%m']), default=None,
+              help='Last month of a range view (YYYY-MM)')
+@click.option('--habit', 'habit_id', type=int, default=None, help='Only show this habit')
+def calendar(year: Optional[int], month: Optional[int], view: str,
+             start: Optional[datetime], end: Optional[datetime], habit_id: Optional[int]):
     """Display habit completion calendar."""
+    from .utils.calendar_view import CalendarView
+
     try:
         calendar_view = CalendarView()
         
@@ -258,16 +869,41 @@ def calendar(year: Optional[int], month: Optional[int]):
             
         # Get current year/month if not provided
         if year is None:
-            year = datetime.now().year
+            year = current_time().year
         if month is None:
-            month = datetime.now().month
+            month = current_time().month
             
         # Get all habits
+        habit_manager = get_habit_manager()
         habits = habit_manager.habits
+        if habit_id is not None:
+            habit = habit_manager.get_habit_by_id(habit_id)
+            if not habit:
+                click.echo(f"Error: No habit found with ID {habit_id}")
+                return
+            habits = [habit]
         if not habits:
             click.echo("No habits to display in calendar.")
             return
 
+        if start or end:
+            start = start or end
+            end = end or start
+            if start > end:
+                click.echo("--from must not be after --to")
+                return
+            click.echo(calendar_view.generate_range_view(
+                habits, start.year, start.month, end.year, end.month
+            ))
+            return
+
+        if view.lower() == 'year':
+            click.echo(calendar_view.generate_year_view(habits, year))
+            click.echo("\nNavigation:")
+            click.echo(f"- Next year: habit-tracker calendar --view year --year {year + 1}")
+            click.echo(f"- Previous year: habit-tracker calendar --view year --year {year - 1}")
+            return
+
         # Generate calendar view
         calendar_output = calendar_view.generate_monthly_view(habits, year, month)
         click.echo(calendar_output)
@@ -288,12 +924,109 @@ def calendar(year: Optional[int], month: Optional[int]):
     except Exception as e:
         click.echo(f"Error displaying calendar: {str(e)}", err=True)
 
+@cli.command()
+@click.option('--habit', 'habit_ids', type=int, multiple=True,
+              help='Only count this habit (can be given several times)')
+@click.option('--buckets', default=None, metavar='NAME=HOUR,...',
+              help='Time-of-day buckets by first hour, e.g. morning=5,afternoon=12,evening=17,night=22')
+def patterns(habit_ids: tuple, buckets: Optional[str]):
+    """Show when habits are completed by weekday and hour."""
+    from .analytics.completion_heatmap import bucket_counts, parse_dayparts, weekday_hour_histograms
+    from .analytics.habit_metrics import DAYPARTS
+    from .utils.calendar_view import CalendarView
+
+    try:
+        dayparts = parse_dayparts(buckets) if buckets else DAYPARTS
+    except ValueError as e:
+        click.echo(f"Error: {str(e)}")
+        return
+
+    habit_manager = get_habit_manager()
+    habits = habit_manager.habits
+    if habit_ids:
+        habits = []
+        for habit_id in habit_ids:
+            habit = habit_manager.get_habit_by_id(habit_id)
+            if not habit:
+                click.echo(f"Error: No habit found with ID {habit_id}")
+                return
+            habits.append(habit)
+    if not habits:
+        click.echo("No habits to analyze.")
+        return
+
+    histograms = weekday_hour_histograms(habits)
+    histogram = histograms.sum(axis=0)
+    click.echo(f"\nCompletions by weekday and hour ({len(habits)} habit{'s' if len(habits) != 1 else ''}):")
+    click.echo(CalendarView.generate_heatmap_view(histogram, bucket_counts(histogram, dayparts)))
+
+    if len(habits) > 1:
+        per_habit = bucket_counts(histograms, dayparts)
+        click.echo("\nBy habit:")
+        click.echo(f"{'Habit':<20}" + "".join(f"{name.capitalize():>12}" for name in per_habit))
+        for index, habit in enumerate(habits):
+            click.echo(f"{habit.name[:20]:<20}"
+                       + "".join(f"{counts[index]:>12d}" for counts in per_habit.values()))
+
+@cli.command()
+@click.option('--socket', 'socket_file', envvar='HABIT_TRACKER_SOCKET', default=None,
+              help='Unix socket to listen on (default: one per user in the runtime directory)')
+@click.option('--metrics-port', envvar='HABIT_TRACKER_METRICS_PORT', type=click.IntRange(0, 65535),
+              default=None, help='Serve Prometheus metrics at http://127.0.0.1:PORT/metrics')
+def serve(socket_file: Optional[str], metrics_port: Optional[int]):
+    """Keep the store loaded and run the commands of other habit-tracker runs."""
+    import os
+    import signal
+    from .daemon import CommandServer, socket_path
+    from .utils import metrics
+    global _serving, _storage_path, _store_state
+
+    # Commands run in the client's directory, so the store path must not be relative
+    _storage_path = _resolve_store(_storage_path, os.getcwd())
+    try:
+        server = CommandServer(socket_file or socket_path(), serve_request)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: {str(e)}")
+        return
+    metrics_server = None
+    if metrics_port is not None:
+        try:
+            metrics_server = metrics.MetricsServer(metrics.MetricsRegistry(), metrics_port)
+        except OSError as e:
+            server.close()
+            click.echo(f"Error: Can't serve metrics on port {metrics_port}: {e}")
+            return
+        register_gauges(metrics.enable(metrics_server.registry))
+        metrics_server.start()
+    _serving = True
+    # Load everything up front so the first command is as fast as the rest
+    habit_manager = get_habit_manager()
+    get_analytics_cache()
+    get_habit_logger()
+    _store_state = _read_store_state()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    click.echo(f"Serving {len(habit_manager.habits)} habits from {_storage_path} on {server.path}")
+    if metrics_server is not None:
+        click.echo(f"Metrics at http://{metrics_server.host}:{metrics_server.port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if metrics_server is not None:
+            metrics_server.close()
+            metrics.disable()
+        _serving = False
+
 def help():
     """Show detailed help message."""
     show_help()
 
 def main():
     """Main entry point for the CLI."""
+    global _client_args
+    _client_args = sys.argv[1:]
     cli()
 
 if __name__ == '__main__':
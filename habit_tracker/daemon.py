@@ -0,0 +1,174 @@
+import io
+import json
+import os
+import socket
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Any, Callable, Dict, List, Optional
+import click
+
+def socket_path() -> str:
+    """
+    Get the path of the daemon's Unix socket.
+
+    HABIT_TRACKER_SOCKET overrides the default, a per-user socket in
+    XDG_RUNTIME_DIR or the temporary directory.
+    """
+    path = os.environ.get('HABIT_TRACKER_SOCKET')
+    if path:
+        return path
+    import tempfile
+    directory = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(directory, f"habit-tracker-{os.getuid()}.sock")
+
+def send_request(path: str, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Send a request to the daemon listening on a socket.
+
+    Args:
+        path: Path of the daemon's socket
+        request: JSON-serializable request
+
+    Returns:
+        The daemon's response, or None if no daemon is listening
+
+    Raises:
+        OSError: If the connection broke after the request was sent
+        ValueError: If the response is malformed
+    """
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(path):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(path)
+        except OSError:
+            # A socket left behind by a daemon that is gone
+            return None
+        client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        client.shutdown(socket.SHUT_WR)
+        return json.loads(_receive(client))
+
+def run_command(command: click.Command, args: List[str], stdin: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run a click command in this process and capture what it prints.
+
+    The command reads stdin from the given text. A command that aborts,
+    e.g. because it prompts and finds no input, is reported as a fallback
+    so the client can run it itself.
+
+    Args:
+        command: Command or group to run
+        args: Command-line arguments
+        stdin: Text the command reads as standard input
+
+    Returns:
+        Dictionary with 'exit_code', 'stdout' and 'stderr', or with
+        'fallback' set to True
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    saved_stdin = sys.stdin
+    sys.stdin = io.StringIO(stdin or '')
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                result = command.main(args=args, prog_name='habit-tracker', standalone_mode=False)
+                exit_code = result if isinstance(result, int) else 0
+            except click.exceptions.Abort:
+                return {'fallback': True}
+            except click.ClickException as e:
+                e.show(file=sys.stderr)
+                exit_code = e.exit_code
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else 1
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+    finally:
+        sys.stdin = saved_stdin
+    return {'exit_code': exit_code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+class CommandServer:
+    """
+    Serves requests from clients over a Unix domain socket.
+
+    Each connection carries one JSON request, ended by the client shutting
+    down its side, and receives one JSON response. Requests are handled one
+    at a time, so the handler never runs concurrently with itself.
+    """
+
+    def __init__(self, path: str, handler: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        """
+        Bind the socket.
+
+        Args:
+            path: Path of the socket; a stale socket file is replaced
+            handler: Turns a request into a response
+
+        Raises:
+            ValueError: If another daemon is already listening on path
+        """
+        if send_request(path, {'ping': True}) is not None:
+            raise ValueError(f"A daemon is already listening on {path}")
+        if os.path.exists(path):
+            os.remove(path)
+        self.path = path
+        self.handler = handler
+        self.closed = False
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the current user may connect
+        umask = os.umask(0o077)
+        try:
+            self.socket.bind(path)
+        finally:
+            os.umask(umask)
+        self.socket.listen(16)
+
+    def serve_forever(self) -> None:
+        """Handle requests until the process is interrupted or close() is called."""
+        while not self.closed:
+            try:
+                connection, _ = self.socket.accept()
+            except OSError:
+                if self.closed:
+                    return
+                raise
+            with connection:
+                self._handle(connection)
+
+    def close(self) -> None:
+        """Stop listening and remove the socket file."""
+        self.closed = True
+        try:
+            # Wakes up a thread blocked in accept()
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _handle(self, connection: socket.socket) -> None:
+        """Answer the request on a connection."""
+        try:
+            request = json.loads(_receive(connection))
+            if request.get('ping'):
+                response = {'pong': True}
+            else:
+                response = self.handler(request)
+        except Exception:
+            response = {'exit_code': 1, 'stdout': '', 'stderr': traceback.format_exc()}
+        try:
+            connection.sendall(json.dumps(response).encode('utf-8') + b'\n')
+        except OSError:
+            # The client went away
+            pass
+
+def _receive(connection: socket.socket) -> bytes:
+    """Read from a connection until the other side shuts down."""
+    chunks = []
+    while True:
+        chunk = connection.recv(1 << 16)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
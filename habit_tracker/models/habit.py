@@ -1,17 +1,28 @@
+from array import array
+from bisect import bisect_left, bisect_right
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Iterable, List, Optional
+from ..utils.time_utils import current_time, to_epoch_seconds, from_epoch_seconds, day_ordinal, week_ordinal
+from ..utils.streak_calculator import StreakCalculator
+from ..utils.completion_bitmaps import build_month_bitmaps, month_key
 
 class Habit:
     """A class representing a habit to be tracked."""
-    
-    def __init__(self, 
+
+    __slots__ = (
+        'id', 'name', 'periodicity', 'creation_date', 'last_check_date',
+        'is_active', 'total_check_count', 'version', '_completion_epochs', '_completion_loader',
+        '_streak_count', '_longest_streak', '_last_period', '_streak_stale', '_month_bits'
+    )
+
+    def __init__(self,
                  id: int,
-                 name: str, 
+                 name: str,
                  periodicity: str,
                  creation_date: Optional[datetime] = None):
         """
         Initialize a new habit.
-        
+
         Args:
             id: Unique identifier for the habit
             name: Name of the habit
@@ -21,26 +32,209 @@ class Habit:
         self.id = id
         self.name = name
         self.periodicity = periodicity.lower()
-        self.creation_date = creation_date or datetime.now()
+        self.creation_date = creation_date or current_time()
         self.last_check_date = None
         self.is_active = True
-        self.streak_count = 0
         self.total_check_count = 0
-        
+        # Bumped on every change to the history so cached analytics can be reused
+        self.version = 0
+        self._completion_epochs = array('q')
+        self._completion_loader = None
+        # Streak state as of the last completed period, kept up to date by check_off
+        self._streak_count = 0
+        self._longest_streak = 0
+        self._last_period = None
+        self._streak_stale = False
+        # Completion bitmaps per month, built on first use by the calendar
+        self._month_bits = None
+
         if self.periodicity not in ['daily', 'weekly']:
             raise ValueError("Periodicity must be 'daily' or 'weekly'")
-    
-    def check_off(self) -> None:
-        """Mark the habit as completed for the current period."""
-        self.last_check_date = datetime.now()
+
+    @property
+    def completion_epochs(self) -> array:
+        """Sorted completion times as seconds since the epoch."""
+        if self._completion_loader is not None:
+            self._completion_epochs = self._completion_loader()
+            self._completion_loader = None
+        return self._completion_epochs
+
+    @completion_epochs.setter
+    def completion_epochs(self, epochs: array) -> None:
+        self._completion_epochs = epochs
+        self._completion_loader = None
+        self._month_bits = None
+
+    def defer_completions(self, loader: Callable[[], array]) -> None:
+        """
+        Load the completion history on first access instead of now.
+
+        The streak state must already be set, since it is only rebuilt from
+        the history when stale.
+
+        Args:
+            loader: Returns the sorted history as an array('q')
+        """
+        self._completion_loader = loader
+
+    @property
+    def completions(self) -> List[datetime]:
+        """All completion dates in chronological order."""
+        return [from_epoch_seconds(epoch) for epoch in self.completion_epochs]
+
+    @completions.setter
+    def completions(self, dates: Iterable[datetime]) -> None:
+        self.completion_epochs = array('q', sorted(to_epoch_seconds(d) for d in dates))
+        self._streak_stale = True
+        self.version += 1
+
+    @property
+    def streak_count(self) -> int:
+        """Length of the streak ending at the last completed period."""
+        if self._streak_stale:
+            self._rebuild_streak()
+        return self._streak_count
+
+    @streak_count.setter
+    def streak_count(self, value: int) -> None:
+        self._streak_count = value
+
+    @property
+    def longest_streak(self) -> int:
+        """Length of the longest streak ever achieved."""
+        if self._streak_stale:
+            self._rebuild_streak()
+        return self._longest_streak
+
+    @property
+    def last_period(self) -> Optional[int]:
+        """Day or ISO week ordinal of the last completed period."""
+        if self._streak_stale:
+            self._rebuild_streak()
+        return self._last_period
+
+    def get_current_streak(self, now: Optional[datetime] = None) -> int:
+        """
+        Get the streak that is still alive at the given time.
+
+        A streak stays alive until a whole period passes without completion.
+
+        Args:
+            now: Reference time (defaults to now)
+
+        Returns:
+            Current streak count
+        """
+        last_period = self.last_period
+        if last_period is None:
+            return 0
+        current_period = self._period_of(to_epoch_seconds(now or current_time()))
+        return self._streak_count if current_period - last_period <= 1 else 0
+
+    def get_completions(self,
+                        start: Optional[datetime] = None,
+                        end: Optional[datetime] = None) -> List[datetime]:
+        """
+        Get the completion dates within [start, end).
+
+        Args:
+            start: Earliest completion to include (inclusive)
+            end: Latest completion to include (exclusive)
+
+        Returns:
+            Completion dates in chronological order
+        """
+        epochs = self.completion_epochs
+        low = bisect_left(epochs, to_epoch_seconds(start)) if start else 0
+        high = bisect_left(epochs, to_epoch_seconds(end)) if end else len(epochs)
+        return [from_epoch_seconds(epoch) for epoch in epochs[low:high]]
+
+    def get_month_bitmap(self, year: int, month: int) -> int:
+        """
+        Get the days of a month on which the habit was completed.
+
+        Returns:
+            Word with bit d - 1 set if the habit was completed on day d
+        """
+        if self._month_bits is None:
+            build_month_bitmaps([self])
+        return self._month_bits.get(month_key(year, month), 0)
+
+    def check_off(self, check_date: Optional[datetime] = None) -> None:
+        """
+        Mark the habit as completed for the current period.
+
+        Args:
+            check_date: When the habit was completed (defaults to now)
+        """
+        check_date = check_date or current_time()
+        epoch = to_epoch_seconds(check_date)
+        epochs = self.completion_epochs
+        if not epochs or epoch >= epochs[-1]:
+            epochs.append(epoch)
+            self._update_streak(epoch)
+        else:
+            # Backfilled completions are inserted in order, which invalidates
+            # the incremental streak state until it is rebuilt
+            epochs.insert(bisect_right(epochs, epoch), epoch)
+            self._streak_stale = True
+        if self.last_check_date is None or check_date >= self.last_check_date:
+            self.last_check_date = check_date
         self.total_check_count += 1
-        self._update_streak()
-    
-    def _update_streak(self) -> None:
-        """Update the streak count based on completion timing."""
-        # This will be implemented with streak calculation logic
-        pass
-    
+        self.version += 1
+        if self._month_bits is not None:
+            key = month_key(check_date.year, check_date.month)
+            self._month_bits[key] = self._month_bits.get(key, 0) | 1 << (check_date.day - 1)
+
+    def add_completions(self, epochs: Iterable[int]) -> int:
+        """
+        Merge completion times into the history, skipping ones already recorded.
+
+        Args:
+            epochs: Completion times as seconds since the epoch
+
+        Returns:
+            Number of completions that were added
+        """
+        merged = sorted(set(self.completion_epochs).union(epochs))
+        added = len(merged) - len(self.completion_epochs)
+        if added:
+            self.completion_epochs = array('q', merged)
+            self.total_check_count += added
+            last_check_date = from_epoch_seconds(merged[-1])
+            if self.last_check_date is None or last_check_date > self.last_check_date:
+                self.last_check_date = last_check_date
+            self._streak_stale = True
+            self.version += 1
+        return added
+
+    def _update_streak(self, epoch: int) -> None:
+        """Extend the streak state with a completion after all previous ones."""
+        if self._streak_stale:
+            return
+        period = self._period_of(epoch)
+        if period == self._last_period:
+            return
+        if self._last_period is not None and period == self._last_period + 1:
+            self._streak_count += 1
+        else:
+            self._streak_count = 1
+        self._longest_streak = max(self._longest_streak, self._streak_count)
+        self._last_period = period
+
+    def _rebuild_streak(self) -> None:
+        """Recompute the streak state from the full completion history."""
+        self._streak_count, self._longest_streak, self._last_period = \
+            StreakCalculator.calculate_ordinal_streaks(
+                self._period_of(epoch) for epoch in self.completion_epochs
+            )
+        self._streak_stale = False
+
+    def _period_of(self, epoch: int) -> int:
+        """Get the day or ISO week ordinal a completion time falls into."""
+        day = day_ordinal(epoch)
+        return day if self.periodicity == 'daily' else week_ordinal(day)
+
     def to_dict(self) -> dict:
         """Convert the habit to a dictionary for storage."""
         return {
@@ -51,9 +245,13 @@ class Habit:
             'last_check_date': self.last_check_date.isoformat() if self.last_check_date else None,
             'is_active': self.is_active,
             'streak_count': self.streak_count,
-            'total_check_count': self.total_check_count
+            'longest_streak': self.longest_streak,
+            'last_period': self.last_period,
+            'total_check_count': self.total_check_count,
+            'version': self.version,
+            'completion_epochs': self.completion_epochs.tolist()
         }
-    
+
     @classmethod
     def from_dict(cls, data: dict) -> 'Habit':
         """Create a Habit instance from a dictionary."""
@@ -68,4 +266,20 @@ class Habit:
         habit.is_active = data['is_active']
         habit.streak_count = data['streak_count']
         habit.total_check_count = data['total_check_count']
-        return habit
\ No newline at end of file
+        habit.version = data.get('version', 0)
+        if 'completion_epochs' in data:
+            habit.completion_epochs = array('q', data['completion_epochs'])
+        elif habit.last_check_date:
+            # Data saved before the history was kept only knows the last completion
+            habit.completion_epochs.append(to_epoch_seconds(habit.last_check_date))
+
+        habit._longest_streak = data.get('longest_streak') or 0
+        habit._last_period = data.get('last_period')
+        epochs = habit.completion_epochs
+        # Rebuild lazily if the saved state is missing or doesn't match the history
+        if epochs:
+            habit._streak_stale = (
+                'longest_streak' not in data
+                or habit._last_period != habit._period_of(epochs[-1])
+            )
+        return habit
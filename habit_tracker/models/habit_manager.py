@@ -1,17 +1,36 @@
-import json
 import os
-from typing import List, Optional
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from .habit import Habit
+from ..utils.profiling import phase, profiled
+from ..utils.metrics import COMPLETIONS, count, observed
+from ..utils.time_utils import current_time, to_epoch_seconds
+from ..analytics.rollups import CompletionRollups
+from ..storage.storage_factory import create_storage, parse_storage_path
+
+DEFAULT_STORAGE_PATH = 'data/habits_data.json'
 
 class HabitManager:
     """Manages the collection of habits."""
-    
-    def __init__(self, storage_path: str = 'data/habits_data.json'):
+
+    def __init__(self,
+                 storage_path: str = DEFAULT_STORAGE_PATH,
+                 compact_threshold: int = 1000,
+                 max_habits: Optional[int] = 10,
+                 group_commit_window: Optional[float] = None):
         """
         Initialize the habit manager.
-        
+
         Args:
-            storage_path: Path to the JSON file for storing habits
+            storage_path: Path to the file for storing habits. A 'sqlite://' scheme or
+                a .db/.sqlite extension selects the SQLite backend, anything else
+                the JSON journal backend.
+            compact_threshold: Number of journaled changes before the JSON snapshot is rewritten
+            max_habits: Maximum number of habits to track, or None for no limit
+            group_commit_window: Seconds during which concurrent changes are
+                coalesced into one journal write and fsync, or None to write
+                each change on its own
         """
         if storage_path is None:
             # Get the directory where habit_manager.py is located
@@ -27,63 +46,265 @@ class HabitManager:
         else:
             self.storage_path = storage_path
 
-        self.habits: List[Habit] = []
+        self.max_habits = max_habits
+        self.storage = create_storage(self.storage_path, compact_threshold, group_commit_window)
+        # Mutations may come from several threads in group commit mode
+        self._lock = threading.RLock()
+        # Habits indexed by id and by periodicity, in insertion order
+        self._habits_by_id: Dict[int, Habit] = {}
+        self._habits_by_periodicity: Dict[str, Dict[int, Habit]] = {'daily': {}, 'weekly': {}}
+        # Completion rollups, kept next to the store and loaded on first use
+        self.rollups_path = parse_storage_path(self.storage_path)[1] + '.rollups.json'
+        self._rollups: Optional[CompletionRollups] = None
         self.load_data()
-    
+
+    @property
+    def habits(self) -> List[Habit]:
+        """All tracked habits in the order they were added."""
+        return list(self._habits_by_id.values())
+
+    @habits.setter
+    def habits(self, habits: List[Habit]) -> None:
+        self._habits_by_id = {}
+        self._habits_by_periodicity = {'daily': {}, 'weekly': {}}
+        for habit in habits:
+            self._index_habit(habit)
+        if self._rollups is not None:
+            self._rollups.sync(habits)
+
+    @property
+    def habit_count(self) -> int:
+        """Number of tracked habits, counted without copying them."""
+        return len(self._habits_by_id)
+
+    @property
+    def rollups(self) -> CompletionRollups:
+        """Completion counts per day and ISO week, caught up with the habits on first use."""
+        with self._lock:
+            if self._rollups is None:
+                rollups = CompletionRollups.load(self.rollups_path)
+                rollups.sync(self._habits_by_id.values())
+                self._rollups = rollups
+            return self._rollups
+
+    @profiled('mutation')
+    @observed('add_habit')
     def add_habit(self, name: str, periodicity: str) -> Habit:
         """
         Add a new habit to track.
-        
+
         Args:
             name: Name of the habit
             periodicity: 'daily' or 'weekly'
-            
+
         Returns:
             The newly created Habit instance
         """
-        if len(self.habits) >= 10:
-            raise ValueError("Maximum number of habits (10) reached")
-        
-        new_id = max([h.id for h in self.habits], default=0) + 1
-        habit = Habit(id=new_id, name=name, periodicity=periodicity)
-        self.habits.append(habit)
-        self.save_data()
+        with self._lock:
+            self._check_capacity(1)
+            habit = Habit(id=self.storage.next_id, name=name, periodicity=periodicity)
+            self._index_habit(habit)
+            with phase('save_data'):
+                self.storage.add(habit)
+            self._compact_if_needed()
+        with phase('save_data'):
+            self.storage.sync()
         return habit
-    
+
+    @profiled('mutation')
+    @observed('remove_habit')
     def remove_habit(self, habit_id: int) -> None:
         """
         Remove a habit from tracking.
-        
+
         Args:
             habit_id: ID of the habit to remove
         """
-        self.habits = [h for h in self.habits if h.id != habit_id]
-        self.save_data()
-    
+        with self._lock:
+            habit = self._habits_by_id.pop(habit_id, None)
+            if habit:
+                del self._habits_by_periodicity[habit.periodicity][habit_id]
+                if self._rollups is not None:
+                    self._rollups.remove(habit)
+            with phase('save_data'):
+                self.storage.remove(habit_id)
+            self._compact_if_needed()
+        with phase('save_data'):
+            self.storage.sync()
+
+    @profiled('mutation')
+    @observed('check_off')
+    def complete_habit(self, habit: Habit, check_date: Optional[datetime] = None) -> None:
+        """
+        Check off a habit and persist the completion.
+
+        In group commit mode this returns once the batch holding the
+        completion has been written and fsynced.
+
+        Args:
+            habit: The habit to check off
+            check_date: When the habit was completed (defaults to now)
+        """
+        check_date = check_date or current_time()
+        with self._lock:
+            habit.check_off(check_date)
+            if self._rollups is not None:
+                self._rollups.add(habit, [to_epoch_seconds(check_date)])
+            with phase('save_data'):
+                self.storage.complete(habit, check_date)
+            self._compact_if_needed()
+        # Wait outside the lock so other callers can join the same batch
+        with phase('save_data'):
+            self.storage.sync()
+        count(COMPLETIONS)
+
+    @profiled('mutation')
+    @observed('check_off_batch')
+    def complete_habits(self, completions: List[Tuple[Habit, datetime]]) -> None:
+        """
+        Check off many habits and persist all completions with a single write.
+
+        The batch is timed as one check_off_batch operation, and each of its
+        completions is added to the completions counter.
+
+        Args:
+            completions: (habit, check_date) pairs, applied in order
+        """
+        with self._lock:
+            added: Dict[int, Tuple[Habit, List[int]]] = {}
+            for habit, check_date in completions:
+                habit.check_off(check_date)
+                added.setdefault(habit.id, (habit, []))[1].append(to_epoch_seconds(check_date))
+            if self._rollups is not None:
+                for habit, epochs in added.values():
+                    self._rollups.add(habit, epochs)
+            with phase('save_data'):
+                self.storage.complete_many(completions)
+            self._compact_if_needed()
+        with phase('save_data'):
+            self.storage.sync()
+        count(COMPLETIONS, len(completions))
+
+    @profiled('mutation')
+    @observed('import_habits')
+    def import_habits(self, records: List[dict]) -> List[Habit]:
+        """
+        Merge a batch of imported habits into the store with a single write.
+
+        Records are matched to existing habits by name and periodicity, and
+        habits that don't exist yet are created.
+
+        Args:
+            records: Dicts with 'name', 'periodicity', 'creation_date' and
+                'completion_epochs' (seconds since the epoch)
+
+        Returns:
+            The habits that were created or received new completions
+        """
+        with self._lock:
+            by_key = {(h.name.lower(), h.periodicity): h for h in self._habits_by_id.values()}
+            new_keys = {(r['name'].lower(), r['periodicity'].lower()) for r in records}
+            self._check_capacity(len(new_keys - by_key.keys()))
+
+            next_id = self.storage.next_id
+            changed = {}
+            for record in records:
+                key = (record['name'].lower(), record['periodicity'].lower())
+                habit = by_key.get(key)
+                if habit is None:
+                    habit = Habit(
+                        id=next_id,
+                        name=record['name'],
+                        periodicity=record['periodicity'],
+                        creation_date=record['creation_date']
+                    )
+                    next_id += 1
+                    self._index_habit(habit)
+                    by_key[key] = habit
+                    changed[habit.id] = habit
+                added = None
+                if self._rollups is not None:
+                    added = set(record['completion_epochs']).difference(habit.completion_epochs)
+                if habit.add_completions(record['completion_epochs']):
+                    changed[habit.id] = habit
+                    if added is not None:
+                        self._rollups.add(habit, added)
+
+            if changed:
+                with phase('save_data'):
+                    self.storage.put(list(changed.values()))
+                self._compact_if_needed()
+        with phase('save_data'):
+            self.storage.sync()
+        return list(changed.values())
+
     def get_habit_by_id(self, habit_id: int) -> Optional[Habit]:
         """Get a habit by its ID."""
-        return next((h for h in self.habits if h.id == habit_id), None)
-    
+        return self._habits_by_id.get(habit_id)
+
     def get_habits_by_periodicity(self, periodicity: str) -> List[Habit]:
         """Get all habits with the specified periodicity."""
-        return [h for h in self.habits if h.periodicity == periodicity.lower()]
-    
+        return list(self._habits_by_periodicity.get(periodicity.lower(), {}).values())
+
+    def get_completions(self,
+                        habit_id: int,
+                        start: Optional[datetime] = None,
+                        end: Optional[datetime] = None) -> List[datetime]:
+        """
+        Get the completion dates of a habit within a date range.
+
+        Args:
+            habit_id: ID of the habit
+            start: Earliest completion to include (inclusive)
+            end: Latest completion to include (exclusive)
+
+        Returns:
+            Completion dates in chronological order
+        """
+        habit = self.get_habit_by_id(habit_id)
+        return habit.get_completions(start, end) if habit else []
+
+    @profiled('save_data')
+    @observed('save_data')
     def save_data(self) -> None:
-        """Save habits to JSON file."""
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-        
-        data = [habit.to_dict() for habit in self.habits]
-        with open(self.storage_path, 'w') as f:
-            json.dump(data, f, indent=2)
-    
+        """Write all habits to the store, folding in any journaled changes."""
+        with self._lock:
+            self.storage.save(self.habits)
+            self.save_rollups()
+
+    def save_rollups(self) -> None:
+        """Write the completion rollups next to the store if they changed."""
+        with self._lock:
+            if self._rollups is not None and self._rollups.dirty:
+                self._rollups.save(self.rollups_path)
+
+    @profiled('load_data')
+    @observed('load_data')
     def load_data(self) -> None:
-        """Load habits from JSON file."""
+        """Load habits from the store."""
         try:
-            with open(self.storage_path, 'r') as f:
-                data = json.load(f)
-                self.habits = [Habit.from_dict(item) for item in data]
+            self.habits = self.storage.load()
         except FileNotFoundError:
             # Create empty file if it doesn't exist
             self.habits = []
-            self.save_data()
\ No newline at end of file
+            self.save_data()
+
+    def close(self) -> None:
+        """Flush pending writes and release the storage backend."""
+        self.save_rollups()
+        self.storage.close()
+
+    def _index_habit(self, habit: Habit) -> None:
+        """Add a habit to the lookup indexes."""
+        self._habits_by_id[habit.id] = habit
+        self._habits_by_periodicity[habit.periodicity][habit.id] = habit
+
+    def _check_capacity(self, new_habits: int) -> None:
+        """Raise if adding the given number of habits would exceed max_habits."""
+        if self.max_habits is not None and len(self._habits_by_id) + new_habits > self.max_habits:
+            raise ValueError(f"Maximum number of habits ({self.max_habits}) reached")
+
+    def _compact_if_needed(self) -> None:
+        """Rewrite the store once the backend's change log grows too long."""
+        if self.storage.needs_compaction():
+            self.save_data()
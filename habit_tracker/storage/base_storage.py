@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import List, Tuple
+from ..models.habit import Habit
+
+class HabitStorage:
+    """
+    Interface shared by the storage backends of HabitManager.
+
+    Backends also keep next_id, the lowest habit id never assigned, and
+    persist it with the data so ids of removed habits are not reused.
+    """
+
+    next_id = 1
+
+    def load(self) -> List[Habit]:
+        """
+        Load all stored habits.
+
+        Raises:
+            FileNotFoundError: If the store does not exist yet
+        """
+        raise NotImplementedError
+
+    def save(self, habits: List[Habit]) -> None:
+        """Write the full set of habits to the store."""
+        raise NotImplementedError
+
+    def add(self, habit: Habit) -> None:
+        """Persist a newly created habit."""
+        raise NotImplementedError
+
+    def put(self, habits: List[Habit]) -> None:
+        """Persist the full current state of the given habits in one write."""
+        raise NotImplementedError
+
+    def remove(self, habit_id: int) -> None:
+        """Persist the removal of a habit."""
+        raise NotImplementedError
+
+    def complete(self, habit: Habit, check_date: datetime) -> None:
+        """Persist a completion of a habit that has already been checked off."""
+        raise NotImplementedError
+
+    def complete_many(self, completions: List[Tuple[Habit, datetime]]) -> None:
+        """Persist completions of habits that have already been checked off."""
+        for habit, check_date in completions:
+            self.complete(habit, check_date)
+
+    def sync(self) -> None:
+        """Block until the calling thread's writes are durable."""
+        pass
+
+    def needs_compaction(self) -> bool:
+        """Check whether the store should be rewritten with save()."""
+        return False
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+        pass
@@ -0,0 +1,143 @@
+import mmap
+import struct
+import sys
+from array import array
+from datetime import timedelta
+from typing import Callable, Dict, List, Tuple
+from ..models.habit import Habit
+from ..utils.time_utils import EPOCH, to_naive
+from .journal_storage import JournalStorage
+
+MAGIC = b'HABITBIN'
+VERSION = 2
+# magic, version, habit count, journal seq, next_id, string pool offset and
+# size, completions offset
+HEADER = struct.Struct('<8sIIqqqqq')
+# id, name offset and length in the string pool, periodicity, is_active,
+# creation and last check time (microseconds since the epoch), streak count,
+# longest streak, last period, total check count, first completion index and
+# completion count, followed by the habit's data version
+RECORD = struct.Struct('<qIIBB6xqqqqqqqqq')
+# Version 1 snapshots have no data version
+RECORDS = {1: struct.Struct('<qIIBB6xqqqqqqqq'), 2: RECORD}
+# Marks a missing last_check_date or last_period
+NONE = -2**63
+PERIODICITIES = ('daily', 'weekly')
+MICROSECOND = timedelta(microseconds=1)
+
+class BinaryStorage(JournalStorage):
+    """
+    Stores habits as a memory-mapped binary snapshot plus the JSON journal.
+
+    The snapshot holds a header, a table of fixed-width habit records, a
+    string pool with each distinct name stored once, and one column with
+    the completion times of all habits as int64 seconds. Loading reads the
+    habit table without parsing any text, and a habit's completion history
+    is only copied out of the mapping when it is first used, so commands
+    like 'list' never touch the completions pages.
+    """
+
+    def _read_snapshot(self) -> Tuple[int, int, List[Habit]]:
+        """
+        Map the snapshot file and read its habit table.
+
+        Raises:
+            FileNotFoundError: If there is no snapshot
+            ValueError: If the file is not a habit snapshot
+        """
+        with open(self.snapshot_path, 'rb') as f:
+            try:
+                # The mapping stays valid after the file is closed
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Empty habit snapshot: {self.snapshot_path}")
+
+        if len(data) < HEADER.size:
+            raise ValueError(f"Truncated habit snapshot: {self.snapshot_path}")
+        magic, version, count, seq, next_id, pool_offset, pool_size, completions_offset = \
+            HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version not in RECORDS:
+            raise ValueError(f"Not a habit snapshot: {self.snapshot_path}")
+        record = RECORDS[version]
+
+        names: Dict[int, str] = {}
+        habits = []
+        for index in range(count):
+            (habit_id, name_offset, name_length, periodicity, is_active, created,
+             last_check, streak_count, longest_streak, last_period, total_check_count,
+             first_completion, completion_count, *data_version) = \
+                record.unpack_from(data, HEADER.size + index * record.size)
+
+            name = names.get(name_offset)
+            if name is None:
+                start = pool_offset + name_offset
+                name = names[name_offset] = data[start:start + name_length].decode('utf-8')
+
+            habit = Habit(id=habit_id, name=name, periodicity=PERIODICITIES[periodicity],
+                          creation_date=EPOCH + created * MICROSECOND)
+            habit.is_active = bool(is_active)
+            if last_check != NONE:
+                habit.last_check_date = EPOCH + last_check * MICROSECOND
+            habit.streak_count = streak_count
+            habit._longest_streak = longest_streak
+            habit._last_period = None if last_period == NONE else last_period
+            habit.total_check_count = total_check_count
+            habit.version = data_version[0] if data_version else 0
+            if completion_count:
+                habit.defer_completions(self._completion_loader(
+                    data, completions_offset + first_completion * 8, completion_count
+                ))
+            habits.append(habit)
+        return seq, next_id, habits
+
+    def _write_snapshot(self, path: str, habits: List[Habit]) -> None:
+        """Write a binary snapshot of the given habits, including records up to self.seq."""
+        pool = bytearray()
+        name_offsets: Dict[str, Tuple[int, int]] = {}
+        table = bytearray()
+        completions = array('q')
+        for habit in habits:
+            if habit.name not in name_offsets:
+                encoded = habit.name.encode('utf-8')
+                name_offsets[habit.name] = (len(pool), len(encoded))
+                pool += encoded
+            name_offset, name_length = name_offsets[habit.name]
+            last_period = habit.last_period
+            table += RECORD.pack(
+                habit.id, name_offset, name_length,
+                PERIODICITIES.index(habit.periodicity), habit.is_active,
+                # Aware dates are stored as the local wall-clock time, like naive ones
+                (to_naive(habit.creation_date) - EPOCH) // MICROSECOND,
+                (to_naive(habit.last_check_date) - EPOCH) // MICROSECOND
+                if habit.last_check_date else NONE,
+                habit.streak_count, habit.longest_streak,
+                NONE if last_period is None else last_period,
+                habit.total_check_count, len(completions), len(habit.completion_epochs),
+                habit.version
+            )
+            completions.extend(habit.completion_epochs)
+
+        if sys.byteorder == 'big':
+            completions.byteswap()
+        pool_offset = HEADER.size + len(table)
+        # Align the completions column so it can be viewed as int64 in place
+        padding = -(pool_offset + len(pool)) % 8
+        completions_offset = pool_offset + len(pool) + padding
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(habits), self.seq, self.next_id,
+                                pool_offset, len(pool), completions_offset))
+            f.write(table)
+            f.write(pool)
+            f.write(b'\0' * padding)
+            f.write(completions.tobytes())
+
+    @staticmethod
+    def _completion_loader(data: mmap.mmap, offset: int, count: int) -> Callable[[], array]:
+        """Build a loader that copies one habit's completions out of the mapping."""
+        def load() -> array:
+            epochs = array('q')
+            epochs.frombytes(data[offset:offset + count * 8])
+            if sys.byteorder == 'big':
+                epochs.byteswap()
+            return epochs
+        return load
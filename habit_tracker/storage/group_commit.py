@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from typing import Dict, List
+
+class GroupCommitLog:
+    """
+    Coalesces appends from many threads into one write and fsync per batch.
+
+    Lines submitted within the batching window are written together by a
+    background thread. A batch is flushed when the window has passed since
+    its first line arrived, or as soon as it holds max_batch lines.
+    """
+
+    def __init__(self, path: str, window: float = 0.005, max_batch: int = 1000):
+        """
+        Initialize the log and start the flush thread.
+
+        Args:
+            path: File the lines are appended to
+            window: Seconds to wait for more lines before flushing a batch
+            max_batch: Number of lines that triggers an immediate flush
+        """
+        self.path = path
+        self.window = window
+        self.max_batch = max_batch
+        self.batches_written = 0
+        self._condition = threading.Condition()
+        self._pending: List[str] = []
+        self._batch = 0
+        self._flushed = -1
+        self._errors: Dict[int, OSError] = {}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+        self._thread.start()
+
+    def submit(self, lines: List[str]) -> int:
+        """
+        Queue lines for the next batch without waiting for the flush.
+
+        Returns:
+            Ticket to pass to wait()
+        """
+        with self._condition:
+            if self._closed:
+                raise ValueError("Group commit log is closed")
+            self._pending.extend(lines)
+            self._condition.notify_all()
+            return self._batch
+
+    def wait(self, ticket: int) -> None:
+        """
+        Block until the batch of a ticket is durable on disk.
+
+        Raises:
+            OSError: If writing the batch failed
+        """
+        with self._condition:
+            while self._flushed < ticket:
+                self._condition.wait()
+            error = self._errors.pop(ticket, None)
+        if error:
+            raise error
+
+    def flush(self) -> None:
+        """Block until every submitted line is durable on disk."""
+        with self._condition:
+            ticket = self._batch if self._pending else self._batch - 1
+        self.wait(ticket)
+
+    def close(self) -> None:
+        """Flush the remaining lines and stop the flush thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Collect batches and write each with a single write and fsync."""
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                lines, self._pending = self._pending, []
+                batch = self._batch
+                self._batch += 1
+
+            # Writers can queue the next batch while this one is written
+            error = None
+            try:
+                with open(self.path, 'a') as f:
+                    f.write('\n'.join(lines) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                error = e
+
+            with self._condition:
+                if error:
+                    self._errors[batch] = error
+                self._flushed = batch
+                self.batches_written += 1
+                self._condition.notify_all()
@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from ..models.habit import Habit
+from .base_storage import HabitStorage
+from .group_commit import GroupCommitLog
+
+class JournalStorage(HabitStorage):
+    """
+    Stores habits as a JSON snapshot plus an append-only journal.
+
+    Every mutation is appended to the journal as one compact JSON line, so
+    the cost of a write does not depend on the size of the store. The journal
+    is folded into the snapshot once it grows past the compaction threshold.
+
+    With a group commit window, appends from concurrent callers are written
+    by a GroupCommitLog with one write and fsync per batch, and sync() blocks
+    until the calling thread's records are durable.
+    """
+
+    def __init__(self,
+                 snapshot_path: str,
+                 compact_threshold: int = 1000,
+                 group_commit_window: Optional[float] = None,
+                 group_commit_size: int = 1000):
+        """
+        Initialize the journal storage.
+
+        Args:
+            snapshot_path: Path to the JSON snapshot file
+            compact_threshold: Number of journal records that triggers compaction
+            group_commit_window: Seconds to batch appends for, or None to write
+                each append directly without fsync
+            group_commit_size: Number of records that flushes a batch early
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + '.journal'
+        self.compact_threshold = compact_threshold
+        self.seq = 0
+        self.journal_size = 0
+        self.next_id = 1
+        self._lock = threading.Lock()
+        self._tickets = threading.local()
+        self._group_log = None
+        if group_commit_window is not None:
+            self._ensure_directory()
+            self._group_log = GroupCommitLog(self.journal_path, group_commit_window,
+                                             group_commit_size)
+
+    def load(self) -> List[Habit]:
+        """
+        Load habits by replaying the journal on top of the snapshot.
+
+        Raises:
+            FileNotFoundError: If neither a snapshot nor a journal exists
+        """
+        habits: Dict[int, Habit] = {}
+        snapshot_seq = 0
+        self.next_id = 1
+        try:
+            snapshot_seq, self.next_id, snapshot_habits = self._read_snapshot()
+            habits = {habit.id: habit for habit in snapshot_habits}
+        except FileNotFoundError:
+            if not os.path.exists(self.journal_path):
+                raise
+
+        self.seq = snapshot_seq
+        self.journal_size = 0
+        for record in self._read_journal():
+            self.seq = max(self.seq, record['seq'])
+            if record['seq'] <= snapshot_seq:
+                # Already folded into the snapshot by an interrupted compaction
+                continue
+            self._apply(habits, record)
+            self.journal_size += 1
+            if record['op'] in ('add', 'put'):
+                self.next_id = max(self.next_id, record['habit']['id'] + 1)
+        return list(habits.values())
+
+    def add(self, habit: Habit) -> None:
+        """Journal a newly created habit."""
+        self.next_id = max(self.next_id, habit.id + 1)
+        self.append([{'op': 'add', 'habit': habit.to_dict()}])
+
+    def put(self, habits: List[Habit]) -> None:
+        """Journal the full state of the given habits in a single append."""
+        self.next_id = max([self.next_id] + [habit.id + 1 for habit in habits])
+        self.append([{'op': 'put', 'habit': habit.to_dict()} for habit in habits])
+
+    def remove(self, habit_id: int) -> None:
+        """Journal the removal of a habit."""
+        self.append([{'op': 'remove', 'id': habit_id}])
+
+    def complete(self, habit: Habit, check_date: datetime) -> None:
+        """Journal a completion of a habit."""
+        self.append([{'op': 'check', 'id': habit.id, 'at': check_date.isoformat()}])
+
+    def complete_many(self, completions: List[Tuple[Habit, datetime]]) -> None:
+        """Journal completions of several habits in a single append."""
+        self.append([
+            {'op': 'check', 'id': habit.id, 'at': check_date.isoformat()}
+            for habit, check_date in completions
+        ])
+
+    def append(self, records: List[dict]) -> None:
+        """
+        Append mutation records to the journal in a single write.
+
+        In group commit mode the records are only queued; call sync() to
+        wait until they are durable.
+
+        Args:
+            records: Records with an 'op' key ('add', 'put', 'remove' or 'check')
+        """
+        # Sequence numbers must reach the journal in order, so number and
+        # queue the records under one lock
+        with self._lock:
+            lines = []
+            for record in records:
+                self.seq += 1
+                lines.append(json.dumps({'seq': self.seq, **record}, separators=(',', ':')))
+            self.journal_size += len(records)
+            if self._group_log:
+                self._tickets.last = self._group_log.submit(lines)
+                return
+            self._ensure_directory()
+            with open(self.journal_path, 'a') as f:
+                f.write('\n'.join(lines) + '\n')
+
+    def sync(self) -> None:
+        """Block until the records appended by this thread are durable."""
+        ticket = getattr(self._tickets, 'last', None)
+        if ticket is not None and self._group_log:
+            self._tickets.last = None
+            self._group_log.wait(ticket)
+
+    def save(self, habits: List[Habit]) -> None:
+        """Write a full snapshot of all habits and reset the journal."""
+        if self._group_log:
+            # Queued records must land before the journal is truncated
+            self._group_log.flush()
+        self._ensure_directory()
+        temp_path = self.snapshot_path + '.tmp'
+        self._write_snapshot(temp_path, habits)
+        os.replace(temp_path, self.snapshot_path)
+        # Records up to self.seq are now in the snapshot, so the journal can go
+        with open(self.journal_path, 'w'):
+            pass
+        self.journal_size = 0
+
+    def needs_compaction(self) -> bool:
+        """Check whether the journal has grown past the compaction threshold."""
+        return self.journal_size >= self.compact_threshold
+
+    def close(self) -> None:
+        """Flush queued records and stop the group commit thread."""
+        if self._group_log:
+            self._group_log.close()
+            self._group_log = None
+
+    def _read_snapshot(self) -> Tuple[int, int, List[Habit]]:
+        """
+        Read the snapshot file.
+
+        Returns:
+            The journal sequence number it includes, next_id and the habits
+
+        Raises:
+            FileNotFoundError: If there is no snapshot
+        """
+        with open(self.snapshot_path, 'r') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            # Snapshots written before the journal existed are plain lists
+            data = {'seq': 0, 'habits': data}
+        habits = [Habit.from_dict(item) for item in data['habits']]
+        next_id = data.get('next_id', max([h.id for h in habits], default=0) + 1)
+        return data['seq'], next_id, habits
+
+    def _write_snapshot(self, path: str, habits: List[Habit]) -> None:
+        """Write a snapshot of the given habits, including records up to self.seq."""
+        data = {
+            'seq': self.seq,
+            'next_id': self.next_id,
+            'habits': [habit.to_dict() for habit in habits]
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def _read_journal(self):
+        """Yield journal records, truncating a torn write at the tail."""
+        try:
+            f = open(self.journal_path, 'rb+')
+        except FileNotFoundError:
+            return
+        with f:
+            offset = 0
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("Incomplete journal record")
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash mid-append leaves a partial last line behind
+                    f.truncate(offset)
+                    return
+                offset += len(line)
+                yield record
+
+    @staticmethod
+    def _apply(habits: Dict[int, Habit], record: dict) -> None:
+        """Apply a single journal record to the in-memory habits."""
+        op = record['op']
+        if op in ('add', 'put'):
+            habit = Habit.from_dict(record['habit'])
+            habits[habit.id] = habit
+        elif op == 'remove':
+            habits.pop(record['id'], None)
+        elif op == 'check':
+            habit = habits.get(record['id'])
+            if habit:
+                habit.check_off(datetime.fromisoformat(record['at']))
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+
+    def _ensure_directory(self) -> None:
+        """Create the storage directory if it doesn't exist."""
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
@@ -0,0 +1,212 @@
+import os
+import sqlite3
+from array import array
+from datetime import datetime
+from typing import List, Optional, Tuple
+from ..models.habit import Habit
+from ..utils.time_utils import to_epoch_seconds, from_epoch_seconds
+from .base_storage import HabitStorage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS habits (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    periodicity TEXT NOT NULL,
+    creation_date TEXT NOT NULL,
+    last_check_date TEXT,
+    is_active INTEGER NOT NULL,
+    streak_count INTEGER NOT NULL,
+    longest_streak INTEGER NOT NULL,
+    last_period INTEGER,
+    total_check_count INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_habits_periodicity ON habits (periodicity);
+CREATE TABLE IF NOT EXISTS completions (
+    habit_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_completions_habit_ts ON completions (habit_id, ts);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+HABIT_COLUMNS = (
+    'id', 'name', 'periodicity', 'creation_date', 'last_check_date',
+    'is_active', 'streak_count', 'longest_streak', 'last_period', 'total_check_count', 'version'
+)
+
+class SQLiteStorage(HabitStorage):
+    """
+    Stores habits in a SQLite database running in WAL mode.
+
+    Each mutation only touches the rows of the affected habit, and the
+    completion history is kept in its own table indexed on (habit_id, ts).
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the SQLite storage.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+        self.next_id = 1
+
+    def load(self) -> List[Habit]:
+        """Load all habits together with their completion history."""
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(HABIT_COLUMNS)} FROM habits ORDER BY id"
+        )
+        habits = [self._row_to_habit(row) for row in cursor]
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        self.next_id = row[0] if row else max([h.id for h in habits], default=0) + 1
+        histories = {habit.id: habit.completion_epochs for habit in habits}
+        # The (habit_id, ts) index covers this query, so rows come back in order
+        cursor = self.connection.execute(
+            "SELECT habit_id, ts FROM completions ORDER BY habit_id, ts"
+        )
+        for habit_id, ts in cursor:
+            history = histories.get(habit_id)
+            if history is not None:
+                history.append(ts)
+        return habits
+
+    def save(self, habits: List[Habit]) -> None:
+        """Replace the habits and completions tables with the given habits."""
+        with self.connection:
+            self.connection.executemany(
+                self._upsert_sql(), [self._habit_to_row(habit) for habit in habits]
+            )
+            self.connection.execute("DELETE FROM completions")
+            self.connection.executemany(
+                "INSERT INTO completions (habit_id, ts) VALUES (?, ?)",
+                ((habit.id, ts) for habit in habits for ts in habit.completion_epochs)
+            )
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS kept_ids (id INTEGER PRIMARY KEY)")
+            self.connection.execute("DELETE FROM kept_ids")
+            self.connection.executemany(
+                "INSERT INTO kept_ids (id) VALUES (?)", [(habit.id,) for habit in habits]
+            )
+            self.connection.execute("DELETE FROM habits WHERE id NOT IN (SELECT id FROM kept_ids)")
+            self._save_next_id(habits)
+
+    def add(self, habit: Habit) -> None:
+        """Insert a newly created habit."""
+        with self.connection:
+            self.connection.execute(self._upsert_sql(), self._habit_to_row(habit))
+            self._save_next_id([habit])
+
+    def put(self, habits: List[Habit]) -> None:
+        """Replace the rows and completion history of the given habits."""
+        with self.connection:
+            self.connection.executemany(
+                self._upsert_sql(), [self._habit_to_row(habit) for habit in habits]
+            )
+            self.connection.executemany(
+                "DELETE FROM completions WHERE habit_id = ?", [(habit.id,) for habit in habits]
+            )
+            self.connection.executemany(
+                "INSERT INTO completions (habit_id, ts) VALUES (?, ?)",
+                ((habit.id, ts) for habit in habits for ts in habit.completion_epochs)
+            )
+            self._save_next_id(habits)
+
+    def remove(self, habit_id: int) -> None:
+        """Delete a habit together with its completion history."""
+        with self.connection:
+            self.connection.execute("DELETE FROM habits WHERE id = ?", (habit_id,))
+            self.connection.execute("DELETE FROM completions WHERE habit_id = ?", (habit_id,))
+
+    def complete(self, habit: Habit, check_date: datetime) -> None:
+        """Record a completion and update the counters of the habit's row."""
+        self.complete_many([(habit, check_date)])
+
+    def complete_many(self, completions: List[Tuple[Habit, datetime]]) -> None:
+        """Record completions and update the counters of their habits' rows in one transaction."""
+        habits = {habit.id: habit for habit, _ in completions}
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO completions (habit_id, ts) VALUES (?, ?)",
+                [(habit.id, to_epoch_seconds(check_date)) for habit, check_date in completions]
+            )
+            self.connection.executemany(
+                "UPDATE habits SET last_check_date = ?, streak_count = ?, longest_streak = ?, "
+                "last_period = ?, total_check_count = ?, version = ? WHERE id = ?",
+                [(habit.last_check_date.isoformat(), habit.streak_count, habit.longest_streak,
+                  habit.last_period, habit.total_check_count, habit.version, habit.id)
+                 for habit in habits.values()]
+            )
+
+    def get_completions(self,
+                        habit_id: int,
+                        start: Optional[datetime] = None,
+                        end: Optional[datetime] = None) -> List[datetime]:
+        """
+        Query the completion dates of a habit within [start, end).
+
+        Unlike Habit.get_completions this reads the database directly through
+        the (habit_id, ts) index, without loading the store.
+        """
+        start_ts = to_epoch_seconds(start) if start else -2**63
+        end_ts = to_epoch_seconds(end) if end else 2**63 - 1
+        cursor = self.connection.execute(
+            "SELECT ts FROM completions WHERE habit_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (habit_id, start_ts, end_ts)
+        )
+        return [from_epoch_seconds(ts) for (ts,) in cursor]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def _migrate(self) -> None:
+        """Add columns that databases created by older versions are missing."""
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(habits)")}
+        if 'version' not in columns:
+            with self.connection:
+                self.connection.execute(
+                    "ALTER TABLE habits ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+                )
+
+    def _save_next_id(self, habits: List[Habit]) -> None:
+        """Advance next_id past the given habits and store it in the current transaction."""
+        self.next_id = max([self.next_id] + [habit.id + 1 for habit in habits])
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)", (self.next_id,)
+        )
+
+    @staticmethod
+    def _upsert_sql() -> str:
+        """Build the statement that inserts or replaces a habit row."""
+        return (
+            f"INSERT OR REPLACE INTO habits ({', '.join(HABIT_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(HABIT_COLUMNS))})"
+        )
+
+    @staticmethod
+    def _habit_to_row(habit: Habit) -> tuple:
+        """Convert a habit to a row of the habits table."""
+        data = habit.to_dict()
+        data['is_active'] = int(data['is_active'])
+        # The completion history lives in its own table
+        return tuple(data[column] for column in HABIT_COLUMNS)
+
+    @staticmethod
+    def _row_to_habit(row: tuple) -> Habit:
+        """Convert a row of the habits table to a habit."""
+        data = dict(zip(HABIT_COLUMNS, row))
+        data['is_active'] = bool(data['is_active'])
+        data['completion_epochs'] = array('q')
+        return Habit.from_dict(data)
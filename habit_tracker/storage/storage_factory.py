@@ -0,0 +1,57 @@
+from typing import Optional
+from .base_storage import HabitStorage
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+BINARY_EXTENSIONS = ('.bin',)
+SCHEMES = ('json', 'sqlite', 'binary')
+
+def create_storage(storage_path: str,
+                   compact_threshold: int = 1000,
+                   group_commit_window: Optional[float] = None) -> HabitStorage:
+    """
+    Create the storage backend for a storage path.
+
+    The backend is chosen by an explicit scheme ('json://', 'sqlite://' or
+    'binary://') or, without a scheme, by the file extension.
+
+    Args:
+        storage_path: Path to the store, optionally prefixed with a scheme
+        compact_threshold: Journal length that triggers compaction (JSON only)
+        group_commit_window: Seconds to batch concurrent writes for (not SQLite)
+
+    Returns:
+        The storage backend
+
+    Raises:
+        ValueError: If group commit is requested for a backend without it
+    """
+    scheme, path = parse_storage_path(storage_path)
+    if scheme == 'sqlite':
+        if group_commit_window is not None:
+            raise ValueError("Group commit is not supported by the SQLite storage backend")
+        from .sqlite_storage import SQLiteStorage
+        return SQLiteStorage(path)
+    if scheme == 'binary':
+        from .binary_storage import BinaryStorage
+        return BinaryStorage(path, compact_threshold, group_commit_window)
+    from .journal_storage import JournalStorage
+    return JournalStorage(path, compact_threshold, group_commit_window)
+
+def parse_storage_path(storage_path: str) -> tuple[str, str]:
+    """
+    Split a storage path into its backend scheme and file path.
+
+    Raises:
+        ValueError: If the scheme is not supported
+    """
+    if '://' in storage_path:
+        scheme, path = storage_path.split('://', 1)
+        scheme = scheme.lower()
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unsupported storage scheme: {scheme}")
+        return scheme, path
+    if storage_path.lower().endswith(SQLITE_EXTENSIONS):
+        return 'sqlite', storage_path
+    if storage_path.lower().endswith(BINARY_EXTENSIONS):
+        return 'binary', storage_path
+    return 'json', storage_path
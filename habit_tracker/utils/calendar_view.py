@@ -2,13 +2,20 @@
 import calendar
 from datetime import datetime, timedelta
 from typing import List, Dict
+from .completion_bitmaps import build_month_bitmaps
+from .profiling import profiled
+from .time_utils import current_time
+
+# Marks for the share of habits completed on a day in year and range views
+LEVELS = '.-+*#'
 
 class CalendarView:
     """Displays habits in a monthly calendar format."""
     def __init__(self):
-        self.current_date = datetime.now()
+        self.current_date = current_time()
         self.calendar = calendar.TextCalendar(firstweekday=calendar.MONDAY)
 
+    @profiled('rendering')
     def display_month(self, habits, year, month):
         """Display calendar for a specific month with habit completions."""
         # Get the calendar for the specified month
@@ -49,15 +56,12 @@ class CalendarView:
 
     def _get_completion_status(self, date, habits):
         """Check if any habit was completed on the given date."""
-        target_date = date.date()
-        return any(
-            hasattr(habit, 'completions') and  # Check if habit has completions attribute
-            any(completion.date() == target_date 
-                for completion in habit.completions)
-            for habit in habits
-        )
+        build_month_bitmaps(habits)
+        bit = 1 << (date.day - 1)
+        return any(habit.get_month_bitmap(date.year, date.month) & bit for habit in habits)
     
     @staticmethod
+    @profiled('rendering')
     def generate_monthly_view(habits: List['Habit'], year: int = None, month: int = None) -> str:
         """
         Generate a monthly calendar view showing habit completions.
@@ -71,7 +75,7 @@ class CalendarView:
             Formatted string showing the calendar
         """
         if year is None or month is None:
-            now = datetime.now()
+            now = current_time()
             year = now.year
             month = now.month
             
@@ -84,14 +88,13 @@ class CalendarView:
         output.append("-" * 50)
         output.append("Mon  Tue  Wed  Thu  Fri  Sat  Sun")
         
-        # Generate completion marks for each habit
-        habit_marks = {}
-        for habit in habits:
-            if habit.last_check_date:
-                date_key = habit.last_check_date.strftime("%Y-%m-%d")
-                if date_key not in habit_marks:
-                    habit_marks[date_key] = []
-                habit_marks[date_key].append(habit.name[0])  # First letter of habit name
+        # One completion word per habit, with bit d - 1 set for day d
+        build_month_bitmaps(habits)
+        habit_words = [
+            (habit.name[0], habit.get_month_bitmap(year, month))  # First letter of habit name
+            for habit in habits
+        ]
+        habit_words = [(letter, word) for letter, word in habit_words if word]
         
         # Generate calendar rows
         for week in cal:
@@ -100,10 +103,9 @@ class CalendarView:
                 if day == 0:
                     week_str.append("    ")
                 else:
-                    date = datetime(year, month, day)
-                    date_key = date.strftime("%Y-%m-%d")
-                    if date_key in habit_marks:
-                        marks = "".join(habit_marks[date_key])
+                    bit = 1 << (day - 1)
+                    marks = "".join(letter for letter, word in habit_words if word & bit)
+                    if marks:
                         day_str = f"{day:2d}{marks}"
                     else:
                         day_str = f"{day:2d} "
@@ -112,6 +114,108 @@ class CalendarView:
             
         return "\n".join(output)
 
+    @staticmethod
+    @profiled('rendering')
+    def generate_range_view(habits: List['Habit'], start_year: int, start_month: int,
+                            end_year: int, end_month: int) -> str:
+        """
+        Generate a view of several months with one row of days per month.
+
+        Each day shows the share of the habits completed on it, from '.' for
+        none to '#' for all, so any number of habits fits on one screen.
+
+        Args:
+            habits: List of habits to display
+            start_year: Year of the first month
+            start_month: First month to display (1-12)
+            end_year: Year of the last month
+            end_month: Last month to display (1-12)
+
+        Returns:
+            Formatted string showing the months
+        """
+        import numpy as np
+
+        months = [
+            divmod(key, 12) for key in range(start_year * 12 + start_month - 1,
+                                             end_year * 12 + end_month)
+        ]
+        build_month_bitmaps(habits)
+        # Habits x months matrix of completion words
+        words = np.array(
+            [[habit.get_month_bitmap(year, month + 1) for year, month in months] for habit in habits],
+            dtype=np.int64
+        ).reshape(len(habits), len(months))
+        # Number of habits completed on each day of each month
+        days = np.arange(31, dtype=np.int64)
+        counts = ((words[:, :, None] >> days) & 1).sum(axis=0)
+
+        output = ["Month     " + "".join(f"{day:<5d}" for day in range(1, 32, 5)).rstrip()]
+        for index, (year, month) in enumerate(months):
+            month_days = calendar.monthrange(year, month + 1)[1]
+            cells = []
+            for count in counts[index, :month_days].tolist():
+                level = 0 if not count else 1 + min(count * 4 // max(len(habits), 1), 3)
+                cells.append(LEVELS[level])
+            done = int(counts[index].sum())
+            rate = done / (len(habits) * month_days) * 100 if habits else 0.0
+            output.append(f"{calendar.month_abbr[month + 1]} {year:04d}  "
+                          f"{''.join(cells):<31}  {rate:5.1f}%")
+        output.append(f"\nLegend: {LEVELS[0]} none  {LEVELS[1]} <25%  {LEVELS[2]} <50%  "
+                      f"{LEVELS[3]} <75%  {LEVELS[4]} 75% or more of {len(habits)} "
+                      f"habit{'s' if len(habits) != 1 else ''}")
+        return "\n".join(output)
+
+    @staticmethod
+    @profiled('rendering')
+    def generate_year_view(habits: List['Habit'], year: int) -> str:
+        """
+        Generate a view of all months of a year with one row per month.
+
+        Args:
+            habits: List of habits to display
+            year: Year to display
+
+        Returns:
+            Formatted string showing the year
+        """
+        header = f"\n{year}".center(50)
+        return f"{header}\n{'-' * 50}\n{CalendarView.generate_range_view(habits, year, 1, year, 12)}"
+
+    @staticmethod
+    @profiled('rendering')
+    def generate_heatmap_view(histogram: 'np.ndarray', buckets: Dict[str, int]) -> str:
+        """
+        Generate a weekday-by-hour heatmap of completions.
+
+        Each cell shows the completions in that hour relative to the busiest
+        hour, from '.' for none to '#' for the busiest quarter.
+
+        Args:
+            histogram: Completions per weekday and hour, shape (7, 24)
+            buckets: Completions per time-of-day bucket
+
+        Returns:
+            Formatted string showing the heatmap and the bucket totals
+        """
+        peak = int(histogram.max()) if histogram.size else 0
+        hours = "".join(f"{hour:<6d}" for hour in range(0, 24, 6))
+        output = [f"     {hours:<24}  {'Total':>7}"]
+        for weekday, row in zip(('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'), histogram.tolist()):
+            cells = "".join(
+                LEVELS[0 if not count else 1 + min(count * 4 // peak, 3)] for count in row
+            )
+            output.append(f"{weekday}  {cells}  {sum(row):>7d}")
+        output.append(f"\nLegend: {LEVELS[0]} none  {LEVELS[1]} <25%  {LEVELS[2]} <50%  "
+                      f"{LEVELS[3]} <75%  {LEVELS[4]} 75% or more of the busiest hour ({peak})")
+
+        total = sum(buckets.values())
+        output.append("\nTime of day:")
+        for name, count in buckets.items():
+            share = count / total * 100 if total else 0.0
+            output.append(f"{name.capitalize():<12} {count:>7d}  {share:5.1f}%")
+        return "\n".join(output)
+
     @staticmethod
     def get_habit_summary(habits: List['Habit']) -> str:
         """Generate a summary of habits and their markers."""
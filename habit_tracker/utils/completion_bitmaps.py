@@ -0,0 +1,50 @@
+from typing import Iterable
+from .time_utils import SECONDS_PER_DAY
+
+def month_key(year: int, month: int) -> int:
+    """Get the key of a month in the month bitmaps (months since year 0)."""
+    return year * 12 + month - 1
+
+def build_month_bitmaps(habits: Iterable['Habit']) -> None:
+    """
+    Build the per-month completion bitmaps of habits that don't have them yet.
+
+    A habit's bitmaps map a month key to a word with bit d - 1 set when the
+    habit was completed on day d of that month. All pending histories are
+    converted in one vectorized pass.
+    """
+    import numpy as np
+
+    pending = [habit for habit in habits if habit._month_bits is None]
+    lengths = [len(habit.completion_epochs) for habit in pending]
+    if not sum(lengths):
+        for habit in pending:
+            habit._month_bits = {}
+        return
+
+    epochs = np.concatenate([
+        np.frombuffer(habit.completion_epochs, dtype=np.int64) for habit in pending
+    ])
+    owners = np.repeat(np.arange(len(pending)), lengths)
+    days = epochs // SECONDS_PER_DAY
+    # Calendar conversion is slow, so convert each day in the span once and
+    # look the completions up in that table
+    first_day = int(days.min())
+    span = np.arange(first_day, int(days.max()) + 1).astype('datetime64[D]')
+    span_months = span.astype('datetime64[M]')
+    # datetime64[M] counts months since January 1970
+    span_keys = span_months.astype(np.int64) + 1970 * 12
+    span_bits = np.left_shift(np.int64(1), (span - span_months.astype('datetime64[D]')).astype(np.int64))
+    keys = span_keys[days - first_day]
+    bits = span_bits[days - first_day]
+
+    # Histories are sorted, so each (habit, month) group is one contiguous run
+    change = np.ones(len(epochs), dtype=bool)
+    change[1:] = (owners[1:] != owners[:-1]) | (keys[1:] != keys[:-1])
+    starts = np.flatnonzero(change)
+    words = np.bitwise_or.reduceat(bits, starts).tolist()
+    group_keys = keys[starts].tolist()
+    bounds = np.searchsorted(owners[starts], np.arange(len(pending) + 1)).tolist()
+    for index, habit in enumerate(pending):
+        low, high = bounds[index], bounds[index + 1]
+        habit._month_bits = dict(zip(group_keys[low:high], words[low:high]))
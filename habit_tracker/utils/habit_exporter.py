@@ -0,0 +1,32 @@
+import json
+import os
+from typing import Any, Dict
+
+def export_habits(habit_manager, file_path: str) -> Dict[str, Any]:
+    """
+    Write all habits and their completion history to a JSON file.
+
+    The file uses the JSON snapshot layout, so it can be read back with the
+    import command or opened directly as a JSON habit store.
+
+    Args:
+        habit_manager: HabitManager to export from
+        file_path: Path of the JSON file to write
+
+    Returns:
+        Dictionary with the number of exported habits and completions
+    """
+    habits = habit_manager.habits
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'seq': 0,
+            'next_id': habit_manager.storage.next_id,
+            'habits': [habit.to_dict() for habit in habits]
+        }, f, indent=2)
+    return {
+        'habits': len(habits),
+        'completions': sum(len(habit.completion_epochs) for habit in habits)
+    }
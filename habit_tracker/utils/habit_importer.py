@@ -0,0 +1,283 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+from .habit_validator import HabitValidator
+from .time_utils import current_time, to_epoch_seconds, from_epoch_seconds, to_naive
+
+WHITESPACE = ' \t\r\n'
+# Largest JSON value, in characters, held in memory while it is decoded
+MAX_VALUE_SIZE = 64 << 20
+
+class JsonArrayStream:
+    """
+    Reads the elements of a JSON array one at a time from a file.
+
+    Only the element being decoded is held in memory, so arbitrarily large
+    documents can be processed with bounded memory. A value that doesn't
+    end within max_value_size characters, e.g. because the document is
+    malformed or truncated, is an error rather than a reason to read the
+    rest of the file.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = 1 << 20,
+                 max_value_size: int = MAX_VALUE_SIZE):
+        """
+        Initialize the stream.
+
+        Args:
+            file: Open text file positioned at the start of the document
+            chunk_size: Number of characters to read at a time
+            max_value_size: Largest value, in characters, to decode
+        """
+        self.file = file
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def iter_array(self, key: str) -> Iterator[Any]:
+        """
+        Yield the elements of the top-level array or of an array under a top-level key.
+
+        Args:
+            key: Key of the array when the document is an object
+
+        Raises:
+            ValueError: If the document doesn't contain the array
+        """
+        if self._peek() == '{':
+            self._expect('{')
+            while True:
+                if self._peek() == '}':
+                    raise ValueError(f"No '{key}' array found")
+                name = self._decode()
+                self._expect(':')
+                if name == key:
+                    break
+                self._decode()
+                if self._peek() == ',':
+                    self._expect(',')
+        self._expect('[')
+        if self._peek() == ']':
+            return
+        while True:
+            yield self._decode()
+            if self._peek() == ']':
+                return
+            self._expect(',')
+
+    def _read_more(self, size: int) -> bool:
+        """Append up to size characters to the buffer, dropping consumed input."""
+        if self.eof:
+            return False
+        chunk = self.file.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more(self.chunk_size):
+                raise ValueError("Unexpected end of JSON document")
+
+    def _expect(self, char: str) -> None:
+        """Consume the given character or fail."""
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' but found '{self.buffer[self.pos]}'")
+        self.pos += 1
+
+    def _decode(self) -> Any:
+        """Decode the next JSON value, reading more input until it is complete."""
+        self._peek()
+        while True:
+            # Grow geometrically so a huge value is re-parsed only a few times
+            pending = len(self.buffer) - self.pos
+            size = min(max(self.chunk_size, pending), self.max_value_size - pending + 1)
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if pending > self.max_value_size:
+                    raise ValueError(f"JSON value is longer than {self.max_value_size} characters "
+                                     f"or malformed: {e.msg}") from e
+                if self._read_more(size):
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and pending <= self.max_value_size and self._read_more(size):
+                continue
+            self.pos = end
+            return value
+
+def iter_habit_records(file_path: str, chunk_size: int = 1 << 20) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the raw habit records of an import file.
+
+    Accepts a top-level list of habits or an object with a 'habits' list.
+
+    Args:
+        file_path: Path to the JSON file
+        chunk_size: Number of characters to read at a time
+
+    Yields:
+        One raw habit dictionary at a time
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        yield from JsonArrayStream(f, chunk_size).iter_array('habits')
+
+def normalize_habit_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a raw habit record from any supported format to the import format.
+
+    Completions can be given as 'completions' ([{'date': ..., 'status': ...}],
+    as written by test_data_generator.py), 'check_dates' ([iso strings], as in
+    example_data/) or 'completion_epochs' (as in a habit store snapshot).
+
+    Raises:
+        ValueError: If the record is malformed
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Habit record must be an object")
+    name = record.get('name')
+    periodicity = record.get('periodicity')
+    if not isinstance(name, str) or not isinstance(periodicity, str):
+        raise ValueError("Habit record needs a 'name' and a 'periodicity'")
+
+    try:
+        if 'completion_epochs' in record:
+            epochs = [int(epoch) for epoch in record['completion_epochs']]
+        elif 'check_dates' in record:
+            epochs = [to_epoch_seconds(parse_timestamp(d)) for d in record['check_dates']]
+        else:
+            epochs = [
+                to_epoch_seconds(parse_timestamp(c['date']))
+                for c in record.get('completions', [])
+                if c.get('status', 'completed') == 'completed'
+            ]
+        if record.get('creation_date'):
+            creation_date = parse_timestamp(record['creation_date'])
+        elif epochs:
+            creation_date = from_epoch_seconds(min(epochs))
+        else:
+            creation_date = current_time()
+    except (TypeError, KeyError, AttributeError) as e:
+        raise ValueError(f"Malformed completion data: {e}") from e
+
+    return {
+        'name': name.strip(),
+        'periodicity': periodicity.lower(),
+        'creation_date': creation_date,
+        'completion_epochs': epochs
+    }
+
+def parse_timestamp(text: str) -> datetime:
+    """
+    Parse an ISO 8601 timestamp into a naive local datetime.
+
+    Timestamps with a UTC offset are converted to local wall-clock time,
+    which is how naive datetimes are stored.
+
+    Raises:
+        ValueError: If the timestamp is malformed
+    """
+    return to_naive(datetime.fromisoformat(text))
+
+def parse_completion_line(line: str) -> Tuple[int, Optional[datetime]]:
+    """
+    Parse a check-off written as 'ID' or 'ID TIMESTAMP', e.g. '3 2024-05-01T07:30:00'.
+
+    The id and timestamp may also be separated by a comma or a tab.
+
+    Returns:
+        Tuple of (habit_id, check_date or None for now)
+
+    Raises:
+        ValueError: If the line is malformed
+    """
+    fields = line.replace(',', ' ').split()
+    if not 1 <= len(fields) <= 2:
+        raise ValueError("Expected a habit id and an optional timestamp")
+    try:
+        habit_id = int(fields[0])
+    except ValueError:
+        raise ValueError(f"Invalid habit id '{fields[0]}'")
+    try:
+        check_date = parse_timestamp(fields[1]) if len(fields) == 2 else None
+    except ValueError:
+        raise ValueError(f"Invalid timestamp '{fields[1]}'")
+    return habit_id, check_date
+
+def import_habits(habit_manager, file_path: str, batch_size: int = 1000,
+                  chunk_size: int = 1 << 20) -> Dict[str, Any]:
+    """
+    Stream an import file into the habit store in batches.
+
+    Each batch is validated with HabitValidator and committed with a single
+    write, so memory use is bounded by the batch size rather than the file.
+
+    Args:
+        habit_manager: HabitManager to import into
+        file_path: Path to the JSON file
+        batch_size: Number of habit records validated and saved together
+        chunk_size: Number of characters read from the file at a time
+
+    Returns:
+        Dictionary with the number of imported records and completions, the
+        habits that were created, (habit, sorted completion epochs) pairs for
+        the completions added to habits that existed before the import, and
+        (record_index, error) pairs for skipped records
+    """
+    result = {'records': 0, 'completions': 0, 'created': [], 'completed': [], 'errors': []}
+    existing_ids = {habit.id for habit in habit_manager.habits}
+    preexisting_ids = set(existing_ids)
+    # Completions added to habits that existed before the import, by habit id
+    added: Dict[int, Tuple[Any, set]] = {}
+
+    def commit(batch: List[Dict[str, Any]], indexes: List[int]) -> None:
+        validations = HabitValidator.validate_habit_imports(batch)
+        valid = []
+        for record, index, (is_valid, error) in zip(batch, indexes, validations):
+            if is_valid:
+                valid.append(record)
+            else:
+                result['errors'].append((index, error))
+        if not valid:
+            return
+        by_key = {(habit.name.lower(), habit.periodicity): habit for habit in habit_manager.habits
+                  if habit.id in preexisting_ids}
+        for record in valid:
+            habit = by_key.get((record['name'].lower(), record['periodicity']))
+            if habit is not None:
+                epochs = added.setdefault(habit.id, (habit, set()))[1]
+                epochs.update(set(record['completion_epochs']).difference(habit.completion_epochs))
+        for habit in habit_manager.import_habits(valid):
+            if habit.id not in existing_ids:
+                existing_ids.add(habit.id)
+                result['created'].append(habit)
+        result['records'] += len(valid)
+        result['completions'] += sum(len(record['completion_epochs']) for record in valid)
+
+    batch, indexes = [], []
+    for index, raw in enumerate(iter_habit_records(file_path, chunk_size)):
+        try:
+            batch.append(normalize_habit_record(raw))
+            indexes.append(index)
+        except ValueError as e:
+            result['errors'].append((index, str(e)))
+            continue
+        if len(batch) >= batch_size:
+            commit(batch, indexes)
+            batch, indexes = [], []
+    if batch:
+        commit(batch, indexes)
+    result['completed'] = [(habit, sorted(epochs)) for habit, epochs in added.values() if epochs]
+    return result
@@ -1,24 +1,173 @@
+import atexit
+import gzip
 import logging
+import logging.handlers
 import os
 import json
+import queue
+import shutil
+import time
 from datetime import datetime
-from pythonjsonlogger import jsonlogger
+from typing import Iterable, List, Optional, Tuple
+from .log_index import INDEX_SUFFIX, LogIndex, LogIndexHandler
+from .profiling import profiled
+from .time_utils import SECONDS_PER_DAY, current_time, week_ordinal
+
+ROTATION_PERIODS = ('hourly', 'daily', 'weekly')
+
+class RotatingLogHandler(logging.handlers.RotatingFileHandler):
+    """
+    File handler that rotates by size, by time or both.
+
+    Rotated files are kept as numbered backups (habit_tracker.log.1 is the
+    most recent), optionally gzip-compressed, and only backup_count of them
+    are kept so disk use stays bounded. Time-based rotation starts a new
+    file once the current one was last written in an earlier UTC hour, day
+    or ISO week, so it also works across short-lived CLI runs.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 0, when: Optional[str] = None,
+                 backup_count: int = 5, compress: bool = False, delay: bool = True,
+                 index: Optional[LogIndex] = None):
+        """
+        Initialize the handler.
+
+        Args:
+            filename: Path of the log file
+            max_bytes: Rotate before the file would grow past this size (0 for no limit)
+            when: 'hourly', 'daily' or 'weekly' to rotate by time, or None
+            backup_count: Number of rotated files to keep
+            compress: Whether to gzip rotated files
+            index: Offset index of the file, which is completed and rotated
+                along with it
+
+        Raises:
+            ValueError: If when or backup_count is invalid
+        """
+        if when is not None and when not in ROTATION_PERIODS:
+            raise ValueError(f"Rotation period must be one of {', '.join(ROTATION_PERIODS)}")
+        if backup_count < 1:
+            raise ValueError("At least one backup must be kept when rotating logs")
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=delay)
+        self.when = when
+        self.index = index
+        if compress:
+            self.namer = lambda name: name + '.gz'
+            self.rotator = _gzip_rotator
+        self.period = None
+        if when:
+            try:
+                self.period = self._period(os.stat(filename).st_mtime)
+            except OSError:
+                self.period = self._period(time.time())
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """Check whether the record belongs in a new file."""
+        if self.when and self._period(record.created) != self.period:
+            # An empty file has nothing to rotate
+            if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+                return True
+            self.period = self._period(record.created)
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        """Rotate the file and start the current period."""
+        if self.index is not None:
+            # Backups keep complete indexes, numbered like the files
+            if self.stream:
+                self.stream.flush()
+            self.index.update(force=True)
+            for number in range(self.backupCount - 1, 0, -1):
+                source = f"{self.baseFilename}.{number}{INDEX_SUFFIX}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.baseFilename}.{number + 1}{INDEX_SUFFIX}")
+            if os.path.exists(self.index.path):
+                os.replace(self.index.path, f"{self.baseFilename}.1{INDEX_SUFFIX}")
+            self.index.indexed_end = 0
+        super().doRollover()
+        if self.when:
+            self.period = self._period(time.time())
+
+    def _period(self, timestamp: float) -> int:
+        """Get the rotation period a timestamp falls in."""
+        if self.when == 'hourly':
+            return int(timestamp // 3600)
+        day = int(timestamp // SECONDS_PER_DAY)
+        return week_ordinal(day) if self.when == 'weekly' else day
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """Compress a rotated log file into dest and remove the original."""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def _emit_batch(handler: logging.Handler, records: List[logging.LogRecord]) -> None:
+    """Write records through a file handler with one flush, or pass them on one by one."""
+    if not isinstance(handler, logging.FileHandler):
+        for record in records:
+            handler.handle(record)
+        return
+    handler.acquire()
+    try:
+        for record in records:
+            if isinstance(handler, logging.handlers.RotatingFileHandler) and handler.shouldRollover(record):
+                handler.doRollover()
+            if handler.stream is None:
+                handler.stream = handler._open()
+            handler.stream.write(handler.format(record) + handler.terminator)
+        if handler.stream is not None:
+            handler.stream.flush()
+    except Exception:
+        handler.handleError(records[-1])
+    finally:
+        handler.release()
+
+class _BatchQueueListener(logging.handlers.QueueListener):
+    """Queue listener that also accepts lists of records, written as one batch."""
+
+    def handle(self, record) -> None:
+        """Pass a record or a batch of records to the handlers."""
+        if not isinstance(record, list):
+            super().handle(record)
+            return
+        for handler in self.handlers:
+            _emit_batch(handler, record)
+
+def default_log_path() -> str:
+    """Get the path of the log file in the package's logs directory."""
+    # Get the directory where this file is located
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    # Go up one level to the habit_tracker package directory
+    package_dir = os.path.dirname(current_dir)
+    # Set the full path to the log file
+    return os.path.join(package_dir, 'logs', 'habit_tracker.log')
 
 class HabitLogger:
     """Logs habit-related actions."""
     
-    def __init__(self, log_file: str = None):
-        """Initialize the logger."""
+    def __init__(self, log_file: str = None, async_mode: bool = False, max_bytes: int = 0,
+                 when: Optional[str] = None, backup_count: int = 5, compress: bool = False,
+                 index: bool = False):
+        """
+        Initialize the logger.
+
+        Args:
+            log_file: Path of the log file (defaults to logs/habit_tracker.log in the package)
+            async_mode: Hand records to a background thread through a queue, so
+                logging never waits for the file
+            max_bytes: Rotate the file before it grows past this size (0 for no limit)
+            when: 'hourly', 'daily' or 'weekly' to also rotate by time, or None
+            backup_count: Number of rotated files to keep
+            compress: Whether to gzip rotated files
+            index: Whether to keep a sparse offset index next to the log for queries
+        """
+        from pythonjsonlogger import jsonlogger
+
         if log_file is None:
-            # Get the directory where this file is located
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            # Go up one level to the habit_tracker package directory
-            package_dir = os.path.dirname(current_dir)
-            # Create logs directory if it doesn't exist
-            log_dir = os.path.join(package_dir, 'logs')
-            os.makedirs(log_dir, exist_ok=True)
-            # Set the full path to the log file
-            log_file = os.path.join(log_dir, 'habit_tracker.log')
+            log_file = default_log_path()
+        # Create logs directory if it doesn't exist
+        if os.path.dirname(log_file):
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
 
         # Create a logger with a unique name
         self.logger = logging.getLogger('habit_tracker')
@@ -33,38 +182,117 @@ class HabitLogger:
             timestamp=True
         )
         
-        # Create file handler
-        file_handler = logging.FileHandler(log_file)
+        # Create file handler, opening the file only when the first record is written
+        log_index = LogIndex(log_file) if index else None
+        if max_bytes or when:
+            file_handler = RotatingLogHandler(log_file, max_bytes=max_bytes, when=when,
+                                              backup_count=backup_count, compress=compress,
+                                              index=log_index)
+        else:
+            file_handler = logging.FileHandler(log_file, delay=True)
         file_handler.setFormatter(formatter)
-        
-        # Add handler to logger
-        self.logger.addHandler(file_handler)
+        self.file_handler = file_handler
+        # The index handler runs after the file handler has written each record
+        handlers = [file_handler]
+        if log_index is not None:
+            handlers.append(LogIndexHandler(log_index))
+        self.handlers = handlers
+
+        # In async mode the logger only enqueues records; a listener thread
+        # formats, writes and rotates them
+        self.listener = None
+        if async_mode:
+            records = queue.SimpleQueue()
+            self.listener = _BatchQueueListener(records, *handlers)
+            self.listener.start()
+            self.logger.addHandler(logging.handlers.QueueHandler(records))
+            atexit.register(self.close)
+        else:
+            # Add handlers to logger
+            for handler in handlers:
+                self.logger.addHandler(handler)
     
-    def log_habit_creation(self, habit_id: int, name: str, periodicity: str):
-        """Log habit creation."""
-        self.logger.info(
-            'Habit created',
-            extra={
-                'event': 'creation',
-                'habit_id': str(habit_id),
-                'habit_name': name,
-                'periodicity': periodicity,
-                'timestamp': datetime.now().isoformat()
-            }
-        )
+    def close(self) -> None:
+        """Write out any queued records and close the log file."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            atexit.unregister(self.close)
+        self.file_handler.close()
     
-    def log_habit_completion(self, habit_id: int, name: str):
-        """Log habit completion."""
+    @profiled('logging')
+    def log_habit_creation(self, habit_id: int, name: str, periodicity: str,
+                           creation_date: Optional[datetime] = None,
+                           completion_epochs: Optional[Iterable[int]] = None):
+        """
+        Log habit creation.
+
+        Args:
+            habit_id: ID of the new habit
+            name: Name of the habit
+            periodicity: 'daily' or 'weekly'
+            creation_date: When the habit was created (defaults to now)
+            completion_epochs: History the habit was created with, e.g. by an import
+        """
+        extra = {
+            'event': 'creation',
+            'habit_id': str(habit_id),
+            'habit_name': name,
+            'periodicity': periodicity,
+            'creation_date': (creation_date or current_time()).isoformat(),
+            'timestamp': datetime.now().isoformat()
+        }
+        if completion_epochs:
+            extra['completion_epochs'] = list(completion_epochs)
+        self.logger.info('Habit created', extra=extra)
+    
+    @profiled('logging')
+    def log_habit_completion(self, habit_id: int, name: str, check_date: Optional[datetime] = None):
+        """Log habit completion at check_date (defaults to now)."""
         self.logger.info(
             'Habit completed',
             extra={
                 'event': 'completion',
                 'habit_id': str(habit_id),
                 'habit_name': name,
+                'check_date': (check_date or current_time()).isoformat(),
                 'timestamp': datetime.now().isoformat()
             }
         )
     
+    @profiled('logging')
+    def log_habit_completions(self, completions: Iterable[Tuple[int, str, datetime]]):
+        """
+        Log many habit completions with a single write to the log file.
+
+        Args:
+            completions: (habit_id, name, check_date) tuples
+        """
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        timestamp = datetime.now().isoformat()
+        records = [
+            self.logger.makeRecord(
+                self.logger.name, logging.INFO, '(unknown file)', 0, 'Habit completed', None, None,
+                extra={
+                    'event': 'completion',
+                    'habit_id': str(habit_id),
+                    'habit_name': name,
+                    'check_date': check_date.isoformat(),
+                    'timestamp': timestamp
+                }
+            )
+            for habit_id, name, check_date in completions
+        ]
+        if not records:
+            return
+        if self.listener is not None:
+            self.listener.queue.put(records)
+        else:
+            for handler in self.handlers:
+                _emit_batch(handler, records)
+    
+    @profiled('logging')
     def log_habit_deletion(self, habit_id: int, name: str):
         """Log habit deletion."""
         self.logger.info(
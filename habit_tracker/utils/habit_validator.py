@@ -1,10 +1,16 @@
-from datetime import datetime, timedelta
-from typing import Optional
+from bisect import bisect_left
+from datetime import datetime
+from typing import List, Optional
+from .profiling import profiled
+from .time_utils import (
+    SECONDS_PER_DAY, current_time, period_bounds, period_ordinal, to_epoch_seconds, today_ordinal
+)
 
 class HabitValidator:
     """Validates habit creation and completion."""
     
     @staticmethod
+    @profiled('validation')
     def validate_habit_creation(name: str, periodicity: str) -> tuple[bool, Optional[str]]:
         """
         Validate habit creation parameters.
@@ -28,6 +34,7 @@ class HabitValidator:
         return True, None
 
     @staticmethod
+    @profiled('validation')
     def validate_habit_completion(last_check_date: Optional[datetime], periodicity: str) -> tuple[bool, Optional[str]]:
         """
         Validate if a habit can be checked off.
@@ -42,14 +49,73 @@ class HabitValidator:
         if not last_check_date:
             return True, None
             
-        now = datetime.now()
-        if periodicity == 'daily':
-            if last_check_date.date() == now.date():
+        # Compare day or ISO week ordinals of the last check and of now
+        if period_ordinal(to_epoch_seconds(last_check_date), periodicity) == today_ordinal(periodicity):
+            if periodicity == 'daily':
                 return False, "Habit already checked off today"
-        else:  # weekly
-            week_start = now - timedelta(days=now.weekday())
-            last_week_start = last_check_date - timedelta(days=last_check_date.weekday())
-            if week_start == last_week_start:
-                return False, "Habit already checked off this week"
+            return False, "Habit already checked off this week"
                 
-        return True, None
\ No newline at end of file
+        return True, None
+
+    @staticmethod
+    @profiled('validation')
+    def validate_habit_completions(records: List[dict]) -> List[tuple[bool, Optional[str]]]:
+        """
+        Validate a batch of completions, which may be backfilled.
+
+        A completion is rejected if it is in the future, or if its day or
+        ISO week already has a completion, either in the habit's history or
+        earlier in the batch.
+
+        Args:
+            records: Dicts with 'habit_id', 'periodicity', 'completion_epochs'
+                (the habit's sorted history) and 'check_epoch', all in seconds
+                since the epoch
+
+        Returns:
+            List of (is_valid, error_message) tuples, one per record
+        """
+        now = to_epoch_seconds(current_time())
+        today = {periodicity: today_ordinal(periodicity) for periodicity in ('daily', 'weekly')}
+        accepted = set()
+        results = []
+        for record in records:
+            periodicity = record['periodicity']
+            period = period_ordinal(record['check_epoch'], periodicity)
+            start, end = period_bounds(period, periodicity)
+            epochs = record['completion_epochs']
+            if record['check_epoch'] > now:
+                results.append((False, "Completion time cannot be in the future"))
+            elif ((record['habit_id'], period) in accepted
+                  or bisect_left(epochs, start) != bisect_left(epochs, end)):
+                if period == today[periodicity]:
+                    error = "today" if periodicity == 'daily' else "this week"
+                else:
+                    error = "on that day" if periodicity == 'daily' else "in that week"
+                results.append((False, f"Habit already checked off {error}"))
+            else:
+                accepted.add((record['habit_id'], period))
+                results.append((True, None))
+        return results
+
+    @staticmethod
+    @profiled('validation')
+    def validate_habit_imports(records: List[dict]) -> List[tuple[bool, Optional[str]]]:
+        """
+        Validate a batch of imported habit records.
+
+        Args:
+            records: Dicts with 'name', 'periodicity' and 'completion_epochs'
+                (seconds since the epoch)
+
+        Returns:
+            List of (is_valid, error_message) tuples, one per record
+        """
+        latest = (today_ordinal() + 1) * SECONDS_PER_DAY
+        results = []
+        for record in records:
+            result = HabitValidator.validate_habit_creation(record['name'], record['periodicity'])
+            if result[0] and record['completion_epochs'] and max(record['completion_epochs']) >= latest:
+                result = (False, "Completion dates cannot be after today")
+            results.append(result)
+        return results
@@ -0,0 +1,254 @@
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+INDEX_SUFFIX = '.idx'
+DEFAULT_BLOCK_BYTES = 64 << 10
+
+def find_log_files(log_file: str) -> List[str]:
+    """
+    Find a log file and its rotated backups, oldest first.
+
+    Backups are named <log_file>.N, or <log_file>.N.gz when compressed, with
+    higher numbers holding older records.
+    """
+    directory = os.path.dirname(log_file) or '.'
+    pattern = re.compile(re.escape(os.path.basename(log_file)) + r'\.(\d+)(\.gz)?$')
+    backups = []
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match:
+                backups.append((int(match.group(1)), os.path.join(directory, name)))
+    files = [path for _, path in sorted(backups, reverse=True)]
+    if os.path.exists(log_file):
+        files.append(log_file)
+    return files
+
+def index_path(log_path: str) -> str:
+    """Get the path of the index of a log file, compressed or not."""
+    if log_path.endswith('.gz'):
+        log_path = log_path[:-3]
+    return log_path + INDEX_SUFFIX
+
+def parse_log_time(value: str) -> datetime:
+    """Convert a logged time to a naive local wall-clock time."""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        # Older records only carry the UTC time the record was written at
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+def event_time(record: Dict[str, Any]) -> datetime:
+    """Get when the event of a log record happened, rather than when it was logged."""
+    return parse_log_time(record.get('check_date') or record.get('creation_date') or record['timestamp'])
+
+class LogIndex:
+    """
+    Sparse index mapping blocks of a JSON log file to their contents.
+
+    Each line of the index describes one block of about block_bytes of
+    complete log lines: its byte range, the earliest and latest event time
+    in it, and the habit ids and event types it contains. Queries only read
+    the blocks that can match, plus the tail that isn't indexed yet.
+
+    The index is extended whenever the unindexed tail reaches block_bytes,
+    so keeping it current costs one stat per record and one read of each
+    block. A log file that shrank was replaced, and its index is restarted.
+    """
+
+    def __init__(self, log_path: str, block_bytes: int = DEFAULT_BLOCK_BYTES):
+        """
+        Initialize the index of a log file.
+
+        Args:
+            log_path: Path of the log file
+            block_bytes: Approximate number of log bytes per index entry
+        """
+        self.log_path = log_path
+        self.path = index_path(log_path)
+        self.block_bytes = block_bytes
+        self.indexed_end = self._read_end()
+
+    def update(self, force: bool = False) -> None:
+        """
+        Index the complete lines appended since the last update.
+
+        Args:
+            force: Index the tail even if it is shorter than a block
+        """
+        try:
+            size = os.path.getsize(self.log_path)
+        except OSError:
+            return
+        if size < self.indexed_end:
+            self.reset()
+        if size - self.indexed_end < (1 if force else self.block_bytes):
+            return
+        # Another process may have indexed part of the tail already
+        self.indexed_end = max(self.indexed_end, self._read_end())
+        with open(self.log_path, 'rb') as f:
+            f.seek(self.indexed_end)
+            data = f.read(size - self.indexed_end)
+        entries = _index_blocks(data, self.indexed_end, self.block_bytes)
+        if entries:
+            with open(self.path, 'a') as f:
+                f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+            self.indexed_end = entries[-1]['end']
+
+    def reset(self) -> None:
+        """Forget the index, e.g. after the log file was rotated away."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.indexed_end = 0
+
+    def _read_end(self) -> int:
+        """Read the end offset of the last indexed block."""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(max(os.fstat(f.fileno()).st_size - 4096, 0))
+                lines = f.read().splitlines()
+            return json.loads(lines[-1])['end'] if lines else 0
+        except (OSError, ValueError, KeyError, IndexError):
+            return 0
+
+class LogIndexHandler(logging.Handler):
+    """
+    Keeps a LogIndex current as records are written.
+
+    It must be attached after the handler that writes the log file, so that
+    each record is on disk when the index is updated.
+    """
+
+    def __init__(self, index: LogIndex):
+        super().__init__()
+        self.index = index
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Extend the index if a full block was appended."""
+        try:
+            self.index.update()
+        except Exception:
+            self.handleError(record)
+
+def load_index(log_path: str) -> List[Dict[str, Any]]:
+    """Read the index entries of a log file, or an empty list without an index."""
+    try:
+        with open(index_path(log_path)) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return []
+
+def query_log(log_file: str,
+              habit_id: Optional[int] = None,
+              since: Optional[datetime] = None,
+              until: Optional[datetime] = None,
+              event: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the records of a log and its rotated backups that match a query.
+
+    Only the indexed blocks that can contain matches are read, plus the
+    unindexed tail of each file. Compressed backups are read forward to the
+    blocks, without parsing the records in between.
+
+    Args:
+        log_file: Path of the current log file
+        habit_id: Only records of this habit
+        since: Only events at or after this time
+        until: Only events before this time
+        event: Only records of this event type ('creation', 'completion' or 'deletion')
+
+    Returns:
+        Iterator over the matching records, oldest file first
+    """
+    for path in find_log_files(log_file):
+        entries = load_index(path)
+        segments = [
+            (entry['start'], entry['end']) for entry in entries
+            if (habit_id is None or habit_id in entry['ids'])
+            and (event is None or event in entry['events'])
+            and (since is None or parse_log_time(entry['last']) >= since)
+            and (until is None or parse_log_time(entry['first']) < until)
+        ]
+        indexed_end = max((entry['end'] for entry in entries), default=0)
+        segments.append((indexed_end, None))
+        for record in _read_segments(path, _merge(segments)):
+            try:
+                if habit_id is not None and int(record['habit_id']) != habit_id:
+                    continue
+                if event is not None and record.get('event') != event:
+                    continue
+                if since is not None or until is not None:
+                    moment = event_time(record)
+                    if (since is not None and moment < since) or (until is not None and moment >= until):
+                        continue
+            except (ValueError, KeyError, TypeError):
+                continue
+            yield record
+
+def _index_blocks(data: bytes, offset: int, block_bytes: int) -> List[Dict[str, Any]]:
+    """Build the index entries of the complete lines in data, which starts at offset."""
+    entries = []
+    entry = None
+    position = offset
+    decode = json.JSONDecoder().decode
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b'\n'):
+            break
+        if entry is None:
+            entry = {'start': position, 'end': position, 'first': None, 'last': None,
+                     'ids': set(), 'events': set()}
+        position += len(line)
+        entry['end'] = position
+        try:
+            record = decode(line.decode('utf-8', errors='replace'))
+            moment = event_time(record).isoformat()
+            entry['ids'].add(int(record['habit_id']))
+            entry['events'].add(record['event'])
+            entry['first'] = min(entry['first'] or moment, moment)
+            entry['last'] = max(entry['last'] or moment, moment)
+        except (ValueError, KeyError, TypeError):
+            pass
+        if position - entry['start'] >= block_bytes:
+            entries.append(entry)
+            entry = None
+    if entry is not None:
+        entries.append(entry)
+    for entry in entries:
+        entry['ids'] = sorted(entry['ids'])
+        entry['events'] = sorted(entry['events'])
+        # Blocks without any valid record never match a time range
+        entry['first'] = entry['first'] or datetime.max.isoformat()
+        entry['last'] = entry['last'] or datetime.min.isoformat()
+    return entries
+
+def _merge(segments: List[Tuple[int, Optional[int]]]) -> List[Tuple[int, Optional[int]]]:
+    """Merge adjacent and overlapping byte ranges; an end of None means end of file."""
+    merged: List[Tuple[int, Optional[int]]] = []
+    for start, end in sorted(segments, key=lambda s: s[0]):
+        if merged and (merged[-1][1] is None or start <= merged[-1][1]):
+            last_start, last_end = merged[-1]
+            merged[-1] = (last_start, None if end is None or last_end is None else max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def _read_segments(path: str, segments: List[Tuple[int, Optional[int]]]) -> Iterator[Dict[str, Any]]:
+    """Parse the complete lines in the byte ranges of a log file."""
+    opener = gzip.open if path.endswith('.gz') else open
+    decode = json.JSONDecoder().decode
+    with opener(path, 'rb') as f:
+        for start, end in segments:
+            f.seek(start)
+            data = f.read() if end is None else f.read(end - start)
+            for line in data.splitlines(keepends=True):
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    yield decode(line.decode('utf-8', errors='replace'))
+                except ValueError:
+                    continue
@@ -0,0 +1,230 @@
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from ..models.habit import Habit
+from ..storage.storage_factory import create_storage, parse_storage_path
+from .log_index import find_log_files, parse_log_time
+from .time_utils import to_epoch_seconds
+
+def replay_logs(log_file: str,
+                storage_path: str,
+                workers: Optional[int] = None,
+                chunk_bytes: int = 4 << 20,
+                checkpoint_every: int = 500000,
+                resume: bool = True) -> Dict[str, int]:
+    """
+    Rebuild a habit store from the activity log written by HabitLogger.
+
+    The log and its rotated backups are split into chunks that are parsed
+    in parallel; plain files are split at line boundaries, compressed ones
+    are parsed as a whole. Events are then applied in log order. Every
+    checkpoint_every events and after every file, the state is written to
+    <store>.rebuild.json, so an interrupted rebuild resumes where it
+    stopped. Files are recognized by their first line, which survives
+    rotation and compression.
+
+    Args:
+        log_file: Path of the current log file
+        storage_path: Habit store to write, replacing its contents
+        workers: Number of parsing processes (defaults to the number of CPUs);
+            1 parses in this process
+        chunk_bytes: Size of the chunks plain files are split into
+        checkpoint_every: Number of events between checkpoints
+        resume: Whether to continue from an existing checkpoint
+
+    Returns:
+        Dictionary with the number of log files, replayed events, rebuilt
+        habits and completions, events for unknown habits and invalid lines
+    """
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = parse_storage_path(storage_path)[1] + '.rebuild.json'
+    state = _load_checkpoint(checkpoint_path) if resume else None
+    if state is None:
+        state = {'files': {}, 'next_id': 1, 'events': 0, 'skipped': 0, 'invalid': 0, 'habits': []}
+    habits = {data['id']: Habit.from_dict(data) for data in state['habits']}
+    pending: Dict[int, List[int]] = {}
+
+    files = find_log_files(log_file)
+    chunks = []
+    for path in files:
+        fingerprint = _fingerprint(path)
+        if fingerprint is None:
+            continue
+        done = state['files'].get(fingerprint, 0)
+        if done < 0:
+            continue
+        chunks.extend((path, fingerprint, start, end) for start, end in _split(path, done, chunk_bytes))
+
+    def flush() -> None:
+        """Merge the buffered completions into their habits."""
+        for habit_id, epochs in pending.items():
+            habits[habit_id].add_completions(epochs)
+        pending.clear()
+
+    def checkpoint() -> None:
+        """Write the replay state so far."""
+        flush()
+        state['habits'] = [habit.to_dict() for habit in habits.values()]
+        _write_json(checkpoint_path, state)
+
+    since_checkpoint = 0
+    for index, (events, consumed) in enumerate(_parse_all(chunks, workers)):
+        path, fingerprint, start, end = chunks[index]
+        for event in events:
+            since_checkpoint += 1
+            kind, habit_id = event[0], event[1]
+            state['next_id'] = max(state['next_id'], habit_id + 1)
+            if kind == 'creation':
+                pending.pop(habit_id, None)
+                habits[habit_id] = Habit(habit_id, event[2], event[3], creation_date=event[4])
+                if event[5]:
+                    pending[habit_id] = list(event[5])
+            elif kind == 'completion':
+                if habit_id in habits:
+                    pending.setdefault(habit_id, []).append(event[2])
+                else:
+                    state['skipped'] += 1
+            elif habits.pop(habit_id, None) is None:
+                state['skipped'] += 1
+            else:
+                pending.pop(habit_id, None)
+        state['events'] += len(events)
+        state['invalid'] += consumed[1]
+        last_chunk = index + 1 == len(chunks) or chunks[index + 1][1] != fingerprint
+        # The current log may still grow, so only its position is recorded
+        if last_chunk and path != log_file:
+            state['files'][fingerprint] = -1
+        elif consumed[0] is not None:
+            state['files'][fingerprint] = consumed[0]
+        if last_chunk or since_checkpoint >= checkpoint_every:
+            checkpoint()
+            since_checkpoint = 0
+
+    flush()
+    storage = create_storage(storage_path)
+    storage.next_id = max(storage.next_id, state['next_id'])
+    storage.save(list(habits.values()))
+    storage.close()
+    # Sidecars derived from the old store would describe different data
+    store_file = parse_storage_path(storage_path)[1]
+    for suffix in ('.rollups.json', '.analytics.json', '.rebuild.json'):
+        if os.path.exists(store_file + suffix):
+            os.remove(store_file + suffix)
+    return {
+        'files': len(files),
+        'events': state['events'],
+        'habits': len(habits),
+        'completions': sum(len(habit.completion_epochs) for habit in habits.values()),
+        'skipped': state['skipped'],
+        'invalid': state['invalid']
+    }
+
+def _parse_all(chunks: List[Tuple], workers: int) -> Iterator[Tuple[List[tuple], Tuple[Optional[int], int]]]:
+    """Parse chunks in order, across processes when there are several workers."""
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            yield from executor.map(_parse_chunk, *zip(*[(c[0], c[2], c[3]) for c in chunks]))
+    else:
+        for path, _, start, end in chunks:
+            yield _parse_chunk(path, start, end)
+
+def _split(path: str, start: int, chunk_bytes: int) -> List[Tuple[int, Optional[int]]]:
+    """Split the unparsed part of a log file into byte ranges."""
+    if path.endswith('.gz'):
+        return [(start, None)]
+    size = os.path.getsize(path)
+    if start >= size:
+        return []
+    return [(offset, min(offset + chunk_bytes, size)) for offset in range(start, size, chunk_bytes)]
+
+def _parse_chunk(path: str, start: int, end: Optional[int]) -> Tuple[List[tuple], Tuple[Optional[int], int]]:
+    """
+    Parse the lines starting in a byte range of a log file.
+
+    Only complete lines are parsed, so a line still being written is left
+    for a later run.
+
+    Returns:
+        Tuple of (events, (offset after the last complete line or None if
+        the range holds none, number of invalid lines)); events are
+        ('creation', id, name, periodicity, creation date, completion
+        epochs), ('completion', id, epoch) or ('deletion', id)
+    """
+    if end is None:
+        with gzip.open(path, 'rb') as f:
+            f.seek(start)
+            begin = start
+            data = f.read()
+    else:
+        with open(path, 'rb') as f:
+            if start:
+                # The line overlapping the start belongs to the previous chunk
+                f.seek(start - 1)
+                if f.read(1) != b'\n':
+                    f.readline()
+            begin = f.tell()
+            data = f.read(max(end - begin, 0))
+            if data and not data.endswith(b'\n'):
+                data += f.readline()
+    complete = data.rfind(b'\n') + 1
+
+    events = []
+    invalid = 0
+    decode = json.JSONDecoder().decode
+    for line in data[:complete].decode('utf-8', errors='replace').splitlines():
+        if not line.strip():
+            continue
+        try:
+            events.append(_parse_event(decode(line)))
+        except (ValueError, KeyError, TypeError):
+            invalid += 1
+    return events, (begin + complete if complete else None, invalid)
+
+def _parse_event(record: Dict[str, Any]) -> tuple:
+    """Convert a log record into an event tuple."""
+    kind = record['event']
+    habit_id = int(record['habit_id'])
+    if kind == 'creation':
+        created = parse_log_time(record.get('creation_date') or record['timestamp'])
+        periodicity = record['periodicity'].lower()
+        if periodicity not in ('daily', 'weekly'):
+            raise ValueError(f"Invalid periodicity: {periodicity}")
+        return ('creation', habit_id, record['habit_name'], periodicity,
+                created, [int(epoch) for epoch in record.get('completion_epochs', ())])
+    if kind == 'completion':
+        check_date = parse_log_time(record.get('check_date') or record['timestamp'])
+        return ('completion', habit_id, to_epoch_seconds(check_date))
+    if kind == 'deletion':
+        return ('deletion', habit_id)
+    raise ValueError(f"Unknown event: {kind}")
+
+def _fingerprint(path: str) -> Optional[str]:
+    """Identify a log file by its first line, or None if it has no complete line."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        first_line = f.readline()
+    if not first_line.endswith(b'\n'):
+        return None
+    return hashlib.sha1(first_line).hexdigest()
+
+def _load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """Read a replay checkpoint, ignoring a missing or corrupt file."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_json(path: str, data: Any) -> None:
+    """Write a JSON file atomically."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        # dumps uses the C encoder, unlike dump
+        f.write(json.dumps(data))
+    os.replace(temp_path, path)
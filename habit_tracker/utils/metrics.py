@@ -0,0 +1,389 @@
+import functools
+import glob
+import os
+import re
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Registry recording the operations of this process, or None
+_registry = None
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+OPERATIONS = 'habit_tracker_operations_total'
+ERRORS = 'habit_tracker_operation_errors_total'
+DURATION = 'habit_tracker_operation_duration_seconds'
+COMPLETIONS = 'habit_tracker_completions_total'
+
+# Help texts of the counters that aren't tied to an operation
+COUNTERS = {
+    COMPLETIONS: 'Habit completions checked off, counting each completion of a batch.',
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+class _Operation:
+    """Error count and latency histogram of one operation."""
+
+    __slots__ = ('errors', 'seconds', 'buckets')
+
+    def __init__(self, buckets: int):
+        self.errors = 0
+        self.seconds = 0.0
+        # Calls per bucket, not cumulative; the last bucket is +Inf. Their
+        # sum is the call count, which saves keeping a separate counter.
+        self.buckets = [0] * buckets
+
+class MetricsRegistry:
+    """
+    Collects operation metrics and renders them in Prometheus text format.
+
+    Every operation gets a call counter, an error counter and a latency
+    histogram, labelled with the operation name. The counters in COUNTERS
+    count things operations do, e.g. completions of a batch check-off. Gauges
+    are read when the metrics are rendered, so they cost nothing between
+    scrapes.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize the registry.
+
+        Args:
+            buckets: Upper bounds in seconds of the latency histogram buckets
+
+        Raises:
+            ValueError: If the bounds are not increasing
+        """
+        if not buckets or any(low >= high for low, high in zip(buckets, buckets[1:])):
+            raise ValueError("Histogram bucket bounds must be increasing")
+        self.bounds = tuple(float(bound) for bound in buckets)
+        self.operations: Dict[str, _Operation] = {}
+        self.counters: Dict[str, int] = {}
+        # name -> (help text, function reading the value or returning None)
+        self.gauges: Dict[str, Tuple[str, Callable[[], Optional[float]]]] = {}
+        # Gauge values read from an earlier textfile, used while a gauge can't be read
+        self.previous_gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, operation: str, seconds: float) -> None:
+        """Count a call of an operation that took the given time."""
+        series = self.operations.get(operation)
+        if series is None:
+            series = self._add_operation(operation)
+        # No lock: taking one would cost more than the rest of the
+        # observation. Concurrent observations may rarely lose an increment,
+        # and a scrape from the metrics server thread may see the sum and the
+        # buckets one observation apart; both are accepted.
+        series.seconds += seconds
+        series.buckets[bisect_left(self.bounds, seconds)] += 1
+
+    def count_error(self, operation: str) -> None:
+        """Count a call of an operation that raised an exception."""
+        series = self.operations.get(operation)
+        if series is None:
+            series = self._add_operation(operation)
+        series.errors += 1
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Add to one of the counters in COUNTERS.
+
+        Args:
+            name: Counter name, e.g. COMPLETIONS
+            amount: Number of things counted
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_gauge(self, name: str, help_text: str, read: Callable[[], Optional[float]]) -> None:
+        """
+        Register a gauge that is read whenever the metrics are rendered.
+
+        Args:
+            name: Metric name, e.g. 'habit_tracker_habits'
+            help_text: Description shown in the HELP line
+            read: Returns the current value, or None if it is not known
+        """
+        self.gauges[name] = (help_text, read)
+
+    def render(self) -> str:
+        """Format all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            operations = sorted(
+                (name, sum(series.buckets), series.errors, series.seconds, list(series.buckets))
+                for name, series in self.operations.items()
+            )
+            counters = sorted(self.counters.items())
+        lines = [f"# HELP {OPERATIONS} Operations performed, by operation.",
+                 f"# TYPE {OPERATIONS} counter"]
+        lines.extend(f'{OPERATIONS}{{operation="{name}"}} {count}' for name, count, *_ in operations)
+        lines.append(f"# HELP {ERRORS} Operations that raised an exception, by operation.")
+        lines.append(f"# TYPE {ERRORS} counter")
+        lines.extend(f'{ERRORS}{{operation="{name}"}} {errors}' for name, _, errors, *_ in operations)
+        lines.append(f"# HELP {DURATION} Wall time of operations, by operation.")
+        lines.append(f"# TYPE {DURATION} histogram")
+        for name, count, _, seconds, buckets in operations:
+            cumulative = 0
+            for bound, calls in zip(self.bounds + (float('inf'),), buckets):
+                cumulative += calls
+                lines.append(f'{DURATION}_bucket{{operation="{name}",le="{_format_bound(bound)}"}} '
+                             f'{cumulative}')
+            lines.append(f'{DURATION}_sum{{operation="{name}"}} {seconds!r}')
+            lines.append(f'{DURATION}_count{{operation="{name}"}} {count}')
+        for name, value in counters:
+            lines.append(f"# HELP {name} {COUNTERS[name]}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        for name, (help_text, read) in sorted(self.gauges.items()):
+            value = read()
+            if value is None:
+                value = self.previous_gauges.get(name)
+            if value is None:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value!r}")
+        return '\n'.join(lines) + '\n'
+
+    def merge(self, text: str) -> None:
+        """
+        Add the counters and histograms of an earlier exposition to this registry.
+
+        Gauges of the earlier exposition are kept for gauges this registry
+        can't read. Calls are counted from the histogram buckets, so calls
+        recorded with other bucket bounds are dropped.
+
+        Args:
+            text: Metrics in Prometheus text format, e.g. from write_textfile()
+        """
+        bucket_index = {_format_bound(bound): index
+                        for index, bound in enumerate(self.bounds + (float('inf'),))}
+        # Cumulative bucket counts per operation, as in the exposition
+        cumulative: Dict[str, List[int]] = {}
+        for line in text.splitlines():
+            match = _SAMPLE.match(line)
+            if not match:
+                continue
+            name, labels = match.group(1), dict(_LABEL.findall(match.group(2) or ''))
+            try:
+                value = float(match.group(3))
+            except ValueError:
+                continue
+            if name in self.gauges:
+                self.previous_gauges[name] = value
+                continue
+            if name in COUNTERS:
+                self.count(name, int(value))
+                continue
+            operation = labels.get('operation')
+            if operation is None:
+                continue
+            series = self.operations.get(operation) or self._add_operation(operation)
+            with self._lock:
+                if name == ERRORS:
+                    series.errors += int(value)
+                elif name == DURATION + '_sum':
+                    series.seconds += value
+                elif name == DURATION + '_bucket' and labels.get('le') in bucket_index:
+                    counts = cumulative.setdefault(operation, [0] * len(bucket_index))
+                    counts[bucket_index[labels['le']]] = int(value)
+        with self._lock:
+            for operation, counts in cumulative.items():
+                buckets = self.operations[operation].buckets
+                for index, count in enumerate(counts):
+                    buckets[index] += count - (counts[index - 1] if index else 0)
+
+    def write_textfile(self, path: str) -> None:
+        """
+        Add this run's metrics to a file for the node_exporter textfile collector.
+
+        Counters and histograms accumulate across the runs writing the file.
+        The file is replaced atomically, and concurrent runs take turns.
+
+        Args:
+            path: File to write, e.g. /var/lib/node_exporter/habit_tracker.prom
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + '.lock', 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            merged = MetricsRegistry(self.bounds)
+            merged.gauges = self.gauges
+            try:
+                with open(path) as f:
+                    merged.merge(f.read())
+            except FileNotFoundError:
+                pass
+            merged.merge(self.render())
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w') as f:
+                f.write(merged.render())
+            os.replace(temp_path, path)
+
+    def _add_operation(self, operation: str) -> _Operation:
+        """Create the series of an operation seen for the first time."""
+        with self._lock:
+            return self.operations.setdefault(operation, _Operation(len(self.bounds) + 1))
+
+def _format_bound(bound: float) -> str:
+    """Format a bucket bound as Prometheus clients do."""
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+def enable(registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+    """
+    Start recording the operations of this process.
+
+    Args:
+        registry: Registry to record into (defaults to a new one)
+
+    Returns:
+        The registry being recorded into
+
+    Raises:
+        ValueError: If metrics are already being recorded
+    """
+    global _registry
+    if _registry is not None:
+        raise ValueError("Metrics are already being recorded")
+    _registry = registry or MetricsRegistry()
+    return _registry
+
+def disable() -> None:
+    """Stop recording operations."""
+    global _registry
+    _registry = None
+
+def observed(operation: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator counting and timing every call of a function as an operation.
+
+    Without a registry enabled the only cost is one global lookup per call.
+    """
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            registry = _registry
+            if registry is None:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                registry.count_error(operation)
+                raise
+            finally:
+                registry.observe(operation, perf_counter() - start)
+        return wrapper
+    return decorate
+
+def count(name: str, amount: int = 1) -> None:
+    """Add to one of the counters in COUNTERS, if metrics are being recorded."""
+    registry = _registry
+    if registry is not None:
+        registry.count(name, amount)
+
+def files_bytes(path: str) -> int:
+    """
+    Get the disk use of a file and of the files named after it.
+
+    This covers what is kept next to a store or a log, e.g. journals,
+    SQLite WAL files, indexes and rotated backups.
+
+    Args:
+        path: Path of the main file
+
+    Returns:
+        Total size in bytes, 0 if none of the files exist
+    """
+    total = 0
+    for name in glob.glob(glob.escape(path) + '*'):
+        try:
+            total += os.path.getsize(name)
+        except OSError:
+            # Removed while we were looking, e.g. by a log rotation
+            pass
+    return total
+
+@contextmanager
+def textfile_session(path: str) -> Iterator[MetricsRegistry]:
+    """
+    Record the operations of a block and add them to a textfile when it ends.
+
+    Inside a block that is already recording, this records into the same
+    registry and leaves writing to the outer block.
+
+    Args:
+        path: File for the node_exporter textfile collector
+    """
+    if _registry is not None:
+        yield _registry
+        return
+    registry = enable()
+    try:
+        yield registry
+    finally:
+        disable()
+        registry.write_textfile(path)
+
+class MetricsServer:
+    """Serves the metrics of a registry over HTTP at /metrics, from a background thread."""
+
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = '127.0.0.1'):
+        """
+        Bind the HTTP server.
+
+        Args:
+            registry: Registry whose metrics are served
+            port: Port to listen on (0 picks a free one)
+            host: Address to listen on; only local clients can connect by default
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes every few seconds would flood the daemon's output
+                pass
+
+        self.registry = registry
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.host, self.port = self.httpd.server_address[:2]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='metrics', daemon=True)
+
+    def start(self) -> None:
+        """Start answering requests."""
+        self.thread.start()
+
+    def close(self) -> None:
+        """Stop answering requests and release the port."""
+        if self.thread.is_alive():
+            self.httpd.shutdown()
+            self.thread.join()
+        self.httpd.server_close()
@@ -0,0 +1,185 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Profiler collecting the spans of the running command, or None
+_active = None
+_NO_SPAN = nullcontext()
+
+class Profiler:
+    """
+    Records wall time per phase of a command.
+
+    Phases nest: time spent in an inner phase is not counted again for the
+    outer one, so the per-phase totals add up to the profiled time. A
+    cProfile profile of everything that runs can be recorded alongside.
+    """
+
+    def __init__(self, cprofile: bool = False):
+        """
+        Initialize the profiler.
+
+        Args:
+            cprofile: Whether to also record a cProfile profile
+        """
+        self.origin = time.perf_counter()
+        self.end: Optional[float] = None
+        # (name, start, end, thread id) of every finished span
+        self.spans: List[Tuple[str, float, float, int]] = []
+        # Exclusive seconds and number of spans per phase
+        self.totals: Dict[str, List[float]] = {}
+        self._stacks = threading.local()
+        self._lock = threading.Lock()
+        self.cprofile = None
+        if cprofile:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+
+    def start(self) -> None:
+        """Start profiling, making phase() and @profiled record into this profiler."""
+        global _active
+        if _active is not None:
+            raise ValueError("Another profiler is already running")
+        _active = self
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def stop(self) -> None:
+        """Stop profiling."""
+        global _active
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        if _active is self:
+            _active = None
+        self.end = time.perf_counter()
+
+    def add_span(self, name: str, start: float, end: float) -> None:
+        """Record a span measured outside of phase(), e.g. before profiling started."""
+        with self._lock:
+            self.spans.append((name, start, end, threading.get_ident()))
+            total = self.totals.setdefault(name, [0.0, 0])
+            total[0] += end - start
+            total[1] += 1
+
+    def summary(self) -> str:
+        """Format the time per phase, slowest first."""
+        end = self.end or time.perf_counter()
+        total = end - min([self.origin] + [span[1] for span in self.spans])
+        accounted = sum(seconds for seconds, _ in self.totals.values())
+        rows = sorted(self.totals.items(), key=lambda item: -item[1][0])
+        rows.append(('other', [max(total - accounted, 0.0), 0]))
+        lines = [f"Profile: {total * 1000:.1f} ms"]
+        for name, (seconds, count) in rows:
+            calls = f"{count:>6d}x" if count else ' ' * 7
+            lines.append(f"  {name:<14} {seconds * 1000:>10.2f} ms  {calls}  "
+                         f"{seconds / total * 100 if total else 0.0:5.1f}%")
+        return '\n'.join(lines)
+
+    def dump_stats(self, path: str) -> None:
+        """Write the cProfile profile in pstats format, readable with python -m pstats."""
+        if self.cprofile is None:
+            raise ValueError("No cProfile profile was recorded")
+        self.cprofile.dump_stats(path)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Write the spans in Chrome trace event format, for chrome://tracing or Perfetto."""
+        pid = os.getpid()
+        origin = min([self.origin] + [span[1] for span in self.spans])
+        events = [
+            {'name': name, 'cat': 'phase', 'ph': 'X', 'pid': pid, 'tid': thread,
+             'ts': round((start - origin) * 1e6, 3), 'dur': round((end - start) * 1e6, 3)}
+            for name, start, end, thread in sorted(self.spans, key=lambda span: span[1])
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+class _Span:
+    """Times one phase, excluding the phases nested in it."""
+
+    __slots__ = ('profiler', 'name', 'start', 'nested')
+
+    def __init__(self, profiler: Profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> '_Span':
+        stack = self.profiler._stacks.__dict__.setdefault('spans', [])
+        stack.append(self)
+        self.nested = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        end = time.perf_counter()
+        profiler = self.profiler
+        stack = profiler._stacks.spans
+        stack.pop()
+        if stack:
+            stack[-1].nested += end - self.start
+        with profiler._lock:
+            profiler.spans.append((self.name, self.start, end, threading.get_ident()))
+            total = profiler.totals.setdefault(self.name, [0.0, 0])
+            total[0] += end - self.start - self.nested
+            total[1] += 1
+
+def phase(name: str):
+    """
+    Time a block as a phase of the running command.
+
+    Without an active profiler this returns a shared no-op context manager.
+
+    Args:
+        name: Phase name, e.g. 'load_data' or 'rendering'
+    """
+    profiler = _active
+    return _NO_SPAN if profiler is None else _Span(profiler, name)
+
+def profiled(name: str) -> Callable[[Callable], Callable]:
+    """Decorator timing every call of a function as a phase."""
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _active
+            if profiler is None:
+                return func(*args, **kwargs)
+            with _Span(profiler, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+@contextmanager
+def profile_session(stats_path: Optional[str] = None,
+                    trace_path: Optional[str] = None,
+                    started: Optional[float] = None) -> Iterator[Optional[Profiler]]:
+    """
+    Profile a block and report the time per phase on stderr when it ends.
+
+    Inside a block that is already being profiled this does nothing.
+
+    Args:
+        stats_path: Write a cProfile profile in pstats format to this file
+        trace_path: Write the phases in Chrome trace format to this file
+        started: perf_counter() time when imports started, recorded as the
+            'import' phase
+    """
+    if _active is not None:
+        yield None
+        return
+    profiler = Profiler(cprofile=stats_path is not None)
+    if started is not None:
+        profiler.add_span('import', started, profiler.origin)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        print(profiler.summary(), file=sys.stderr)
+        if stats_path:
+            profiler.dump_stats(stats_path)
+        if trace_path:
+            profiler.write_chrome_trace(trace_path)
@@ -1,5 +1,8 @@
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from .profiling import profiled
+from .metrics import observed
+from .time_utils import current_time, to_epoch_seconds, day_ordinal, week_ordinal
 
 class StreakCalculator:
     """Calculates streaks for habits."""
@@ -19,20 +22,19 @@ class StreakCalculator:
         if not check_dates:
             return 0
             
-        sorted_dates = sorted(check_dates, reverse=True)
-        current_date = datetime.now()
+        today = day_ordinal(to_epoch_seconds(current_time()))
+        days = {day_ordinal(to_epoch_seconds(date)) for date in check_dates}
+        if periodicity == 'daily':
+            periods, current = days, today
+        else:  # weekly
+            periods, current = {week_ordinal(day) for day in days}, week_ordinal(today)
+        # A streak stays alive until a whole period passes without completion
+        period = current if current in periods else current - 1
         streak = 0
         
-        for i, date in enumerate(sorted_dates):
-            if periodicity == 'daily':
-                expected_date = current_date - timedelta(days=i)
-                if date.date() != expected_date.date():
-                    break
-            else:  # weekly
-                week_diff = (current_date - date).days // 7
-                if week_diff != i:
-                    break
+        while period in periods:
             streak += 1
+            period -= 1
             
         return streak
 
@@ -51,23 +53,121 @@ class StreakCalculator:
         if not check_dates:
             return 0
             
-        sorted_dates = sorted(check_dates)
-        longest_streak = current_streak = 1
-        
-        for i in range(1, len(sorted_dates)):
-            if periodicity == 'daily':
-                expected_date = sorted_dates[i-1] + timedelta(days=1)
-                if sorted_dates[i].date() == expected_date.date():
-                    current_streak += 1
-                else:
-                    current_streak = 1
-            else:  # weekly
-                week_diff = (sorted_dates[i] - sorted_dates[i-1]).days // 7
-                if week_diff == 1:
-                    current_streak += 1
-                else:
-                    current_streak = 1
-                    
-            longest_streak = max(longest_streak, current_streak)
-            
-        return longest_streak
\ No newline at end of file
+        days = sorted(day_ordinal(to_epoch_seconds(date)) for date in check_dates)
+        if periodicity == 'daily':
+            periods = days
+        else:  # weekly
+            periods = [week_ordinal(day) for day in days]
+        return StreakCalculator.calculate_ordinal_streaks(periods)[1]
+
+    @staticmethod
+    def calculate_streaks_batch(ordinals, offsets, today) -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        Calculate current and longest streaks for many habits at once.
+
+        The ordinals of all habits are passed as one flat array, where habit i
+        owns the slice ordinals[offsets[i]:offsets[i + 1]]. Each slice must be
+        sorted in ascending order; repeated ordinals count once.
+
+        Args:
+            ordinals: Flat array of day or ISO week ordinals
+            offsets: Array of len(habits) + 1 slice boundaries into ordinals
+            today: Ordinal of the current period, either one value for all
+                habits or one value per habit
+
+        Returns:
+            Tuple of (current_streaks, longest_streaks) arrays, one entry per habit
+        """
+        import numpy as np
+
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        habit_count = len(offsets) - 1
+        current = np.zeros(habit_count, dtype=np.int64)
+        longest = np.zeros(habit_count, dtype=np.int64)
+        if len(ordinals) == 0:
+            return current, longest
+
+        # A run continues while the gap to the previous completion is at most
+        # one period, so repeated completions within a period stay in the run
+        # and its length is simply the span of ordinals it covers.
+        run_break = np.diff(ordinals) > 1
+        boundaries = offsets[1:-1]
+        boundaries = boundaries[(boundaries > 0) & (boundaries < len(ordinals))]
+        run_break[boundaries - 1] = True
+
+        run_starts = np.concatenate(([0], np.flatnonzero(run_break) + 1))
+        run_ends = np.append(run_starts[1:], len(ordinals)) - 1
+        run_lengths = ordinals[run_ends] - ordinals[run_starts] + 1
+        run_owners = np.searchsorted(offsets, run_starts, side='right') - 1
+
+        # Runs are ordered by habit, so each habit's runs form one segment
+        first_runs = np.flatnonzero(np.diff(run_owners, prepend=-1) != 0)
+        last_runs = np.append(first_runs[1:], len(run_starts)) - 1
+        active = run_owners[first_runs]
+        longest[active] = np.maximum.reduceat(run_lengths, first_runs)
+
+        # The last run is still alive until a whole period passes without completion
+        today = np.broadcast_to(np.asarray(today, dtype=np.int64), (habit_count,))
+        current[active] = np.where(
+            today[active] - ordinals[run_ends[last_runs]] <= 1, run_lengths[last_runs], 0
+        )
+        return current, longest
+
+    @staticmethod
+    @profiled('analytics')
+    @observed('calculate_habit_streaks')
+    def calculate_habit_streaks(habits: List['Habit'],
+                                now: Optional[datetime] = None) -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        Calculate current and longest streaks for a list of habits.
+
+        Daily habits are measured in day ordinals and weekly habits in ISO
+        week ordinals.
+
+        Args:
+            habits: Habits whose completion history should be evaluated
+            now: Reference time for the current streak (defaults to now)
+
+        Returns:
+            Tuple of (current_streaks, longest_streaks) arrays in habit order
+        """
+        import numpy as np
+
+        now = now or current_time()
+        offsets = np.zeros(len(habits) + 1, dtype=np.int64)
+        np.cumsum([len(h.completion_epochs) for h in habits], out=offsets[1:])
+        epochs = np.concatenate(
+            [np.frombuffer(h.completion_epochs, dtype=np.int64) for h in habits]
+            or [np.empty(0, dtype=np.int64)]
+        )
+
+        weekly = np.array([h.periodicity == 'weekly' for h in habits], dtype=bool)
+        days = day_ordinal(epochs)
+        ordinals = np.where(np.repeat(weekly, np.diff(offsets)), week_ordinal(days), days)
+
+        today = day_ordinal(to_epoch_seconds(now))
+        today = np.where(weekly, week_ordinal(today), today)
+        return StreakCalculator.calculate_streaks_batch(ordinals, offsets, today)
+
+    @staticmethod
+    def calculate_ordinal_streaks(ordinals: Iterable[int]) -> Tuple[int, int, Optional[int]]:
+        """
+        Calculate the streak state of a sorted sequence of period ordinals.
+
+        Args:
+            ordinals: Day or ISO week ordinals in ascending order
+
+        Returns:
+            Tuple of (final_streak, longest_streak, last_ordinal), where the
+            final streak is the run ending at the last ordinal
+        """
+        streak = longest = 0
+        last = None
+        for ordinal in ordinals:
+            if ordinal == last:
+                continue
+            streak = streak + 1 if last is not None and ordinal == last + 1 else 1
+            longest = max(longest, streak)
+            last = ordinal
+        return streak, longest, last
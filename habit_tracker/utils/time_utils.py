@@ -0,0 +1,116 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator, Tuple
+
+# Naive datetimes are treated as wall-clock time, so epochs are counted from
+# a naive origin instead of going through the local timezone.
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+
+def to_epoch_seconds(date: datetime) -> int:
+    """Convert a naive datetime to whole seconds since the epoch."""
+    delta = date - EPOCH
+    return delta.days * SECONDS_PER_DAY + delta.seconds
+
+def to_naive(date: datetime) -> datetime:
+    """Convert an aware datetime to naive local wall-clock time; naive datetimes are kept."""
+    return date if date.tzinfo is None else date.astimezone().replace(tzinfo=None)
+
+def from_epoch_seconds(seconds: int) -> datetime:
+    """Convert seconds since the epoch back to a naive datetime."""
+    return EPOCH + timedelta(seconds=seconds)
+
+def day_ordinal(epoch_seconds: int) -> int:
+    """Convert seconds since the epoch to a day ordinal (days since the epoch)."""
+    return epoch_seconds // SECONDS_PER_DAY
+
+def week_ordinal(day: int) -> int:
+    """Convert a day ordinal to an ISO week ordinal, with weeks starting on Monday."""
+    # The epoch fell on a Thursday, three days after the start of its ISO week
+    return (day + 3) // 7
+
+def period_ordinal(epoch_seconds: int, periodicity: str) -> int:
+    """Convert seconds since the epoch to the day or ISO week ordinal of a periodicity."""
+    day = epoch_seconds // SECONDS_PER_DAY
+    return week_ordinal(day) if periodicity == 'weekly' else day
+
+def period_bounds(ordinal: int, periodicity: str) -> Tuple[int, int]:
+    """Get the first second of a day or ISO week ordinal and the first second after it."""
+    if periodicity == 'weekly':
+        first_day = ordinal * 7 - 3
+        return first_day * SECONDS_PER_DAY, (first_day + 7) * SECONDS_PER_DAY
+    return ordinal * SECONDS_PER_DAY, (ordinal + 1) * SECONDS_PER_DAY
+
+class Clock:
+    """
+    Source of the current time.
+
+    Code that needs the current time calls current_time() instead of
+    datetime.now(), so tests and benchmarks can pin it with set_clock.
+    """
+
+    def now(self) -> datetime:
+        """Get the current naive local time."""
+        return datetime.now()
+
+class FixedClock(Clock):
+    """Clock that always returns the same time until it is moved."""
+
+    def __init__(self, moment: datetime):
+        self.moment = moment
+
+    def now(self) -> datetime:
+        """Get the fixed time."""
+        return self.moment
+
+    def advance(self, **kwargs) -> None:
+        """Move the time forward by a timedelta given as keyword arguments."""
+        self.moment += timedelta(**kwargs)
+
+_clock = Clock()
+# Time pinned by frozen_time for the operation running in each thread
+_frozen = threading.local()
+
+def set_clock(clock: Clock) -> Clock:
+    """
+    Replace the clock used by current_time.
+
+    Returns:
+        The previous clock, to restore it later
+    """
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+def current_time() -> datetime:
+    """Get the current time, as pinned by an enclosing frozen_time block or from the clock."""
+    moment = getattr(_frozen, 'moment', None)
+    return moment if moment is not None else _clock.now()
+
+@contextmanager
+def frozen_time(fresh: bool = False) -> Iterator[datetime]:
+    """
+    Resolve the current time once for a whole operation.
+
+    Inside the block every current_time() call in this thread returns the
+    same value, so an operation never sees the day change halfway through.
+    Nested blocks reuse the outer time.
+
+    Args:
+        fresh: Resolve a new time even inside another block, e.g. for each
+            request a long-running daemon serves
+    """
+    outer = getattr(_frozen, 'moment', None)
+    if outer is not None and not fresh:
+        yield outer
+        return
+    _frozen.moment = _clock.now()
+    try:
+        yield _frozen.moment
+    finally:
+        _frozen.moment = outer
+
+def today_ordinal(periodicity: str = 'daily') -> int:
+    """Get the ordinal of the current day or ISO week."""
+    return period_ordinal(to_epoch_seconds(current_time()), periodicity)
@@ -8,6 +8,7 @@ setup(
     include_package_data=True,
     install_requires=[
         "click>=8.1.7",
+        "numpy>=1.21",
         "pytest>=7.4.3",
         "python-json-logger>=2.0.7",
     ],
@@ -2,99 +2,87 @@ from datetime import datetime, timedelta
 import json
 import random
 
+PREDEFINED_HABITS = [
+    ("Morning Exercise", "daily", "15 minutes of morning stretching and basic exercises"),
+    ("Read a Book", "daily", "Read at least 20 pages"),
+    ("Weekly Planning", "weekly", "Plan goals and tasks for the upcoming week"),
+    ("Drink Water", "daily", "Drink 8 glasses of water"),
+    ("Deep House Cleaning", "weekly", "Thorough cleaning of living space"),
+]
+
 def generate_test_data():
     """
     Generate predefined habits with 4 weeks of example data.
     Returns a dictionary containing habits and their completion data.
     """
-    # Start date for test data (4 weeks ago from today)
-    start_date = datetime.now() - timedelta(weeks=4)
-    
-    # Predefined habits
-    habits = [
-        {
-            "id": 1,
-            "name": "Morning Exercise",
-            "periodicity": "daily",
-            "creation_date": start_date.isoformat(),
-            "description": "15 minutes of morning stretching and basic exercises",
-            "is_active": True,
-            "completions": []
-        },
-        {
-            "id": 2,
-            "name": "Read a Book",
-            "periodicity": "daily",
-            "creation_date": start_date.isoformat(),
-            "description": "Read at least 20 pages",
-            "is_active": True,
-            "completions": []
-        },
-        {
-            "id": 3,
-            "name": "Weekly Planning",
-            "periodicity": "weekly",
-            "creation_date": start_date.isoformat(),
-            "description": "Plan goals and tasks for the upcoming week",
-            "is_active": True,
-            "completions": []
-        },
-        {
-            "id": 4,
-            "name": "Drink Water",
-            "periodicity": "daily",
-            "creation_date": start_date.isoformat(),
-            "description": "Drink 8 glasses of water",
-            "is_active": True,
-            "completions": []
-        },
-        {
-            "id": 5,
-            "name": "Deep House Cleaning",
-            "periodicity": "weekly",
+    return generate_scaled_test_data(num_habits=len(PREDEFINED_HABITS), days=28)
+
+def generate_scaled_test_data(num_habits=5, days=28, seed=None, end_date=None):
+    """
+    Generate any number of habits with completion data over any period.
+
+    The predefined habits are repeated (with a numeric suffix) until
+    num_habits habits exist. With a seed the output is reproducible.
+
+    Args:
+        num_habits (int): Number of habits to generate
+        days (int): Length of the completion history in days
+        seed (int): Seed for the random number generator (random if None)
+        end_date (datetime): Last day of the history (defaults to now)
+
+    Returns:
+        List of habit dictionaries with their completions
+    """
+    rng = random.Random(seed)
+    end_date = end_date or datetime.now()
+    start_date = end_date - timedelta(days=days)
+
+    habits = []
+    for i in range(num_habits):
+        name, periodicity, description = PREDEFINED_HABITS[i % len(PREDEFINED_HABITS)]
+        if i >= len(PREDEFINED_HABITS):
+            name = f"{name} {i // len(PREDEFINED_HABITS) + 1}"
+        habits.append({
+            "id": i + 1,
+            "name": name,
+            "periodicity": periodicity,
             "creation_date": start_date.isoformat(),
-            "description": "Thorough cleaning of living space",
+            "description": description,
             "is_active": True,
             "completions": []
-        }
-    ]
+        })
 
     # Generate completion data for each habit
     for habit in habits:
         current_date = start_date
-        end_date = datetime.now()
-        
+
         while current_date <= end_date:
             # For daily habits
             if habit["periodicity"] == "daily":
                 # 80% chance of completion to simulate realistic usage
-                if random.random() < 0.8:
+                if rng.random() < 0.8:
                     completion_time = current_date.replace(
-                        hour=random.randint(6, 22),
-                        minute=random.randint(0, 59)
+                        hour=rng.randint(6, 22),
+                        minute=rng.randint(0, 59)
                     )
                     habit["completions"].append({
                         "date": completion_time.isoformat(),
                         "status": "completed"
                     })
-                current_date += timedelta(days=1)
-            
+
             # For weekly habits
-            else:
-                if current_date.weekday() == 6:  # Sunday
-                    # 90% chance of completion for weekly habits
-                    if random.random() < 0.9:
-                        completion_time = current_date.replace(
-                            hour=random.randint(9, 18),
-                            minute=random.randint(0, 59)
-                        )
-                        habit["completions"].append({
-                            "date": completion_time.isoformat(),
-                            "status": "completed"
-                        })
-                    current_date += timedelta(days=1)
-                else:
-                    current_date += timedelta(days=1)
+            elif current_date.weekday() == 6:  # Sunday
+                # 90% chance of completion for weekly habits
+                if rng.random() < 0.9:
+                    completion_time = current_date.replace(
+                        hour=rng.randint(9, 18),
+                        minute=rng.randint(0, 59)
+                    )
+                    habit["completions"].append({
+                        "date": completion_time.isoformat(),
+                        "status": "completed"
+                    })
+            current_date += timedelta(days=1)
 
     return habits
 
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 import os
 import json
 import tempfile
+import shutil
 from habit_tracker.models.habit import Habit
 from habit_tracker.models.habit_manager import HabitManager
 from pathlib import Path
@@ -16,8 +17,7 @@ def temp_db():
     with open(temp_file, 'w') as f:
         json.dump([], f)
     yield temp_file
-    os.remove(temp_file)
-    os.rmdir(temp_dir)
+    shutil.rmtree(temp_dir)
 
 @pytest.fixture
 def sample_habit():
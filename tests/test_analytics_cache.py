@@ -0,0 +1,104 @@
+import json
+from datetime import datetime
+from habit_tracker.analytics.analytics_cache import AnalyticsCache
+from habit_tracker.models.habit import Habit
+from habit_tracker.models.habit_manager import HabitManager
+from habit_tracker.utils.time_utils import FixedClock, frozen_time, set_clock
+
+def make_habit(habit_id):
+    """Create a habit with a fixed creation date."""
+    return Habit(id=habit_id, name=f"Habit {habit_id}", periodicity="daily",
+                 creation_date=datetime(2024, 1, 1))
+
+def test_cache_hit_until_habit_changes():
+    """Test that results are reused until check_off bumps the habit version."""
+    cache = AnalyticsCache()
+    habit = make_habit(1)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(habit.completions)
+
+    assert cache.get_or_compute('count', [habit], compute) == 0
+    assert cache.get_or_compute('count', [habit], compute) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    habit.check_off(datetime(2024, 1, 2))
+    assert cache.get_or_compute('count', [habit], compute) == 1
+    assert len(calls) == 2
+
+def test_cache_key_follows_elapsed_days():
+    """Test that a result is recomputed once a day has passed since creation, mid-date."""
+    cache = AnalyticsCache()
+    habit = Habit(id=1, name="Evening", periodicity="daily", creation_date=datetime(2024, 1, 1, 18))
+    clock = FixedClock(datetime(2024, 1, 2, 9))
+    previous = set_clock(clock)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    try:
+        with frozen_time():
+            assert cache.get_or_compute('completion_rate', [habit], compute) == 1
+        clock.advance(hours=8)
+        with frozen_time():
+            assert cache.get_or_compute('completion_rate', [habit], compute) == 1
+        clock.advance(hours=2)
+        with frozen_time():
+            assert cache.get_or_compute('completion_rate', [habit], compute) == 2
+    finally:
+        set_clock(previous)
+
+def test_cache_lru_eviction():
+    """Test that the least recently used entries are evicted over budget."""
+    cache = AnalyticsCache(max_bytes=250)
+    habits = [make_habit(i) for i in range(4)]
+    for habit in habits[:3]:
+        cache.get_or_compute('value', [habit], lambda: 'x' * 20)
+    # Touch the first entry so the second one is the oldest
+    cache.get_or_compute('value', [habits[0]], lambda: 'unused')
+    cache.get_or_compute('value', [habits[3]], lambda: 'x' * 20)
+
+    assert cache.size <= 250
+    misses = cache.misses
+    cache.get_or_compute('value', [habits[0]], lambda: 'x' * 20)
+    assert cache.misses == misses
+    cache.get_or_compute('value', [habits[1]], lambda: 'x' * 20)
+    assert cache.misses == misses + 1
+
+def test_cache_persistence(tmp_path):
+    """Test that saved results are loaded again and stale days are dropped."""
+    path = str(tmp_path / 'cache.json')
+    habit = make_habit(1)
+    cache = AnalyticsCache(path=path)
+    cache.get_or_compute('stats', [habit], lambda: {'rate': 50.0})
+    cache.save()
+
+    reloaded = AnalyticsCache(path=path)
+    assert reloaded.get_or_compute('stats', [habit], lambda: None) == {'rate': 50.0}
+    assert reloaded.hits == 1
+
+    with open(path) as f:
+        entries = json.load(f)
+    key = json.loads(entries[0][0])
+    key[1] = '2000-01-01'
+    with open(path, 'w') as f:
+        json.dump([[json.dumps(key), {'rate': 50.0}]], f)
+    assert AnalyticsCache(path=path).size == 0
+
+    with open(path, 'w') as f:
+        f.write('not json')
+    assert AnalyticsCache(path=path).size == 0
+
+def test_habit_version_is_persisted(temp_db):
+    """Test that a reloaded habit keeps its data version."""
+    manager = HabitManager(storage_path=temp_db)
+    habit = manager.add_habit("Versioned", "daily")
+    manager.complete_habit(habit, datetime(2024, 1, 1))
+    manager.complete_habit(habit, datetime(2024, 1, 2))
+    manager.save_data()
+
+    assert HabitManager(storage_path=temp_db).habits[0].version == habit.version == 2
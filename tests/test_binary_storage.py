@@ -0,0 +1,95 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from habit_tracker.models.habit_manager import HabitManager
+from habit_tracker.storage.storage_factory import parse_storage_path
+from habit_tracker.utils.habit_exporter import export_habits
+from habit_tracker.utils.habit_importer import import_habits
+from habit_tracker.utils.time_utils import to_naive
+
+def test_parse_binary_storage_path():
+    """Test that the .bin extension and binary:// scheme select the binary backend."""
+    assert parse_storage_path('data/habits.bin') == ('binary', 'data/habits.bin')
+    assert parse_storage_path('binary:///tmp/habits') == ('binary', '/tmp/habits')
+
+def test_binary_snapshot_roundtrip(tmp_path):
+    """Test that habits, streak state and history survive a binary snapshot."""
+    path = str(tmp_path / 'habits.bin')
+    manager = HabitManager(storage_path=path)
+    habit = manager.add_habit("Morning Exercise", "daily")
+    weekly = manager.add_habit("Weekly Review", "weekly")
+    manager.add_habit("Morning Exercise", "weekly")
+    for day in (1, 2, 3, 5, 6):
+        manager.complete_habit(habit, datetime(2024, 1, day, 7, 30))
+    manager.save_data()
+
+    reloaded = HabitManager(storage_path=path)
+    loaded = reloaded.get_habit_by_id(habit.id)
+    assert loaded.name == "Morning Exercise"
+    assert loaded.creation_date == habit.creation_date
+    assert loaded.last_check_date == datetime(2024, 1, 6, 7, 30)
+    assert loaded.streak_count == 2
+    assert loaded.longest_streak == 3
+    assert loaded.completions == habit.completions
+    assert reloaded.get_habit_by_id(weekly.id).last_check_date is None
+    # Equal names share one entry in the string pool
+    assert reloaded.habits[2].name is loaded.name
+
+def test_binary_snapshot_aware_dates(tmp_path):
+    """Test that timezone-aware dates, which other backends keep, can be snapshotted."""
+    path = str(tmp_path / 'habits.bin')
+    manager = HabitManager(storage_path=path)
+    habit = manager.add_habit("Travel Journal", "daily")
+    habit.creation_date = datetime(2024, 1, 1, 9, tzinfo=timezone(timedelta(hours=-5)))
+    habit.last_check_date = datetime(2024, 1, 2, 20, tzinfo=timezone.utc)
+    manager.save_data()
+
+    loaded = HabitManager(storage_path=path).habits[0]
+    assert loaded.creation_date == to_naive(habit.creation_date)
+    assert loaded.last_check_date == to_naive(habit.last_check_date)
+
+def test_binary_history_loaded_on_demand(tmp_path):
+    """Test that completions are only read from the mapping when first used."""
+    path = str(tmp_path / 'habits.bin')
+    manager = HabitManager(storage_path=path)
+    habit = manager.add_habit("Reading", "daily")
+    manager.complete_habit(habit, datetime(2024, 2, 1))
+    manager.save_data()
+
+    loaded = HabitManager(storage_path=path).habits[0]
+    assert loaded._completion_loader is not None
+    assert loaded.get_current_streak(datetime(2024, 2, 2)) == 1
+    assert loaded._completion_loader is not None
+    assert loaded.get_completions() == [datetime(2024, 2, 1)]
+    assert loaded._completion_loader is None
+
+def test_binary_journal_replay(tmp_path):
+    """Test that changes after the last snapshot are replayed from the journal."""
+    path = str(tmp_path / 'habits.bin')
+    manager = HabitManager(storage_path=path)
+    habit = manager.add_habit("Journaled", "daily")
+    manager.save_data()
+    manager.complete_habit(habit, datetime(2024, 3, 1))
+
+    reloaded = HabitManager(storage_path=path)
+    assert reloaded.habits[0].total_check_count == 1
+
+def test_not_a_binary_snapshot(tmp_path):
+    """Test that a JSON file is rejected by the binary backend."""
+    path = tmp_path / 'habits.bin'
+    path.write_text('{"seq": 0, "habits": []}')
+    with pytest.raises(ValueError):
+        HabitManager(storage_path=str(path))
+
+def test_export_and_import_json(tmp_path):
+    """Test moving a store between the binary and JSON formats."""
+    manager = HabitManager(storage_path=str(tmp_path / 'habits.bin'))
+    habit = manager.add_habit("Exported", "daily")
+    manager.complete_habit(habit, datetime(2024, 4, 1))
+    export_path = str(tmp_path / 'export.json')
+    assert export_habits(manager, export_path) == {'habits': 1, 'completions': 1}
+
+    # The export opens directly as a JSON store and imports into a new one
+    assert HabitManager(storage_path=export_path).habits[0].completions == [datetime(2024, 4, 1)]
+    target = HabitManager(storage_path=str(tmp_path / 'imported.bin'))
+    import_habits(target, export_path)
+    assert target.habits[0].completions == [datetime(2024, 4, 1)]
@@ -64,5 +64,41 @@ class TestCalendarView:
         assert self.calendar_view.current_date.year == 2023
         assert self.calendar_view.current_date.month == 12
 
+    def test_monthly_view_marks_all_completions(self):
+        """Test that every completion is marked, not only the last one."""
+        self.test_habits[0].check_off(datetime(2024, 3, 5))
+        output = CalendarView.generate_monthly_view(self.test_habits, 2024, 3)
+        assert " 1T" in output
+        assert " 5T" in output
+        assert " 2T" not in output
+
+    def test_month_bitmaps(self):
+        """Test the month bitmaps across month boundaries and after check_off."""
+        habit = self.test_habits[0]
+        habit.completions = [datetime(2024, 2, 29, 23, 0), datetime(2024, 3, 31)]
+        assert habit.get_month_bitmap(2024, 2) == 1 << 28
+        assert habit.get_month_bitmap(2024, 3) == 1 << 30
+        assert habit.get_month_bitmap(2024, 4) == 0
+
+        # check_off updates built bitmaps in place
+        habit.check_off(datetime(2024, 4, 2))
+        assert habit.get_month_bitmap(2024, 4) == 1 << 1
+
+    def test_year_and_range_views(self):
+        """Test that year and range views show the share of habits completed per day."""
+        other = Habit(id=2, name="Other", periodicity="daily", creation_date=datetime(2024, 3, 1))
+        other.completions = [datetime(2024, 3, 1), datetime(2024, 3, 2)]
+        habits = self.test_habits + [other]
+
+        year_view = CalendarView.generate_year_view(habits, 2024)
+        rows = {line[:8]: line[10:41] for line in year_view.splitlines() if line[:3] in ('Jan', 'Mar')}
+        assert rows['Mar 2024'].startswith('#*.')
+        assert rows['Jan 2024'] == '.' * 31
+
+        range_view = CalendarView.generate_range_view(habits, 2023, 12, 2024, 3)
+        assert [line[:8] for line in range_view.splitlines()[1:5]] == [
+            'Dec 2023', 'Jan 2024', 'Feb 2024', 'Mar 2024'
+        ]
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
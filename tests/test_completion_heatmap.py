@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from datetime import datetime
+from habit_tracker.analytics.completion_heatmap import (
+    bucket_counts,
+    parse_dayparts,
+    weekday_hour_histograms
+)
+from habit_tracker.analytics.habit_metrics import analyze_completions
+from habit_tracker.models.habit import Habit
+
+def make_habit(id, times):
+    """Create a habit completed at the given times."""
+    habit = Habit(id, f"Habit {id}", "daily", creation_date=datetime(2024, 1, 1))
+    for time in times:
+        habit.check_off(time)
+    return habit
+
+def test_weekday_hour_histograms():
+    """Test that completions are counted per habit, weekday and hour."""
+    # 2024-01-01 is a Monday
+    first = make_habit(1, [datetime(2024, 1, 1, 8, 15), datetime(2024, 1, 8, 8, 45),
+                           datetime(2024, 1, 7, 23, 0)])
+    empty = make_habit(2, [])
+    second = make_habit(3, [datetime(2024, 1, 3, 13, 0)])
+
+    histograms = weekday_hour_histograms([first, empty, second], chunk_completions=2)
+    assert histograms.shape == (3, 7, 24)
+    assert histograms[0, 0, 8] == 2
+    assert histograms[0, 6, 23] == 1
+    assert histograms[1].sum() == 0
+    assert histograms[2, 2, 13] == 1
+
+def test_bucket_counts_match_metrics():
+    """Test that bucket totals agree with the per-habit metrics."""
+    times = [datetime(2024, 1, day, hour) for day in range(1, 8) for hour in (3, 5, 11, 12, 17, 22)]
+    habit = make_habit(1, times)
+    histogram = weekday_hour_histograms([habit])
+    assert bucket_counts(histogram[0]) == analyze_completions(times, 'daily')['patterns']
+
+    dayparts = parse_dayparts('day=8, night=20')
+    assert bucket_counts(histogram, dayparts) == {'day': [21], 'night': [21]}
+    assert bucket_counts(np.zeros((7, 24), dtype=np.int64), dayparts) == {'day': 0, 'night': 0}
+
+def test_parse_dayparts_rejects_invalid_buckets():
+    """Test that malformed bucket specifications raise ValueError."""
+    assert parse_dayparts('morning=6,night=0') == (('morning', 6), ('night', 0))
+    for spec in ('morning', 'morning=x', 'late=24', 'a=1,b=1', '=3'):
+        with pytest.raises(ValueError):
+            parse_dayparts(spec)
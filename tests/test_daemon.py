@@ -0,0 +1,176 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+from datetime import datetime
+import click
+import pytest
+from habit_tracker.daemon import CommandServer, run_command, send_request
+from habit_tracker.utils.time_utils import FixedClock, frozen_time, set_clock
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@click.command()
+@click.argument('name')
+@click.option('--shout', is_flag=True)
+@click.option('--ask', is_flag=True)
+def greet(name, shout, ask):
+    """Small command standing in for the habit tracker CLI."""
+    if ask:
+        name = click.prompt('Name')
+    if name == 'nobody':
+        raise click.ClickException('No one to greet')
+    click.echo(f"Hello {name.upper() if shout else name}")
+
+@pytest.fixture
+def server(tmp_path):
+    """Serve the greet command on a socket in a background thread."""
+    server = CommandServer(str(tmp_path / 'daemon.sock'),
+                           lambda request: run_command(greet, request['args'], request.get('stdin')))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.close()
+    thread.join(timeout=5)
+
+def test_run_command():
+    """Test running a command in-process with captured output."""
+    assert run_command(greet, ['Ada', '--shout']) == {'exit_code': 0, 'stdout': "Hello ADA\n", 'stderr': ''}
+    result = run_command(greet, ['nobody'])
+    assert result['exit_code'] == 1
+    assert 'No one to greet' in result['stderr']
+    assert run_command(greet, [])['exit_code'] == 2
+    # Prompting without input is left to the client
+    assert run_command(greet, ['x', '--ask']) == {'fallback': True}
+    assert run_command(greet, ['x', '--ask'], stdin="Bob\n")['stdout'].endswith("Hello Bob\n")
+
+def test_command_server(server):
+    """Test requests over the socket and a second daemon on the same socket."""
+    response = send_request(server.path, {'args': ['Ada']})
+    assert response == {'exit_code': 0, 'stdout': "Hello Ada\n", 'stderr': ''}
+    with pytest.raises(ValueError):
+        CommandServer(server.path, lambda request: {})
+
+def test_missing_or_stale_socket(tmp_path):
+    """Test that clients ignore sockets nobody listens on and daemons replace them."""
+    path = str(tmp_path / 'daemon.sock')
+    assert send_request(path, {'args': []}) is None
+    CommandServer(path, lambda request: {}).socket.close()
+    assert os.path.exists(path)
+    assert send_request(path, {'args': []}) is None
+    server = CommandServer(path, lambda request: {})
+    server.close()
+    assert not os.path.exists(path)
+
+@pytest.fixture
+def daemon_cli(tmp_path):
+    """Start a daemon for h.json in a subprocess and return a function running CLI commands."""
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT, HABIT_TRACKER_SOCKET=str(tmp_path / 'd.sock'),
+               HABIT_TRACKER_LOG_FILE=str(tmp_path / 'habits.log'), HABIT_TRACKER_LOG_ASYNC='0')
+    env.pop('HABIT_TRACKER_STORAGE', None)
+
+    def run(*args, stdin=None, storage='h.json'):
+        return subprocess.run([sys.executable, '-m', 'habit_tracker.cli', '--storage', storage, *args],
+                              cwd=tmp_path, env=env, input=stdin, capture_output=True, text=True)
+
+    daemon = subprocess.Popen([sys.executable, '-m', 'habit_tracker.cli', '--storage', 'h.json', 'serve'],
+                              cwd=tmp_path, env=env, stdout=subprocess.PIPE, text=True)
+    try:
+        assert 'Serving 0 habits' in daemon.stdout.readline()
+        yield run
+    finally:
+        daemon.send_signal(signal.SIGTERM)
+        daemon.wait(timeout=10)
+    assert not os.path.exists(tmp_path / 'd.sock')
+
+def test_cli_forwards_to_daemon(tmp_path, daemon_cli):
+    """Test that CLI runs are served by a running daemon for the same store."""
+    run = daemon_cli
+    assert run('add', '--name', 'Read', '--periodicity', 'daily').returncode == 0
+    assert 'Successfully completed' in run('complete', '1').stdout
+    result = run('complete', '--stdin', stdin="1 2024-01-01T08:00:00\n")
+    assert 'Successfully completed' in result.stdout
+    # The daemon holds the store; the file reflects every forwarded command
+    with open(tmp_path / 'h.json.journal') as f:
+        assert len(f.readlines()) == 3
+    # Another store is handled by the client itself
+    assert 'No habits' in run('list', storage='other.json').stdout
+    assert 'Total completions: 2' in run('--no-daemon', 'details', '1').stdout
+
+def test_daemon_reloads_store_after_fallback(tmp_path, daemon_cli):
+    """Test that a command the client ran itself, like a confirmed delete, is seen by the daemon."""
+    run = daemon_cli
+    run('add', '--name', 'Read', '--periodicity', 'daily')
+    run('add', '--name', 'Run', '--periodicity', 'daily')
+    # delete prompts, so the client runs it against the store itself
+    assert 'Successfully deleted' in run('delete', '1', stdin="y\n").stdout
+    listing = run('list').stdout
+    assert 'Run' in listing and 'Read' not in listing
+    assert run('add', '--name', 'Write', '--periodicity', 'daily').returncode == 0
+    with open(tmp_path / 'h.json.journal') as f:
+        records = [json.loads(line) for line in f]
+    assert len({record['seq'] for record in records}) == len(records)
+    assert 'ID: 3' in run('--no-daemon', 'details', '3').stdout
+
+def test_daemon_sees_writes_of_other_processes(tmp_path, daemon_cli):
+    """Test that the daemon loads the store again after a --no-daemon run wrote it."""
+    run = daemon_cli
+    run('add', '--name', 'Read', '--periodicity', 'daily')
+    assert run('--no-daemon', 'add', '--name', 'Run', '--periodicity', 'daily').returncode == 0
+    assert 'Run' in run('list').stdout
+    assert 'Successfully completed' in run('complete', '1').stdout
+    with open(tmp_path / 'h.json.journal') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['seq'] for record in records] == [1, 2, 3]
+    assert 'Total completions: 1' in run('--no-daemon', 'details', '1').stdout
+
+def test_client_options_are_not_dropped(tmp_path, daemon_cli):
+    """Test that runs with other group options than the daemon's run in the client."""
+    run = daemon_cli
+    for name in ('Read', 'Run'):
+        assert run('--max-habits', '2', 'add', '--name', name, '--periodicity', 'daily').returncode == 0
+    result = run('--max-habits', '2', 'add', '--name', 'Write', '--periodicity', 'daily')
+    assert 'Maximum number of habits (2) reached' in result.stdout
+    # The daemon's own limit still applies to forwarded runs
+    assert run('add', '--name', 'Write', '--periodicity', 'daily').returncode == 0
+    assert 'Write' in run('list').stdout
+
+    textfile = tmp_path / 'habits.prom'
+    assert 'Write' in run('--metrics-textfile', str(textfile), 'list').stdout
+    assert 'habit_tracker_habits 3' in textfile.read_text()
+
+def test_daemon_resolves_time_per_request(tmp_path, monkeypatch):
+    """Test that the daemon gives every forwarded command the time it arrives at."""
+    from habit_tracker import cli as cli_module
+
+    for name in ('_habit_manager', '_habit_logger', '_analytics_cache'):
+        monkeypatch.setattr(cli_module, name, None)
+    store = str(tmp_path / 'h.json')
+    monkeypatch.setattr(cli_module, '_storage_path', store)
+    monkeypatch.setattr(cli_module, '_log_options', {'log_file': str(tmp_path / 'habits.log')})
+    monkeypatch.setattr(cli_module, '_serving', True)
+    clock = FixedClock(datetime(2024, 3, 13, 23, 0))
+    previous = set_clock(clock)
+
+    def request(*args):
+        response = cli_module.serve_request({'args': ['--storage', store, *args], 'cwd': str(tmp_path),
+                                             'storage': store, 'stdin': None,
+                                             'settings': cli_module._daemon_settings()})
+        assert response['exit_code'] == 0, response['stderr']
+
+    try:
+        # Like `serve`, which runs for days inside one command
+        with frozen_time():
+            request('add', '--name', 'Read', '--periodicity', 'daily')
+            request('complete', '1')
+            clock.advance(hours=2)
+            request('complete', '1')
+        habit = cli_module.get_habit_manager().get_habit_by_id(1)
+        assert habit.creation_date == datetime(2024, 3, 13, 23, 0)
+        assert habit.completions == [datetime(2024, 3, 13, 23, 0), datetime(2024, 3, 14, 1, 0)]
+    finally:
+        set_clock(previous)
+        cli_module._close_habit_manager()
+        cli_module.get_habit_logger().close()
@@ -43,4 +43,89 @@ def test_habit_from_dict():
     }
     habit = Habit.from_dict(data)
     assert habit.name == "Test Habit"
-    assert habit.periodicity == "daily"
\ No newline at end of file
+    assert habit.periodicity == "daily"
+
+def test_completion_history(sample_habit):
+    """Test that every completion is kept in chronological order."""
+    sample_habit.check_off(datetime(2024, 3, 3, 8, 0))
+    sample_habit.check_off(datetime(2024, 3, 1, 9, 30))
+    sample_habit.check_off(datetime(2024, 3, 2, 7, 15))
+
+    assert sample_habit.completions == [
+        datetime(2024, 3, 1, 9, 30),
+        datetime(2024, 3, 2, 7, 15),
+        datetime(2024, 3, 3, 8, 0)
+    ]
+    assert sample_habit.last_check_date == datetime(2024, 3, 3, 8, 0)
+    assert sample_habit.get_completions(datetime(2024, 3, 2)) == [
+        datetime(2024, 3, 2, 7, 15),
+        datetime(2024, 3, 3, 8, 0)
+    ]
+
+def test_completion_history_round_trip(sample_habit):
+    """Test that the completion history survives serialization."""
+    sample_habit.check_off(datetime(2024, 3, 1, 9, 30))
+    sample_habit.check_off(datetime(2024, 3, 2, 7, 15))
+
+    habit = Habit.from_dict(sample_habit.to_dict())
+    assert habit.completions == sample_habit.completions
+
+def test_legacy_dict_seeds_history():
+    """Test that data without a history falls back to the last completion."""
+    data = {
+        'id': 1,
+        'name': "Test Habit",
+        'periodicity': "daily",
+        'creation_date': datetime(2024, 3, 1).isoformat(),
+        'last_check_date': datetime(2024, 3, 2, 8, 0).isoformat(),
+        'is_active': True,
+        'streak_count': 1,
+        'total_check_count': 1
+    }
+    habit = Habit.from_dict(data)
+    assert habit.completions == [datetime(2024, 3, 2, 8, 0)]
+
+def test_incremental_streak(sample_habit):
+    """Test that check_off maintains the streak state."""
+    sample_habit.check_off(datetime(2024, 3, 1, 8, 0))
+    sample_habit.check_off(datetime(2024, 3, 2, 8, 0))
+    sample_habit.check_off(datetime(2024, 3, 2, 20, 0))
+    assert sample_habit.streak_count == 2
+
+    sample_habit.check_off(datetime(2024, 3, 3, 8, 0))
+    sample_habit.check_off(datetime(2024, 3, 5, 8, 0))
+    assert sample_habit.streak_count == 1
+    assert sample_habit.longest_streak == 3
+    assert sample_habit.get_current_streak(datetime(2024, 3, 6, 12, 0)) == 1
+    assert sample_habit.get_current_streak(datetime(2024, 3, 7, 12, 0)) == 0
+
+def test_weekly_streak():
+    """Test that weekly habits count consecutive ISO weeks."""
+    habit = Habit(1, "Weekly Habit", "weekly")
+    habit.check_off(datetime(2024, 3, 3, 8, 0))   # Sunday
+    habit.check_off(datetime(2024, 3, 4, 8, 0))   # Monday of the next week
+    habit.check_off(datetime(2024, 3, 10, 8, 0))  # Sunday of the same week
+    assert habit.streak_count == 2
+
+def test_backfilled_streak_is_rebuilt(sample_habit):
+    """Test that an out-of-order completion triggers a rebuild."""
+    sample_habit.check_off(datetime(2024, 3, 1, 8, 0))
+    sample_habit.check_off(datetime(2024, 3, 3, 8, 0))
+    assert sample_habit.streak_count == 1
+
+    sample_habit.check_off(datetime(2024, 3, 2, 8, 0))
+    assert sample_habit.streak_count == 3
+    assert sample_habit.longest_streak == 3
+
+def test_streak_state_round_trip(sample_habit):
+    """Test that saved streak state is reused and stale state is rebuilt."""
+    for day in range(1, 4):
+        sample_habit.check_off(datetime(2024, 3, day, 8, 0))
+    data = sample_habit.to_dict()
+    assert Habit.from_dict(data).streak_count == 3
+
+    stale = dict(data, streak_count=0, last_period=None)
+    del stale['longest_streak']
+    habit = Habit.from_dict(stale)
+    assert habit.streak_count == 3
+    assert habit.longest_streak == 3
@@ -0,0 +1,101 @@
+import io
+import json
+import os
+import pytest
+from datetime import datetime, timezone
+from habit_tracker.models.habit_manager import HabitManager
+from habit_tracker.utils.habit_importer import (
+    JsonArrayStream, import_habits, normalize_habit_record, parse_completion_line
+)
+from habit_tracker.utils.time_utils import to_epoch_seconds
+
+EXAMPLE_DATA = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'example_data', 'predefined_habits.json'
+)
+
+def test_json_array_stream_small_chunks():
+    """Test that elements are decoded across chunk boundaries."""
+    document = json.dumps({
+        'seq': 12345,
+        'habits': [{'name': f"Habit {i}", 'values': list(range(i * 10))} for i in range(5)]
+    })
+    stream = JsonArrayStream(io.StringIO(document), chunk_size=7)
+    items = list(stream.iter_array('habits'))
+    assert [item['name'] for item in items] == [f"Habit {i}" for i in range(5)]
+    assert items[4]['values'] == list(range(40))
+
+def test_json_array_stream_top_level_list():
+    """Test streaming a document that is a plain list."""
+    stream = JsonArrayStream(io.StringIO('[1, 22, 333]'), chunk_size=2)
+    assert list(stream.iter_array('habits')) == [1, 22, 333]
+
+def test_json_array_stream_caps_unterminated_values():
+    """Test that a value that never ends fails without reading the rest of the file."""
+    document = io.StringIO('[{"name": "Read"}, {"name": "' + 'x' * 10000)
+    stream = JsonArrayStream(document, chunk_size=16, max_value_size=100)
+    items = stream.iter_array('habits')
+    assert next(items) == {'name': "Read"}
+    with pytest.raises(ValueError, match='longer than 100 characters'):
+        next(items)
+    assert document.tell() < 1000
+
+def test_import_example_data(habit_manager):
+    """Test importing the check_dates format from example_data/."""
+    result = import_habits(habit_manager, EXAMPLE_DATA, batch_size=2)
+    assert result['records'] == 5
+    assert result['completions'] == 15
+    assert len(habit_manager.habits) == 5
+
+    habit = habit_manager.habits[0]
+    assert habit.name == "Morning Exercise"
+    assert habit.completions[0] == datetime(2024, 1, 1, 7, 0)
+    assert habit.streak_count == 3
+
+def test_import_generator_format_and_merge(habit_manager, tmp_path):
+    """Test importing generator output and merging into existing habits."""
+    existing = habit_manager.add_habit("Morning Exercise", "daily")
+    path = tmp_path / 'generated.json'
+    path.write_text(json.dumps({'habits': [
+        {
+            'id': 7,
+            'name': "Morning Exercise",
+            'periodicity': "daily",
+            'creation_date': "2024-01-01T00:00:00",
+            'completions': [
+                {'date': "2024-01-01T07:00:00", 'status': "completed"},
+                {'date': "2024-01-02T07:00:00", 'status': "completed"}
+            ]
+        },
+        {'name': "", 'periodicity': "daily", 'completions': []},
+        {'name': "Broken", 'periodicity': "daily", 'check_dates': ["not a date"]}
+    ]}))
+
+    result = import_habits(habit_manager, str(path))
+    assert result['records'] == 1
+    assert sorted(index for index, _ in result['errors']) == [1, 2]
+    assert len(habit_manager.habits) == 1
+    assert existing.total_check_count == 2
+
+    # Importing the same file again doesn't duplicate completions
+    import_habits(habit_manager, str(path))
+    reloaded = HabitManager(storage_path=habit_manager.storage_path)
+    assert reloaded.habits[0].total_check_count == 2
+
+def test_parse_completion_line():
+    """Test parsing check-offs read from standard input."""
+    assert parse_completion_line("3\n") == (3, None)
+    assert parse_completion_line("3 2024-05-01T07:30:00") == (3, datetime(2024, 5, 1, 7, 30))
+    assert parse_completion_line("3,2024-05-01") == (3, datetime(2024, 5, 1))
+    for line in ("", "x", "3 yesterday", "3 2024-05-01 extra"):
+        with pytest.raises(ValueError):
+            parse_completion_line(line)
+
+def test_timezone_aware_timestamps():
+    """Test that both parsers convert timestamps with an offset to local time."""
+    stamp = "2024-05-01T07:30:00+02:00"
+    local = datetime(2024, 5, 1, 5, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert parse_completion_line(f"3 {stamp}") == (3, local)
+    record = normalize_habit_record({'name': "Read", 'periodicity': "daily",
+                                     'creation_date': stamp, 'check_dates': [stamp]})
+    assert record['creation_date'] == local
+    assert record['completion_epochs'] == [to_epoch_seconds(local)]
@@ -0,0 +1,83 @@
+import glob
+import gzip
+import json
+import os
+import time
+import pytest
+from datetime import datetime, timedelta
+from habit_tracker.utils.habit_logger import HabitLogger, RotatingLogHandler
+
+def read_events(path):
+    """Read the events of a plain or gzipped JSON log file."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as f:
+        return [json.loads(line)['event'] for line in f]
+
+def test_async_logger_writes_on_close(tmp_path):
+    """Test that queued records are all written once the logger is closed."""
+    log_file = str(tmp_path / 'habits.log')
+    logger = HabitLogger(log_file, async_mode=True)
+    for habit_id in range(100):
+        logger.log_habit_completion(habit_id, 'Read')
+    logger.log_habit_deletion(1, 'Read')
+    logger.close()
+
+    events = read_events(log_file)
+    assert len(events) == 101
+    assert events[-1] == 'deletion'
+
+def test_size_rotation_keeps_compressed_backups(tmp_path):
+    """Test that rotated files are gzipped and only backup_count of them are kept."""
+    log_file = str(tmp_path / 'habits.log')
+    logger = HabitLogger(log_file, max_bytes=500, backup_count=2, compress=True)
+    for habit_id in range(50):
+        logger.log_habit_creation(habit_id, 'Read', 'daily')
+    logger.close()
+
+    assert sorted(os.listdir(tmp_path)) == ['habits.log', 'habits.log.1.gz', 'habits.log.2.gz']
+    assert os.path.getsize(log_file) <= 500
+    assert read_events(log_file + '.1.gz')[0] == 'creation'
+
+def test_time_rotation_across_runs(tmp_path):
+    """Test that a log last written on an earlier day is rotated by the next run."""
+    log_file = str(tmp_path / 'habits.log')
+    logger = HabitLogger(log_file, when='daily')
+    logger.log_habit_creation(1, 'Read', 'daily')
+    logger.close()
+    yesterday = time.time() - 86400
+    os.utime(log_file, (yesterday, yesterday))
+
+    logger = HabitLogger(log_file, when='daily')
+    logger.log_habit_completion(1, 'Read')
+    logger.log_habit_completion(1, 'Read')
+    logger.close()
+
+    assert read_events(log_file + '.1') == ['creation']
+    assert read_events(log_file) == ['completion', 'completion']
+
+def test_rotating_handler_rejects_invalid_settings(tmp_path):
+    """Test that unknown periods and zero backups raise ValueError."""
+    with pytest.raises(ValueError):
+        RotatingLogHandler(str(tmp_path / 'habits.log'), when='monthly')
+    with pytest.raises(ValueError):
+        RotatingLogHandler(str(tmp_path / 'habits.log'), max_bytes=100, backup_count=0)
+
+@pytest.mark.parametrize('async_mode', [False, True])
+def test_batched_completions(tmp_path, async_mode):
+    """Test that a batch of completions is written in order, with rotation."""
+    log_file = str(tmp_path / 'habits.log')
+    logger = HabitLogger(log_file, async_mode=async_mode, max_bytes=2000, backup_count=10)
+    logger.log_habit_creation(1, 'Read', 'daily')
+    logger.log_habit_completions(
+        (1, 'Read', datetime(2024, 3, 1) + timedelta(days=day)) for day in range(50)
+    )
+    logger.close()
+
+    files = sorted(glob.glob(log_file + '.*'), key=lambda path: -int(path.rsplit('.', 1)[1]))
+    records = []
+    for path in files + [log_file]:
+        with open(path) as f:
+            records.extend(json.loads(line) for line in f)
+    assert len(files) > 1
+    assert [record['event'] for record in records] == ['creation'] + ['completion'] * 50
+    assert records[-1]['check_date'] == '2024-04-19T00:00:00'
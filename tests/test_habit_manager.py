@@ -1,4 +1,5 @@
 import pytest
+from datetime import datetime
 from habit_tracker.models.habit_manager import HabitManager
 
 def test_add_habit(habit_manager):
@@ -6,6 +7,7 @@ def test_add_habit(habit_manager):
     habit = habit_manager.add_habit("Test Habit", "daily")
     assert habit.name == "Test Habit"
     assert len(habit_manager.habits) == 1
+    assert habit_manager.habit_count == 1
 
 def test_max_habits(habit_manager):
     """Test maximum habits limit."""
@@ -23,6 +25,7 @@ def test_remove_habit(habit_manager):
     
     habit_manager.remove_habit(habit_id)
     assert len(habit_manager.habits) == 0
+    assert habit_manager.habit_count == 0
 
 def test_get_habits_by_periodicity(habit_manager):
     """Test filtering habits by periodicity."""
@@ -46,4 +49,59 @@ def test_data_persistence(temp_db):
     # Create second manager to load data
     manager2 = HabitManager(storage_path=temp_db)
     assert len(manager2.habits) == 1
-    assert manager2.habits[0].name == "Persistent Habit"
\ No newline at end of file
+    assert manager2.habits[0].name == "Persistent Habit"
+
+def test_configurable_capacity(temp_db):
+    """Test a custom habit limit and running without one."""
+    manager = HabitManager(storage_path=temp_db, max_habits=2)
+    manager.add_habit("Habit 1", "daily")
+    manager.add_habit("Habit 2", "daily")
+    with pytest.raises(ValueError, match="Maximum number of habits \\(2\\)"):
+        manager.add_habit("Habit 3", "daily")
+
+    unlimited = HabitManager(storage_path=temp_db, max_habits=None)
+    for i in range(20):
+        unlimited.add_habit(f"Habit {i}", "weekly")
+    assert len(unlimited.habits) == 22
+    assert len(unlimited.get_habits_by_periodicity("weekly")) == 20
+
+def test_ids_are_never_reused(temp_db):
+    """Test that removed ids stay retired across reloads and compaction."""
+    manager1 = HabitManager(storage_path=temp_db)
+    manager1.add_habit("Habit 1", "daily")
+    habit = manager1.add_habit("Habit 2", "daily")
+    manager1.remove_habit(habit.id)
+    manager1.save_data()
+
+    manager2 = HabitManager(storage_path=temp_db)
+    assert manager2.add_habit("Habit 3", "daily").id == 3
+
+def test_indexes_follow_removal(habit_manager):
+    """Test that lookups reflect removed habits."""
+    daily = habit_manager.add_habit("Daily Habit", "daily")
+    habit_manager.add_habit("Weekly Habit", "weekly")
+    assert habit_manager.get_habit_by_id(daily.id) is daily
+
+    habit_manager.remove_habit(daily.id)
+    assert habit_manager.get_habit_by_id(daily.id) is None
+    assert habit_manager.get_habits_by_periodicity("DAILY") == []
+    assert [h.name for h in habit_manager.habits] == ["Weekly Habit"]
+
+def test_complete_habits(temp_db):
+    """Test that a batch of completions is applied and persisted together."""
+    manager = HabitManager(storage_path=temp_db)
+    daily = manager.add_habit("Daily Habit", "daily")
+    weekly = manager.add_habit("Weekly Habit", "weekly")
+    manager.complete_habits([
+        (daily, datetime(2024, 3, 2, 8)),
+        (weekly, datetime(2024, 3, 2, 9)),
+        (daily, datetime(2024, 3, 1, 8)),  # backfilled out of order
+    ])
+    assert daily.total_check_count == 2
+    assert daily.streak_count == 2
+    assert daily.last_check_date == datetime(2024, 3, 2, 8)
+
+    reloaded = HabitManager(storage_path=temp_db)
+    habit = reloaded.get_habit_by_id(daily.id)
+    assert habit.completions == [datetime(2024, 3, 1, 8), datetime(2024, 3, 2, 8)]
+    assert reloaded.get_habit_by_id(weekly.id).total_check_count == 1
@@ -0,0 +1,64 @@
+from datetime import date, datetime, timedelta
+from habit_tracker.analytics import analytics, analytics_manager
+from habit_tracker.analytics.habit_metrics import analyze_completions, analyze_habit
+from habit_tracker.models.habit import Habit
+
+NOW = datetime(2024, 1, 20, 12, 0)
+
+def test_metrics_from_one_scan():
+    """Test that rate, streaks and patterns are computed together."""
+    check_dates = [
+        datetime(2024, 1, 19, 23, 0),  # night
+        datetime(2024, 1, 18, 8, 0),   # morning
+        datetime(2024, 1, 18, 13, 0),  # afternoon, same day
+        datetime(2024, 1, 12, 20, 0),  # evening
+        datetime(2024, 1, 11, 3, 0),   # night
+        datetime(2024, 1, 10, 9, 0),   # morning
+    ]
+    metrics = analyze_completions(check_dates, 'daily', datetime(2024, 1, 10), now=NOW)
+
+    assert metrics['completed_days'] == 5
+    assert metrics['elapsed_days'] == 10
+    assert metrics['completion_rate'] == 50.0
+    assert metrics['current_streak'] == 2
+    assert metrics['max_streak'] == 3
+    assert metrics['avg_streak'] == 2.5
+    assert metrics['patterns'] == {'morning': 2, 'afternoon': 1, 'evening': 1, 'night': 2}
+
+def test_streaks_end_after_a_missed_period():
+    """Test that the current streak is only kept while the last period is recent."""
+    daily = [datetime(2024, 1, 15), datetime(2024, 1, 16)]
+    assert analyze_completions(daily, 'daily', now=NOW)['current_streak'] == 0
+
+    # 2024-01-01, 2024-01-08 and 2024-01-15 fall in consecutive ISO weeks
+    weekly = [date(2024, 1, 1), date(2024, 1, 10), date(2024, 1, 11), date(2024, 1, 15)]
+    metrics = analyze_completions(weekly, 'weekly', now=NOW)
+    assert metrics['current_streak'] == 3
+    assert metrics['max_streak'] == 3
+    assert metrics['completion_rate'] is None
+
+def test_analyze_habit_matches_completions():
+    """Test that analyzing a habit's stored history matches analyzing its dates."""
+    habit = Habit(1, "Read", "daily", creation_date=datetime(2024, 1, 1))
+    for day in (3, 1, 2, 2, 7):
+        habit.check_off(datetime(2024, 1, day, 7 + day))
+
+    assert analyze_habit(habit, now=NOW) == analyze_completions(
+        habit.completions, 'daily', habit.creation_date, now=NOW
+    )
+
+def test_wrappers_use_their_buckets():
+    """Test that both analytics modules keep their own time-of-day buckets."""
+    check_dates = [datetime(2024, 1, 1, 5, 30), datetime(2024, 1, 1, 17, 30)]
+    assert analytics.get_habit_patterns(check_dates) == {
+        'morning': 0, 'afternoon': 1, 'evening': 0, 'night': 1
+    }
+    assert analytics_manager.get_habit_patterns(check_dates) == {
+        'morning': 1, 'afternoon': 0, 'evening': 1, 'night': 0
+    }
+    assert analytics_manager.get_streak_analysis([], 'daily') == {
+        'current_streak': 0, 'max_streak': 0, 'avg_streak': 0.0
+    }
+    assert analytics.get_streak_analysis([datetime.now() - timedelta(days=3)], 'daily') == {
+        'current_streak': 0, 'longest_streak': 1
+    }
@@ -0,0 +1,113 @@
+import json
+import threading
+from datetime import datetime
+from habit_tracker.models.habit_manager import HabitManager
+
+def test_mutations_are_journaled(temp_db):
+    """Test that mutations append to the journal instead of rewriting the snapshot."""
+    manager = HabitManager(storage_path=temp_db)
+    with open(temp_db) as f:
+        snapshot_before = f.read()
+
+    habit = manager.add_habit("Journaled Habit", "daily")
+    manager.complete_habit(habit)
+
+    with open(temp_db) as f:
+        assert f.read() == snapshot_before
+    with open(temp_db + '.journal') as f:
+        ops = [json.loads(line)['op'] for line in f]
+    assert ops == ['add', 'check']
+
+def test_journal_replay(temp_db):
+    """Test that loading replays the journal on top of the snapshot."""
+    manager1 = HabitManager(storage_path=temp_db)
+    habit = manager1.add_habit("Replayed Habit", "daily")
+    manager1.add_habit("Removed Habit", "weekly")
+    manager1.complete_habit(habit, datetime(2024, 3, 1, 8, 0))
+    manager1.remove_habit(2)
+
+    manager2 = HabitManager(storage_path=temp_db)
+    assert len(manager2.habits) == 1
+    assert manager2.habits[0].total_check_count == 1
+    assert manager2.habits[0].last_check_date == datetime(2024, 3, 1, 8, 0)
+    assert manager2.habits[0].completions == [datetime(2024, 3, 1, 8, 0)]
+
+def test_compaction(temp_db):
+    """Test that the journal is folded into the snapshot past the threshold."""
+    manager1 = HabitManager(storage_path=temp_db, compact_threshold=3)
+    habit = manager1.add_habit("Compacted Habit", "daily")
+    manager1.complete_habit(habit)
+    manager1.complete_habit(habit)
+
+    with open(temp_db + '.journal') as f:
+        assert f.read() == ''
+    manager2 = HabitManager(storage_path=temp_db)
+    assert manager2.habits[0].total_check_count == 2
+
+def test_interrupted_compaction_is_not_replayed_twice(temp_db):
+    """Test that records already in the snapshot are skipped on replay."""
+    manager1 = HabitManager(storage_path=temp_db)
+    habit = manager1.add_habit("Test Habit", "daily")
+    manager1.complete_habit(habit)
+    with open(temp_db + '.journal') as f:
+        journal = f.read()
+
+    # Simulate a crash after the snapshot was written but before truncation
+    manager1.save_data()
+    with open(temp_db + '.journal', 'w') as f:
+        f.write(journal)
+
+    manager2 = HabitManager(storage_path=temp_db)
+    assert len(manager2.habits) == 1
+    assert manager2.habits[0].total_check_count == 1
+
+def test_torn_journal_tail_is_discarded(temp_db):
+    """Test that a partially written last record is dropped."""
+    manager1 = HabitManager(storage_path=temp_db)
+    manager1.add_habit("Test Habit", "daily")
+    with open(temp_db + '.journal', 'a') as f:
+        f.write('{"seq":2,"op":"rem')
+
+    manager2 = HabitManager(storage_path=temp_db)
+    assert len(manager2.habits) == 1
+    manager2.add_habit("Second Habit", "weekly")
+
+    manager3 = HabitManager(storage_path=temp_db)
+    assert len(manager3.habits) == 2
+
+def test_group_commit_coalesces_concurrent_completions(temp_db):
+    """Test that concurrent completions share journal writes and are all durable."""
+    manager = HabitManager(storage_path=temp_db, group_commit_window=0.05)
+    habits = [manager.add_habit(f"Habit {i}", "daily") for i in range(4)]
+    batches_before = manager.storage._group_log.batches_written
+
+    def complete_many(habit):
+        for day in range(1, 11):
+            manager.complete_habit(habit, datetime(2024, 1, day, 8, 0))
+
+    threads = [threading.Thread(target=complete_many, args=(habit,)) for habit in habits]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every call returned only after its batch was flushed
+    with open(temp_db + '.journal') as f:
+        assert sum(1 for line in f if '"op":"check"' in line) == 40
+    assert manager.storage._group_log.batches_written - batches_before < 40
+    manager.close()
+
+    reloaded = HabitManager(storage_path=temp_db)
+    assert [h.total_check_count for h in reloaded.habits] == [10, 10, 10, 10]
+    assert all(h.longest_streak == 10 for h in reloaded.habits)
+
+def test_group_commit_compaction_flushes_queue(temp_db):
+    """Test that compaction waits for queued records before truncating the journal."""
+    manager = HabitManager(storage_path=temp_db, compact_threshold=5, group_commit_window=0.01)
+    habit = manager.add_habit("Compacted Habit", "daily")
+    for day in range(1, 8):
+        manager.complete_habit(habit, datetime(2024, 1, day))
+    manager.close()
+
+    reloaded = HabitManager(storage_path=temp_db)
+    assert reloaded.habits[0].total_check_count == 7
@@ -0,0 +1,70 @@
+import json
+import os
+from datetime import datetime, timedelta
+from habit_tracker.utils.habit_logger import HabitLogger
+from habit_tracker.utils.log_index import LogIndex, find_log_files, load_index, query_log
+
+START = datetime(2024, 1, 1, 7, 30)
+
+def write_completions(logger, days=90):
+    """Log completions of three habits, one per day each."""
+    for day in range(days):
+        for habit_id in (1, 2, 3):
+            logger.log_habit_completion(habit_id, f"Habit {habit_id}",
+                                        START + timedelta(days=day, hours=habit_id))
+
+def scan(log_file, habit_id, since, until):
+    """Find matching completions by reading every log line."""
+    import gzip
+    matches = []
+    for path in find_log_files(log_file):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt') as f:
+            for line in f:
+                record = json.loads(line)
+                check_date = datetime.fromisoformat(record['check_date'])
+                if int(record['habit_id']) == habit_id and since <= check_date < until:
+                    matches.append(record)
+    return matches
+
+def test_index_blocks_and_query(tmp_path):
+    """Test that the index covers complete blocks and queries match a full scan."""
+    log_file = str(tmp_path / 'habits.log')
+    logger = HabitLogger(log_file)
+    write_completions(logger)
+    logger.close()
+
+    index = LogIndex(log_file, block_bytes=2000)
+    index.update()
+    entries = load_index(log_file)
+    assert len(entries) > 5
+    assert entries[0]['start'] == 0
+    assert all(a['end'] == b['start'] for a, b in zip(entries, entries[1:]))
+    assert entries[0]['ids'] == [1, 2, 3] and entries[0]['events'] == ['completion']
+    assert index.indexed_end == entries[-1]['end'] <= os.path.getsize(log_file)
+
+    since, until = datetime(2024, 3, 1), datetime(2024, 3, 11)
+    records = list(query_log(log_file, habit_id=2, since=since, until=until, event='completion'))
+    assert len(records) == 10
+    assert records == scan(log_file, 2, since, until)
+    assert list(query_log(log_file, event='deletion')) == []
+
+def test_index_follows_appends_and_rotation(tmp_path):
+    """Test that the logger extends the index and rotates it with the backups."""
+    log_file = str(tmp_path / 'habits.log')
+    logger = HabitLogger(log_file, max_bytes=20000, backup_count=10, compress=True, index=True)
+    logger.file_handler.index.block_bytes = 1500
+    write_completions(logger, days=120)
+    logger.close()
+
+    backups = find_log_files(log_file)[:-1]
+    assert backups and all(path.endswith('.gz') for path in backups)
+    for path in backups:
+        assert load_index(path)
+    # A backup's index ends where its uncompressed contents end
+    assert load_index(backups[-1])[-1]['end'] > 19000
+
+    since, until = datetime(2024, 2, 1), datetime(2024, 4, 15)
+    records = list(query_log(log_file, habit_id=3, since=since, until=until))
+    assert records == scan(log_file, 3, since, until)
+    assert len(records) == 74
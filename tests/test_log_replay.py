@@ -0,0 +1,115 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from click.testing import CliRunner
+from habit_tracker import cli as cli_module
+from habit_tracker.models.habit_manager import HabitManager
+from habit_tracker.utils import log_replay
+from habit_tracker.utils.habit_logger import HabitLogger
+from habit_tracker.utils.log_replay import find_log_files, replay_logs
+
+START = datetime(2024, 1, 1, 7, 30)
+
+def write_history(log_file, days=60, **options):
+    """Log three habits, daily completions and one deletion."""
+    logger = HabitLogger(log_file, **options)
+    logger.log_habit_creation(1, 'Read', 'daily', START)
+    logger.log_habit_creation(2, 'Run', 'weekly', START)
+    logger.log_habit_creation(3, 'Gone', 'daily', START)
+    for day in range(days):
+        logger.log_habit_completion(1, 'Read', START + timedelta(days=day))
+        if day % 7 == 0:
+            logger.log_habit_completion(2, 'Run', START + timedelta(days=day, hours=2))
+    logger.log_habit_deletion(3, 'Gone')
+    logger.close()
+
+def histories(storage_path):
+    """Load a store and map habit names to their completion times."""
+    manager = HabitManager(storage_path=storage_path, max_habits=None)
+    return {habit.name: (habit.periodicity, habit.completions) for habit in manager.habits}
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_replay_rotated_logs(tmp_path, workers):
+    """Test that rotated, compressed and current logs are replayed in order."""
+    log_file = str(tmp_path / 'habits.log')
+    write_history(log_file, max_bytes=2000, backup_count=50, compress=True)
+    assert len(find_log_files(log_file)) > 3
+
+    store = str(tmp_path / 'restored.json')
+    result = replay_logs(log_file, store, workers=workers, chunk_bytes=256)
+    assert result['events'] == 3 + 60 + 9 + 1
+    assert result['habits'] == 2
+    assert result['skipped'] == result['invalid'] == 0
+
+    restored = histories(store)
+    assert restored['Read'] == ('daily', [START + timedelta(days=day) for day in range(60)])
+    assert restored['Run'][1] == [START + timedelta(days=day, hours=2) for day in range(0, 60, 7)]
+    assert not (tmp_path / 'restored.json.rebuild.json').exists()
+
+def test_replay_resumes_from_checkpoint(tmp_path, monkeypatch):
+    """Test that an interrupted rebuild continues without replaying events twice."""
+    log_file = str(tmp_path / 'habits.log')
+    write_history(log_file, days=10)
+    store = str(tmp_path / 'restored.json')
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('interrupted')
+    monkeypatch.setattr(log_replay, 'create_storage', fail)
+    with pytest.raises(RuntimeError):
+        replay_logs(log_file, store, workers=1, checkpoint_every=5)
+    monkeypatch.undo()
+
+    # Events logged after the interruption, plus a line still being written
+    logger = HabitLogger(log_file)
+    logger.log_habit_completion(1, 'Read', START + timedelta(days=10))
+    logger.close()
+    with open(log_file, 'a') as f:
+        f.write('{"event": "completion", "habit_id": "1"')
+
+    result = replay_logs(log_file, store, workers=1)
+    assert result['events'] == 3 + 10 + 2 + 1 + 1
+    assert histories(store)['Read'][1][-1] == START + timedelta(days=10)
+
+def test_replay_ignores_unknown_habits_and_bad_lines(tmp_path):
+    """Test that events for habits never created and invalid lines are counted."""
+    log_file = str(tmp_path / 'habits.log')
+    logger = HabitLogger(log_file)
+    logger.log_habit_completion(7, 'Unknown')
+    logger.log_habit_creation(1, 'Read', 'monthly')
+    logger.close()
+    with open(log_file, 'a') as f:
+        f.write('not json\n')
+
+    result = replay_logs(log_file, str(tmp_path / 'restored.json'), workers=1)
+    assert result['habits'] == 0
+    assert result['skipped'] == 1
+    assert result['invalid'] == 2
+
+def test_rebuild_after_import_into_existing_habit(tmp_path, monkeypatch):
+    """Test that completions imported into an existing habit are restored by rebuild."""
+    for name in ('_habit_manager', '_habit_logger', '_analytics_cache'):
+        monkeypatch.setattr(cli_module, name, None)
+    for name in ('_storage_path', '_max_habits', '_persist_analytics', '_log_options'):
+        monkeypatch.setattr(cli_module, name, getattr(cli_module, name))
+    store, log_file = str(tmp_path / 'habits.json'), str(tmp_path / 'habits.log')
+    import_file = tmp_path / 'import.json'
+    import_file.write_text(json.dumps([
+        {'name': "Read", 'periodicity': "daily",
+         'check_dates': ["2024-01-01T07:30:00", "2024-01-02T07:30:00"]},
+        {'name': "Run", 'periodicity': "weekly", 'check_dates': ["2024-01-03T18:00:00"]}
+    ]))
+
+    def run(*args, storage=store):
+        result = CliRunner().invoke(cli_module.cli, ['--storage', storage, '--log-file', log_file,
+                                                     '--log-sync', *args])
+        assert result.exit_code == 0, result.output
+        cli_module._close_habit_manager()
+        return result
+
+    run('add', '--name', 'Read', '--periodicity', 'daily')
+    run('import', str(import_file))
+    restored = str(tmp_path / 'restored.json')
+    run('rebuild', storage=restored)
+    assert histories(restored) == histories(store)
+    assert len(histories(restored)['Read'][1]) == 2
+    cli_module.get_habit_logger().close()
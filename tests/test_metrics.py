@@ -0,0 +1,121 @@
+import urllib.error
+import urllib.request
+from datetime import datetime
+import pytest
+from click.testing import CliRunner
+from habit_tracker import cli as cli_module
+from habit_tracker.models.habit_manager import HabitManager
+from habit_tracker.utils import metrics
+from habit_tracker.utils.metrics import MetricsRegistry, MetricsServer, observed, textfile_session
+
+@observed('work')
+def work(fail=False):
+    """Do nothing, or fail."""
+    if fail:
+        raise ValueError("failed")
+    return 'done'
+
+@pytest.fixture
+def registry():
+    """Record operations into a fresh registry."""
+    registry = metrics.enable(MetricsRegistry(buckets=(0.5, 1.0)))
+    yield registry
+    metrics.disable()
+
+def test_observed_operations(registry):
+    """Test that calls and errors are counted into the histogram."""
+    assert work() == 'done'
+    with pytest.raises(ValueError):
+        work(fail=True)
+    registry.observe('work', 0.75)
+    registry.observe('work', 2.0)
+    text = registry.render()
+    assert 'habit_tracker_operations_total{operation="work"} 4' in text
+    assert 'habit_tracker_operation_errors_total{operation="work"} 1' in text
+    assert 'habit_tracker_operation_duration_seconds_bucket{operation="work",le="0.5"} 2' in text
+    assert 'habit_tracker_operation_duration_seconds_bucket{operation="work",le="1.0"} 3' in text
+    assert 'habit_tracker_operation_duration_seconds_bucket{operation="work",le="+Inf"} 4' in text
+    assert 'habit_tracker_operation_duration_seconds_count{operation="work"} 4' in text
+    assert '# TYPE habit_tracker_operation_duration_seconds histogram' in text
+
+def test_disabled_metrics_record_nothing():
+    """Test that hooks record nothing without an enabled registry."""
+    registry = MetricsRegistry()
+    assert work() == 'done'
+    assert registry.operations == {}
+    with pytest.raises(ValueError):
+        MetricsRegistry(buckets=(1.0, 0.5))
+
+def test_textfile_accumulates(tmp_path):
+    """Test that one-shot runs add up in the textfile and keep gauges they can't read."""
+    path = str(tmp_path / 'metrics' / 'habits.prom')
+    for habits in (3, None):
+        with textfile_session(path) as registry:
+            registry.add_gauge('habit_tracker_habits', 'Number of habits.', lambda: habits)
+            work()
+            registry.observe('work', 0.002)
+    with open(path) as f:
+        text = f.read()
+    assert 'habit_tracker_operations_total{operation="work"} 4' in text
+    assert 'habit_tracker_operation_duration_seconds_bucket{operation="work",le="0.0025"} 4' in text
+    assert 'habit_tracker_habits 3' in text
+    assert metrics._registry is None
+
+def test_metrics_server(registry):
+    """Test serving the metrics over HTTP."""
+    server = MetricsServer(registry, 0)
+    server.start()
+    try:
+        registry.add_gauge('habit_tracker_habits', 'Number of habits.', lambda: 2)
+        work()
+        url = f"http://{server.host}:{server.port}"
+        with urllib.request.urlopen(url + '/metrics') as response:
+            assert response.headers['Content-Type'] == metrics.CONTENT_TYPE
+            body = response.read().decode('utf-8')
+        assert 'habit_tracker_operations_total{operation="work"} 1' in body
+        assert 'habit_tracker_habits 2' in body
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + '/other')
+    finally:
+        server.close()
+
+def test_cli_metrics_textfile(tmp_path, monkeypatch):
+    """Test that --metrics-textfile reports the operations and gauges of a command."""
+    for name in ('_habit_manager', '_habit_logger', '_analytics_cache'):
+        monkeypatch.setattr(cli_module, name, None)
+    for name in ('_storage_path', '_max_habits', '_persist_analytics', '_log_options'):
+        monkeypatch.setattr(cli_module, name, getattr(cli_module, name))
+    textfile = str(tmp_path / 'habits.prom')
+    result = CliRunner().invoke(cli_module.cli, [
+        '--storage', str(tmp_path / 'habits.json'), '--log-file', str(tmp_path / 'habits.log'),
+        '--log-sync', '--metrics-textfile', textfile,
+        'add', '--name', 'Read', '--periodicity', 'daily'
+    ])
+    assert result.exit_code == 0
+    with open(textfile) as f:
+        text = f.read()
+    for operation in ('load_data', 'add_habit'):
+        assert f'habit_tracker_operations_total{{operation="{operation}"}} 1' in text
+    assert 'habit_tracker_habits 1' in text
+    assert 'habit_tracker_store_bytes' in text and 'habit_tracker_log_bytes' in text
+    cli_module.get_habit_logger().close()
+
+def test_batch_check_off_counts_completions(registry, temp_db, tmp_path):
+    """Test that a batch check-off is one operation but counts every completion."""
+    manager = HabitManager(storage_path=temp_db)
+    daily = manager.add_habit("Daily Habit", "daily")
+    weekly = manager.add_habit("Weekly Habit", "weekly")
+    manager.complete_habits([(daily, datetime(2024, 3, 1, 8)), (daily, datetime(2024, 3, 2, 8)),
+                             (weekly, datetime(2024, 3, 2, 9))])
+    manager.complete_habit(daily, datetime(2024, 3, 3, 8))
+    text = registry.render()
+    assert 'habit_tracker_operations_total{operation="check_off_batch"} 1' in text
+    assert 'habit_tracker_operations_total{operation="check_off"} 1' in text
+    assert '# TYPE habit_tracker_completions_total counter' in text
+    assert 'habit_tracker_completions_total 4' in text
+
+    path = str(tmp_path / 'habits.prom')
+    registry.write_textfile(path)
+    registry.write_textfile(path)
+    with open(path) as f:
+        assert 'habit_tracker_completions_total 8' in f.read()
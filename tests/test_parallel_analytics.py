@@ -0,0 +1,51 @@
+import pytest
+from datetime import datetime, timedelta
+from habit_tracker.analytics.analytics_manager import analyze_habit_trends, get_completion_rate
+from habit_tracker.analytics.parallel_analytics import analyze_habits_parallel
+from habit_tracker.models.habit import Habit
+
+@pytest.fixture
+def habits():
+    """Create weekly and daily habits with varied histories."""
+    now = datetime.now()
+    habits = []
+    for i in range(9):
+        habit = Habit(id=i + 1, name=f"Habit {i}", periodicity='weekly' if i % 3 == 0 else 'daily',
+                      creation_date=now - timedelta(days=30 + i))
+        # Some days get two completions, which count once
+        habit.completions = [now - timedelta(days=d, hours=h) for d in range(0, 30, i + 1) for h in (0, 1)]
+        habits.append(habit)
+    habits.append(Habit(id=10, name="Never Done", periodicity='daily', creation_date=now))
+    return habits
+
+def serial_analysis(habits):
+    """Analyze habits one by one with the analytics_manager functions."""
+    habits_data = [{
+        'name': h.name,
+        'periodicity': h.periodicity,
+        'completion_rate': get_completion_rate(h.completions, h.periodicity, h.creation_date)
+    } for h in habits]
+    return habits_data, analyze_habit_trends(habits_data)
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parallel_matches_serial(habits, workers):
+    """Test that the chunked analysis gives the same results as the serial one."""
+    habits_data, trends = serial_analysis(habits)
+    result = analyze_habits_parallel(habits, workers=workers, chunk_size=3)
+
+    assert result['completion_rates'] == pytest.approx([h['completion_rate'] for h in habits_data])
+    assert result['trends']['most_successful'] == trends['most_successful']
+    assert result['trends']['least_successful'] == trends['least_successful']
+    assert result['trends']['total_habits'] == len(habits)
+    assert list(result['trends']['by_periodicity']) == list(trends['by_periodicity'])
+    for periodicity, stats in trends['by_periodicity'].items():
+        merged = result['trends']['by_periodicity'][periodicity]
+        assert merged['count'] == stats['count']
+        assert merged['avg_completion_rate'] == pytest.approx(stats['avg_completion_rate'])
+
+def test_parallel_no_habits():
+    """Test analyzing an empty list of habits."""
+    result = analyze_habits_parallel([], workers=2)
+    assert result['completion_rates'] == []
+    assert result['trends']['most_successful'] is None
+    assert result['trends']['by_periodicity'] == {}
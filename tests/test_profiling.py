@@ -0,0 +1,77 @@
+import json
+import pstats
+import time
+import pytest
+from click.testing import CliRunner
+from habit_tracker import cli as cli_module
+from habit_tracker.utils.profiling import Profiler, phase, profile_session, profiled
+
+@profiled('work')
+def work(seconds):
+    """Sleep inside a profiled function."""
+    time.sleep(seconds)
+    return seconds
+
+def test_phases_are_exclusive():
+    """Test that nested phases are not counted again for the outer phase."""
+    profiler = Profiler()
+    profiler.start()
+    try:
+        with phase('outer'):
+            time.sleep(0.02)
+            assert work(0.03) == 0.03
+    finally:
+        profiler.stop()
+    outer, work_total = profiler.totals['outer'], profiler.totals['work']
+    assert work_total[1] == 1 and work_total[0] >= 0.03
+    assert 0.02 <= outer[0] < 0.03
+    assert [span[0] for span in profiler.spans] == ['work', 'outer']
+    assert 'outer' in profiler.summary()
+
+def test_inactive_hooks_do_nothing():
+    """Test that hooks record nothing without a running profiler."""
+    profiler = Profiler()
+    with phase('ignored'):
+        assert work(0) == 0
+    assert profiler.spans == []
+    with pytest.raises(ValueError):
+        profiler.dump_stats('unused.prof')
+
+def test_profile_session_outputs(tmp_path, capsys):
+    """Test the summary, the pstats file and the Chrome trace of a session."""
+    stats_path, trace_path = str(tmp_path / 'run.prof'), str(tmp_path / 'run.json')
+    with profile_session(stats_path, trace_path, started=time.perf_counter()) as profiler:
+        work(0.001)
+        # Nested sessions leave the outer one in charge
+        with profile_session() as inner:
+            assert inner is None
+            work(0.001)
+    assert profiler.totals['work'][1] == 2
+    summary = capsys.readouterr().err
+    assert summary.startswith('Profile:')
+    assert 'work' in summary and 'import' in summary
+
+    assert pstats.Stats(stats_path).total_calls > 0
+    with open(trace_path) as f:
+        events = json.load(f)['traceEvents']
+    assert [event['name'] for event in events] == ['import', 'work', 'work']
+    assert all(event['ph'] == 'X' and event['ts'] >= 0 for event in events)
+
+def test_cli_profile_option(tmp_path, monkeypatch):
+    """Test that --profile reports the phases of a command."""
+    for name in ('_habit_manager', '_habit_logger', '_analytics_cache'):
+        monkeypatch.setattr(cli_module, name, None)
+    for name in ('_storage_path', '_max_habits', '_persist_analytics', '_log_options'):
+        monkeypatch.setattr(cli_module, name, getattr(cli_module, name))
+    trace_path = str(tmp_path / 'trace.json')
+    result = CliRunner().invoke(cli_module.cli, [
+        '--storage', str(tmp_path / 'habits.json'), '--log-file', str(tmp_path / 'habits.log'),
+        '--log-sync', '--profile',
+        '--trace-output', trace_path, 'add', '--name', 'Read', '--periodicity', 'daily'
+    ])
+    assert result.exit_code == 0
+    for name in ('load_data', 'validation', 'mutation', 'save_data', 'logging', 'rendering'):
+        assert name in result.stderr
+    with open(trace_path) as f:
+        assert json.load(f)['traceEvents']
+    cli_module.get_habit_logger().close()
@@ -0,0 +1,74 @@
+from datetime import date, datetime
+from habit_tracker.analytics.rollups import CompletionRollups
+from habit_tracker.models.habit_manager import HabitManager
+
+def counts(rollups):
+    """Get the count tables of rollups for comparison."""
+    return rollups.days, rollups.weeks
+
+def rebuilt(habit_manager):
+    """Build rollups from scratch for the manager's habits."""
+    rollups = CompletionRollups()
+    rollups.rebuild(habit_manager.habits)
+    return rollups
+
+def test_rollups_follow_completions(habit_manager):
+    """Test that completions are counted per day, ISO week and periodicity."""
+    daily = habit_manager.add_habit("Daily", "daily")
+    weekly = habit_manager.add_habit("Weekly", "weekly")
+    rollups = habit_manager.rollups
+    # 2024-01-01 is a Monday
+    for day in (1, 2, 2, 8):
+        habit_manager.complete_habit(daily, datetime(2024, 1, day, 9, 0))
+    habit_manager.complete_habit(weekly, datetime(2024, 1, 3))
+
+    assert rollups.count_completions(date(2024, 1, 1), date(2024, 1, 8)) == 4
+    assert rollups.count_completions(date(2024, 1, 1), date(2024, 1, 8), 'weekly') == 1
+    assert rollups.daily_counts(date(2024, 1, 1), date(2024, 1, 4), 'daily') == [
+        (date(2024, 1, 1), 1), (date(2024, 1, 2), 2), (date(2024, 1, 3), 0)
+    ]
+    assert rollups.weekly_counts(date(2024, 1, 3), date(2024, 1, 9)) == [
+        (date(2024, 1, 1), 4), (date(2024, 1, 8), 1)
+    ]
+
+    breakdown = rollups.periodicity_breakdown(date(2024, 1, 1), date(2024, 1, 15))
+    assert breakdown['daily'] == {'count': 1, 'completions': 4, 'avg_completion_rate': 4 / 14 * 100}
+    assert breakdown['weekly']['avg_completion_rate'] == 50.0
+
+    habit_manager.remove_habit(daily.id)
+    assert rollups.count_completions(date(2024, 1, 1), date(2024, 2, 1)) == 1
+    assert counts(rollups) == counts(rebuilt(habit_manager))
+
+def test_rollups_catch_up_with_journal(temp_db):
+    """Test that saved rollups count completions recorded while they weren't loaded."""
+    manager = HabitManager(storage_path=temp_db)
+    habit = manager.add_habit("Caught Up", "daily")
+    manager.complete_habit(habit, datetime(2024, 1, 1))
+    manager.rollups
+    manager.save_rollups()
+
+    # Completions journaled by a run that never loaded the rollups
+    other = HabitManager(storage_path=temp_db)
+    other.complete_habit(other.habits[0], datetime(2024, 1, 2))
+    other.add_habit("New", "weekly")
+
+    reloaded = HabitManager(storage_path=temp_db)
+    rollups = CompletionRollups.load(reloaded.rollups_path)
+    assert rollups.count_completions(date(2024, 1, 1), date(2024, 1, 3)) == 1
+    assert reloaded.rollups.count_completions(date(2024, 1, 1), date(2024, 1, 3)) == 2
+    assert counts(reloaded.rollups) == counts(rebuilt(reloaded))
+
+def test_rollups_rebuild_after_backfill(temp_db):
+    """Test that a completion inserted before counted ones triggers a rebuild."""
+    manager = HabitManager(storage_path=temp_db)
+    habit = manager.add_habit("Backfilled", "daily")
+    manager.complete_habit(habit, datetime(2024, 1, 5))
+    manager.rollups
+    manager.save_rollups()
+
+    other = HabitManager(storage_path=temp_db)
+    other.complete_habit(other.habits[0], datetime(2024, 1, 1))
+
+    reloaded = HabitManager(storage_path=temp_db)
+    assert reloaded.rollups.daily_counts(date(2024, 1, 1), date(2024, 1, 2)) == [(date(2024, 1, 1), 1)]
+    assert counts(reloaded.rollups) == counts(rebuilt(reloaded))
@@ -0,0 +1,120 @@
+import sqlite3
+import pytest
+from datetime import datetime
+from habit_tracker.models.habit_manager import HabitManager
+from habit_tracker.storage.storage_factory import parse_storage_path
+
+@pytest.fixture
+def sqlite_manager(tmp_path):
+    """Create a HabitManager backed by a temporary SQLite database."""
+    manager = HabitManager(storage_path=f"sqlite://{tmp_path / 'habits.db'}")
+    yield manager
+    manager.close()
+
+def test_parse_storage_path():
+    """Test backend selection by scheme and extension."""
+    assert parse_storage_path('data/habits_data.json') == ('json', 'data/habits_data.json')
+    assert parse_storage_path('data/habits.db') == ('sqlite', 'data/habits.db')
+    assert parse_storage_path('sqlite:///tmp/habits') == ('sqlite', '/tmp/habits')
+    assert parse_storage_path('json://habits.db') == ('json', 'habits.db')
+    with pytest.raises(ValueError):
+        parse_storage_path('redis://localhost')
+
+def test_sqlite_persistence(tmp_path):
+    """Test that habits and completions survive a reload."""
+    db_path = str(tmp_path / 'habits.db')
+    manager1 = HabitManager(storage_path=db_path)
+    habit = manager1.add_habit("Persistent Habit", "daily")
+    manager1.add_habit("Removed Habit", "weekly")
+    manager1.complete_habit(habit, datetime(2024, 3, 1, 8, 0))
+    manager1.remove_habit(2)
+    manager1.close()
+
+    manager2 = HabitManager(storage_path=db_path)
+    assert len(manager2.habits) == 1
+    assert manager2.habits[0].name == "Persistent Habit"
+    assert manager2.habits[0].total_check_count == 1
+    assert manager2.habits[0].last_check_date == datetime(2024, 3, 1, 8, 0)
+    assert manager2.habits[0].completions == [datetime(2024, 3, 1, 8, 0)]
+    manager2.close()
+
+    connection = sqlite3.connect(db_path)
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert connection.execute("SELECT COUNT(*) FROM completions").fetchone()[0] == 1
+    connection.close()
+
+def test_sqlite_completion_range(sqlite_manager):
+    """Test date-range queries over the completion history."""
+    habit = sqlite_manager.add_habit("Test Habit", "daily")
+    for day in range(1, 6):
+        sqlite_manager.complete_habit(habit, datetime(2024, 3, day, 8, 0))
+
+    completions = sqlite_manager.get_completions(
+        habit.id, datetime(2024, 3, 2), datetime(2024, 3, 4)
+    )
+    assert completions == [datetime(2024, 3, 2, 8, 0), datetime(2024, 3, 3, 8, 0)]
+    assert sqlite_manager.storage.get_completions(
+        habit.id, datetime(2024, 3, 2), datetime(2024, 3, 4)
+    ) == completions
+    assert len(sqlite_manager.get_completions(habit.id)) == 5
+
+def test_sqlite_save_data(sqlite_manager):
+    """Test that a full save drops habits that are no longer tracked."""
+    sqlite_manager.add_habit("Kept Habit", "daily")
+    sqlite_manager.add_habit("Dropped Habit", "daily")
+    sqlite_manager.habits = sqlite_manager.habits[:1]
+    sqlite_manager.save_data()
+    sqlite_manager.load_data()
+    assert [h.name for h in sqlite_manager.habits] == ["Kept Habit"]
+
+def test_sqlite_ids_are_never_reused(tmp_path):
+    """Test that the id allocator is persisted in the database."""
+    db_path = str(tmp_path / 'habits.db')
+    manager1 = HabitManager(storage_path=db_path)
+    manager1.add_habit("Habit 1", "daily")
+    manager1.remove_habit(manager1.add_habit("Habit 2", "daily").id)
+    manager1.close()
+
+    manager2 = HabitManager(storage_path=db_path)
+    assert manager2.add_habit("Habit 3", "daily").id == 3
+    manager2.close()
+
+def test_sqlite_adds_version_column(tmp_path):
+    """Test that databases without the version column are migrated."""
+    db_path = str(tmp_path / 'old.db')
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE habits (id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+        "periodicity TEXT NOT NULL, creation_date TEXT NOT NULL, last_check_date TEXT, "
+        "is_active INTEGER NOT NULL, streak_count INTEGER NOT NULL, "
+        "longest_streak INTEGER NOT NULL, last_period INTEGER, "
+        "total_check_count INTEGER NOT NULL)"
+    )
+    connection.commit()
+    connection.close()
+
+    manager = HabitManager(storage_path=db_path)
+    habit = manager.add_habit("Migrated", "daily")
+    manager.complete_habit(habit, datetime(2024, 1, 1))
+    manager.close()
+    reloaded = HabitManager(storage_path=db_path)
+    assert reloaded.habits[0].version == 1
+    reloaded.close()
+
+def test_sqlite_complete_habits(tmp_path):
+    """Test that batched completions are stored in one transaction."""
+    db_path = str(tmp_path / 'habits.db')
+    manager = HabitManager(storage_path=db_path)
+    first = manager.add_habit("First", "daily")
+    second = manager.add_habit("Second", "daily")
+    manager.complete_habits([(first, datetime(2024, 3, day, 8)) for day in (1, 2, 3)]
+                            + [(second, datetime(2024, 3, 3, 9))])
+    manager.close()
+
+    reloaded = HabitManager(storage_path=db_path)
+    habit = reloaded.get_habit_by_id(first.id)
+    assert habit.total_check_count == 3
+    assert habit.streak_count == 3
+    assert habit.last_check_date == datetime(2024, 3, 3, 8)
+    assert reloaded.get_habit_by_id(second.id).completions == [datetime(2024, 3, 3, 9)]
+    reloaded.close()
@@ -0,0 +1,107 @@
+import numpy as np
+from datetime import datetime, timedelta
+from habit_tracker.models.habit import Habit
+from habit_tracker.utils.streak_calculator import StreakCalculator
+from habit_tracker.utils.time_utils import FixedClock, set_clock
+
+def test_streaks_batch():
+    """Test streak calculation over flat ordinal arrays."""
+    ordinals = [
+        1, 2, 3, 5, 6,      # habit 0: longest 3, current 2
+        10, 10, 11,         # habit 1: repeated period counts once
+        4, 8,               # habit 2: a whole period passed since the last completion
+    ]
+    offsets = [0, 5, 8, 8, 10]  # habit 3 (index 2) has no completions
+
+    current, longest = StreakCalculator.calculate_streaks_batch(
+        ordinals, offsets, [6, 11, 11, 10]
+    )
+    assert current.tolist() == [2, 2, 0, 0]
+    assert longest.tolist() == [3, 2, 0, 1]
+
+def test_streaks_batch_empty():
+    """Test batch calculation without any completions."""
+    current, longest = StreakCalculator.calculate_streaks_batch([], [0, 0, 0], 5)
+    assert current.tolist() == [0, 0]
+    assert longest.tolist() == [0, 0]
+
+def test_habit_streaks_match_scalar_calculation():
+    """Test that the batch engine agrees with the per-habit calculator."""
+    now = datetime.now()
+    daily = Habit(1, "Daily Habit", "daily")
+    for days_ago in [0, 1, 2, 4, 5, 6, 7, 9]:
+        daily.check_off(now - timedelta(days=days_ago))
+    weekly = Habit(2, "Weekly Habit", "weekly")
+    for weeks_ago in [3, 4, 6]:
+        weekly.check_off(now - timedelta(weeks=weeks_ago))
+
+    current, longest = StreakCalculator.calculate_habit_streaks([daily, weekly], now)
+    assert current[0] == StreakCalculator.calculate_current_streak(daily.completions, 'daily')
+    assert longest[0] == StreakCalculator.calculate_longest_streak(daily.completions, 'daily')
+    assert current[1] == 0
+    assert longest[1] == 2
+    assert isinstance(current, np.ndarray)
+
+def test_streak_calculations_agree():
+    """Test that batch, scalar and Habit streaks agree on weekly and same-day completions."""
+    now = datetime(2024, 3, 13, 20)  # Wednesday
+    histories = [
+        ('daily', [datetime(2024, 3, 1, 12), datetime(2024, 3, 2, 8), datetime(2024, 3, 2, 20),
+                   datetime(2024, 3, 3, 12), datetime(2024, 3, 11, 7), datetime(2024, 3, 12, 7),
+                   datetime(2024, 3, 12, 22)]),
+        ('daily', [datetime(2024, 3, 13, 6), datetime(2024, 3, 13, 9)]),
+        ('weekly', [datetime(2024, 2, 25, 20), datetime(2024, 2, 26, 8), datetime(2024, 3, 3, 20),
+                    datetime(2024, 3, 4, 8), datetime(2024, 3, 5, 8)]),
+        ('weekly', [datetime(2024, 2, 12, 8), datetime(2024, 2, 18, 20)]),
+    ]
+    habits = []
+    for habit_id, (periodicity, dates) in enumerate(histories, 1):
+        habit = Habit(habit_id, f"Habit {habit_id}", periodicity)
+        for date in dates:
+            habit.check_off(date)
+        habits.append(habit)
+
+    current, longest = StreakCalculator.calculate_habit_streaks(habits, now)
+    assert current.tolist() == [2, 1, 3, 0]
+    assert longest.tolist() == [3, 1, 3, 1]
+    previous = set_clock(FixedClock(now))
+    try:
+        for habit, (periodicity, dates), expected_current, expected_longest in zip(
+                habits, histories, current, longest):
+            assert StreakCalculator.calculate_current_streak(dates, periodicity) == expected_current
+            assert StreakCalculator.calculate_longest_streak(dates, periodicity) == expected_longest
+            assert habit.get_current_streak(now) == expected_current
+            assert habit.longest_streak == expected_longest
+    finally:
+        set_clock(previous)
+
+def test_streak_alive_after_yesterday():
+    """Test that all streak calculations keep a streak alive for one missed period."""
+    now = datetime(2024, 3, 13, 20)
+    daily = Habit(1, "Daily Habit", "daily")
+    for days_ago in [1, 2, 3]:
+        daily.check_off(now - timedelta(days=days_ago))
+    weekly = Habit(2, "Weekly Habit", "weekly")
+    for weeks_ago in [1, 2]:
+        weekly.check_off(now - timedelta(weeks=weeks_ago))
+
+    current, _ = StreakCalculator.calculate_habit_streaks([daily, weekly], now)
+    assert current.tolist() == [3, 2]
+    assert daily.get_current_streak(now) == 3
+    assert weekly.get_current_streak(now) == 2
+    previous = set_clock(FixedClock(now))
+    try:
+        assert StreakCalculator.calculate_current_streak(daily.completions, 'daily') == 3
+        assert StreakCalculator.calculate_current_streak(weekly.completions, 'weekly') == 2
+    finally:
+        set_clock(previous)
+
+def test_longest_streak_counts_periods():
+    """Test that the longest streak counts calendar periods, not gaps between completions."""
+    weekly = [datetime(2024, 3, 3, 20), datetime(2024, 3, 4, 8)]  # Sunday, then Monday
+    assert StreakCalculator.calculate_longest_streak(weekly, 'weekly') == 2
+    daily = [datetime(2024, 3, 1, 12), datetime(2024, 3, 2, 8), datetime(2024, 3, 2, 20),
+             datetime(2024, 3, 3, 12)]
+    assert StreakCalculator.calculate_longest_streak(daily, 'daily') == 3
+    assert StreakCalculator.calculate_longest_streak(daily[::-1], 'daily') == 3
+    assert StreakCalculator.calculate_longest_streak([], 'daily') == 0
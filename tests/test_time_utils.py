@@ -0,0 +1,89 @@
+import threading
+from datetime import datetime
+import pytest
+from habit_tracker.models.habit import Habit
+from habit_tracker.utils.habit_validator import HabitValidator
+from habit_tracker.utils.streak_calculator import StreakCalculator
+from habit_tracker.utils.time_utils import (
+    Clock, FixedClock, current_time, frozen_time, period_ordinal, set_clock,
+    to_epoch_seconds, today_ordinal
+)
+
+@pytest.fixture
+def clock():
+    """Pin the current time to Wednesday 2024-03-13 10:00."""
+    fixed = FixedClock(datetime(2024, 3, 13, 10))
+    previous = set_clock(fixed)
+    yield fixed
+    set_clock(previous)
+
+def test_fixed_clock(clock):
+    """Test pinning and advancing the current time."""
+    assert current_time() == datetime(2024, 3, 13, 10)
+    clock.advance(days=1, hours=2)
+    assert current_time() == datetime(2024, 3, 14, 12)
+
+def test_set_clock_returns_previous():
+    """Test that set_clock hands back the clock it replaces."""
+    fixed = FixedClock(datetime(2024, 1, 1))
+    previous = set_clock(fixed)
+    try:
+        assert isinstance(previous, Clock)
+        assert set_clock(previous) is fixed
+    finally:
+        set_clock(previous)
+
+def test_frozen_time(clock):
+    """Test that the time is resolved once per operation."""
+    with frozen_time() as moment:
+        clock.advance(days=1)
+        assert current_time() == moment == datetime(2024, 3, 13, 10)
+        # Nested blocks reuse the outer time
+        with frozen_time() as inner:
+            assert inner == moment
+        assert current_time() == moment
+        # Other threads are not affected
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(current_time()))
+        thread.start()
+        thread.join()
+        assert seen == [datetime(2024, 3, 14, 10)]
+    assert current_time() == datetime(2024, 3, 14, 10)
+
+def test_period_ordinal(clock):
+    """Test day and ISO week ordinals."""
+    sunday = to_epoch_seconds(datetime(2024, 3, 17, 23, 59))
+    monday = to_epoch_seconds(datetime(2024, 3, 18, 0, 1))
+    assert period_ordinal(monday, 'daily') == period_ordinal(sunday, 'daily') + 1
+    assert period_ordinal(monday, 'weekly') == period_ordinal(sunday, 'weekly') + 1
+    assert today_ordinal('weekly') == period_ordinal(sunday, 'weekly')
+    assert today_ordinal() == period_ordinal(to_epoch_seconds(datetime(2024, 3, 13)), 'daily')
+
+def test_completion_validation_uses_iso_weeks(clock):
+    """Test that weekly habits can be checked off again from Monday on."""
+    monday_morning = datetime(2024, 3, 11, 7)
+    is_valid, error = HabitValidator.validate_habit_completion(monday_morning, 'weekly')
+    assert not is_valid
+    assert 'week' in error
+
+    last_sunday = datetime(2024, 3, 10, 22)
+    is_valid, _ = HabitValidator.validate_habit_completion(last_sunday, 'weekly')
+    assert is_valid
+
+    is_valid, error = HabitValidator.validate_habit_completion(datetime(2024, 3, 13, 6), 'daily')
+    assert not is_valid
+    assert 'today' in error
+
+def test_streaks_follow_the_clock(clock):
+    """Test that streaks and check-offs use the pinned time."""
+    dates = [datetime(2024, 3, day, 8) for day in (10, 11, 12, 13)]
+    assert StreakCalculator.calculate_current_streak(dates, 'daily') == 4
+    clock.advance(days=2)
+    assert StreakCalculator.calculate_current_streak(dates, 'daily') == 0
+    assert StreakCalculator.calculate_longest_streak(dates, 'daily') == 4
+
+    habit = Habit(1, "Read", "daily")
+    assert habit.creation_date == current_time()
+    habit.check_off()
+    assert habit.last_check_date == datetime(2024, 3, 15, 10)
+    assert habit.get_current_streak() == 1
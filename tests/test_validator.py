@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from habit_tracker.utils.habit_validator import HabitValidator
+from habit_tracker.utils.time_utils import to_epoch_seconds
 
 def test_habit_creation_validation():
     """Test habit creation validation."""
@@ -47,4 +48,31 @@ def test_habit_completion_validation():
         now - timedelta(days=1), "daily"
     )
     assert is_valid
-    assert error is None
\ No newline at end of file
+    assert error is None
+
+def test_batch_completion_validation():
+    """Test validating backfilled completions against the history and the batch."""
+    monday = datetime(2024, 3, 11, 8)
+    history = [to_epoch_seconds(monday)]
+    records = [
+        # Same day as the history
+        {'habit_id': 1, 'periodicity': 'daily', 'completion_epochs': history,
+         'check_epoch': to_epoch_seconds(monday + timedelta(hours=2))},
+        {'habit_id': 1, 'periodicity': 'daily', 'completion_epochs': history,
+         'check_epoch': to_epoch_seconds(monday + timedelta(days=1))},
+        # Same day as the previous record of the batch
+        {'habit_id': 1, 'periodicity': 'daily', 'completion_epochs': history,
+         'check_epoch': to_epoch_seconds(monday + timedelta(days=1, hours=5))},
+        # Same ISO week as the history, but a different habit
+        {'habit_id': 2, 'periodicity': 'weekly', 'completion_epochs': history,
+         'check_epoch': to_epoch_seconds(monday + timedelta(days=6))},
+        {'habit_id': 2, 'periodicity': 'weekly', 'completion_epochs': history,
+         'check_epoch': to_epoch_seconds(monday + timedelta(days=7))},
+        {'habit_id': 3, 'periodicity': 'daily', 'completion_epochs': [],
+         'check_epoch': to_epoch_seconds(datetime.now() + timedelta(days=1))},
+    ]
+    results = HabitValidator.validate_habit_completions(records)
+    assert [is_valid for is_valid, _ in results] == [False, True, False, False, True, False]
+    assert results[0][1] == "Habit already checked off on that day"
+    assert results[3][1] == "Habit already checked off in that week"
+    assert "future" in results[5][1]